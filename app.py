@@ -4,129 +4,116 @@ Student Grade Predictor - Flask Web Application
 Uses Linear Regression to predict student next semester SGPA based on previous semesters.
 """
 
-from flask import Flask, render_template, request, jsonify, redirect, url_for, session
-import pandas as pd
-import numpy as np
-from sklearn.model_selection import train_test_split
-from sklearn.metrics import mean_squared_error, r2_score, mean_absolute_error, accuracy_score, f1_score
-from sklearn.compose import ColumnTransformer
-from sklearn.preprocessing import OneHotEncoder
-from sklearn.pipeline import Pipeline
-from sklearn.linear_model import LinearRegression, LogisticRegression
-from fpdf import FPDF
-from io import BytesIO
-from functools import wraps
-from database import ExcelDatabase
+from perf import STARTUP, RENDERS
+
+with STARTUP.phase('import flask/numpy'):
+    import os
+    import math
+    import hashlib
+    import threading
+    import time
+    from datetime import datetime, timezone
+    from flask import Flask, render_template, request, jsonify, redirect, url_for, session
+    from flask import before_render_template, template_rendered
+    from markupsafe import Markup
+    from werkzeug.http import is_resource_modified
+    import numpy as np
+    from io import BytesIO
+    from functools import wraps
+
+with STARTUP.phase('import app modules'):
+    from database import ExcelDatabase
+    from model_manager import ModelManager, ModelBundle
+    from model_registry import ModelRegistry
+    import forecasting
+    from online_learner import OnlineLearner
+    from rate_limit import RateLimiter
+    from fragment_cache import FragmentCache
+    import live_updates
 
 app = Flask(__name__)
 app.secret_key = "replace-me-with-a-secure-key-for-production-use-random-secret"
 app.config['PERMANENT_SESSION_LIFETIME'] = 7200  # 2 hours session timeout
 
 # Initialize Excel Database
-db = ExcelDatabase(data_folder='data')
-
-# In-memory storage for submitted subject grades (simple internal store)
-stored_subject_grades = {}
-# In-memory store for last generated report payload per student (to support direct download)
-last_reports = {}
+with STARTUP.phase('database'):
+    db = ExcelDatabase(data_folder='data')
 
 # ------------------------------------------------------------------
-# Load and prepare data
-print("Loading data...")
-DATA_PATH = "data/student-mat.csv"
-
-# Check if CSV exists, if not download it
-import os
-if not os.path.exists(DATA_PATH):
-    print("student-mat.csv not found. Downloading from UCI ML Repository...")
+# Load the selected models from the registry (see select_model.py);
+# train inline with the default estimators only if none is registered
+registry = ModelRegistry()
+
+def print_model_metrics(metrics):
+    print(f"Model trained - R^2: {metrics['r2']:.4f}, RMSE: {metrics['rmse']:.4f}, MAE: {metrics['mae']:.4f}")
+    print(f"Classification trained - Accuracy: {metrics['accuracy']:.4f}, F1: {metrics['f1']:.4f}")
+
+def load_registered_bundle():
+    """Active registry version; unpickling it imports sklearn, so it runs in the background"""
+    with STARTUP.phase('load registered model', background=True):
+        trained = registry.load()
+        print(f"Loaded registered model {trained['version']}")
+        print_model_metrics(trained['metrics'])
+        bundle = ModelBundle(trained)
+    STARTUP.mark_model_ready()
+    return bundle
+
+if registry.active_version() is not None:
+    # Newly activated registry versions are loaded, validated and swapped in by
+    # a background watcher; each request uses model_manager.current() throughout
+    model_manager = ModelManager(registry, loader=load_registered_bundle)
+else:
+    print("No registered model found, training default models...")
+    with STARTUP.phase('train default models'):
+        from dataset import load_dataset, DatasetError
+        from training import train_models
+        try:
+            # A fresh checkout has no dataset yet; it is downloaded once and checked
+            # like a local file before anything is trained on it
+            data = load_dataset(fetch_missing=True)
+        except DatasetError as e:
+            print(f"Error loading dataset: {e}")
+            raise SystemExit(1)
+        # Encode once into a shared sparse design matrix, then fit the G3 regressor
+        # and the pass/fail (G3 >= 10) classifier from it
+        trained = train_models(data, test_size=0.2, random_state=42)
+        print_model_metrics(trained['metrics'])
+        model_manager = ModelManager(registry, ModelBundle(trained))
+        STARTUP.mark_model_ready()
+        del trained
+
+# Forecast parameters fitted by fit_forecast.py; defaults until one is published
+forecast_store = forecasting.ForecastParamStore()
+
+# One-step SGPA residual spread for the Monte Carlo intervals, re-estimated
+# from the stored SGPA histories whenever they or the forecast parameters change
+_noise_cache = {'key': None, 'std': forecasting.DEFAULT_NOISE_STD}
+
+def get_forecast_noise(forecast_version, forecast_params):
     try:
-        import urllib.request
-        url = "https://archive.ics.uci.edu/ml/machine-learning-databases/00320/student.zip"
-        import zipfile
-        import io
-        
-        print("Downloading dataset...")
-        response = urllib.request.urlopen(url)
-        zip_data = response.read()
-        
-        print("Extracting student-mat.csv...")
-        with zipfile.ZipFile(io.BytesIO(zip_data)) as zip_file:
-            # Extract student-mat.csv to data folder
-            os.makedirs('data', exist_ok=True)
-            with zip_file.open('student-mat.csv') as source:
-                with open(DATA_PATH, 'wb') as target:
-                    target.write(source.read())
-        print("Dataset downloaded successfully!")
-    except Exception as e:
-        print(f"Error downloading dataset: {e}")
-        print("Please manually download student-mat.csv from:")
-        print("https://archive.ics.uci.edu/ml/machine-learning-databases/00320/student.zip")
-        print("Extract and place student-mat.csv in the data/ folder")
-        exit(1)
-
-data = pd.read_csv(DATA_PATH, sep=";")
-
-# Split features/target
-target_col = "G3"
-features = data.drop(columns=[target_col])
-target = data[target_col]
-
-# Identify categorical and numeric columns
-categorical_cols = features.select_dtypes(include=["object"]).columns.tolist()
-numeric_cols = [c for c in features.columns if c not in categorical_cols]
-
-# Preprocess: one-hot encode categoricals, pass numeric through
-preprocess = ColumnTransformer(
-    transformers=[
-        ("categorical", OneHotEncoder(handle_unknown="ignore"), categorical_cols),
-        ("numeric", "passthrough", numeric_cols),
-    ]
-)
+        key = (os.stat(db.sgpa_file).st_mtime_ns, forecast_version)
+    except FileNotFoundError:
+        return forecasting.DEFAULT_NOISE_STD
+    if _noise_cache['key'] != key:
+        histories = list(db.get_sgpa_histories().values())
+        _noise_cache['std'] = forecasting.estimate_noise_std(histories, forecast_params)
+        _noise_cache['key'] = key
+    return _noise_cache['std']
+
+MAX_SIMULATION_BATCH = 1000
+
+# Learns a forecast correction from recorded outcomes in the background
+online_learner = OnlineLearner(db)
+
+def start_background_tasks():
+    """Model watcher and online learner threads. Threads do not survive fork,
+    so serve.py skips this on import and calls it in each worker instead.
+    """
+    model_manager.start_watcher()
+    online_learner.start()
 
-# Build the full pipeline
-model = Pipeline(
-    steps=[
-        ("preprocess", preprocess),
-        ("regressor", LinearRegression()),
-    ]
-)
-
-# Train / test split
-print("Training model...")
-X_train, X_test, y_train, y_test = train_test_split(
-    features, target, test_size=0.2, random_state=42
-)
-
-# Fit model
-model.fit(X_train, y_train)
-
-# Evaluate
-y_pred = model.predict(X_test)
-mse = mean_squared_error(y_test, y_pred)
-rmse = np.sqrt(mse)
-mae = mean_absolute_error(y_test, y_pred)
-r2 = r2_score(y_test, y_pred)
-
-print(f"Model trained - R^2: {r2:.4f}, RMSE: {rmse:.4f}, MAE: {mae:.4f}")
-
-# Classification: Pass/Fail (G3 >= 10)
-print("Training classification model (pass/fail)...")
-y_class = (target >= 10).astype(int)
-Xc_train, Xc_test, yc_train, yc_test = train_test_split(
-    features, y_class, test_size=0.2, random_state=42
-)
-
-clf = Pipeline(
-    steps=[
-        ("preprocess", preprocess),
-        ("classifier", LogisticRegression(max_iter=1000))
-    ]
-)
-clf.fit(Xc_train, yc_train)
-yc_pred = clf.predict(Xc_test)
-clf_acc = accuracy_score(yc_test, yc_pred)
-clf_f1 = f1_score(yc_test, yc_pred)
-print(f"Classification trained - Accuracy: {clf_acc:.4f}, F1: {clf_f1:.4f}")
+if os.environ.get('APP_DEFER_BACKGROUND_TASKS') != '1':
+    start_background_tasks()
 
 # ------------------------------------------------------------------
 # Authentication Decorators
@@ -159,42 +146,155 @@ def role_required(role):
     return decorator
 
 # ------------------------------------------------------------------
-# Performance helpers
+# Admission control: over-limit requests are rejected before any disk I/O
+
+# Buckets are per process; serve.py sets APP_WORKERS so that each worker
+# admits its share and all workers together stay within these limits
+WORKER_PROCESSES = int(os.environ.get('APP_WORKERS', '1'))
+
+RATE_LIMITERS = {
+    # per user (or client address): rate/s, burst; whole app: rate/s, burst
+    'predict': RateLimiter(0.5, 5, 20, 40, processes=WORKER_PROCESSES),
+    'login': RateLimiter(0.2, 5, 10, 20, processes=WORKER_PROCESSES),
+    'report': RateLimiter(0.2, 3, 5, 10, processes=WORKER_PROCESSES),
+}
+
+def rate_limited(name, methods=None, template=None, key=None):
+    """Decorator to admit a request only if its user and the whole app have tokens left.
+    key() names the user (default: session user, else client address). Rejected
+    requests get 429 with Retry-After, as JSON or the given template.
+    """
+    limiter = RATE_LIMITERS[name]
+    def decorator(f):
+        @wraps(f)
+        def decorated_function(*args, **kwargs):
+            if methods is None or request.method in methods:
+                wait = limiter.acquire(key() if key else session.get('username') or request.remote_addr)
+                if wait > 0:
+                    retry_after = max(1, math.ceil(wait))
+                    message = f'Too many requests. Please try again in {retry_after} seconds.'
+                    if template:
+                        response = app.make_response((render_template(template, error=message), 429))
+                    else:
+                        response = jsonify({'success': False, 'error': message})
+                        response.status_code = 429
+                    response.headers['Retry-After'] = str(retry_after)
+                    return response
+            return f(*args, **kwargs)
+        return decorated_function
+    return decorator
 
-# Cache base row
-_base_input_row = None
+# ------------------------------------------------------------------
+# Conditional GET: a client whose copy is still current gets 304 from the
+# storage version counters, before any table is read or template rendered
 
-def build_base_input():
-    global _base_input_row
-    if _base_input_row is None:
-        base = {}
-        for col in X_train.columns:
-            if col in numeric_cols:
-                base[col] = float(X_train[col].median())
+def code_version():
+    """Digest of the app's Python modules and templates; the same in every
+    worker process and across restarts until a file changes
+    """
+    digest = hashlib.sha1()
+    template_folder = os.path.join(app.root_path, app.template_folder)
+    paths = [os.path.join(app.root_path, name) for name in os.listdir(app.root_path) if name.endswith('.py')]
+    paths += [os.path.join(template_folder, name) for name in os.listdir(template_folder)]
+    for path in sorted(paths):
+        digest.update(os.path.relpath(path, app.root_path).encode())
+        with open(path, 'rb') as f:
+            digest.update(f.read())
+    return digest.hexdigest()[:12]
+
+# Part of every ETag, so deploying new templates or code invalidates old copies
+ETAG_SALT = code_version()
+
+def storage_etag(path, query_string, session_data, versions, model_version=None):
+    """ETag of a response built for this path, query and session from tables at the given versions"""
+    key = (ETAG_SALT, path, query_string, sorted(session_data.items()), versions, model_version)
+    return hashlib.sha1(repr(key).encode()).hexdigest()
+
+def storage_last_modified(tables):
+    modified = db.data_modified(*tables)
+    return datetime.fromtimestamp(modified, timezone.utc) if modified else None
+
+def conditional(*tables, model=False):
+    """Decorator to send an ETag and Last-Modified with GET responses.
+    The ETag covers the version counters of the tables the view reads (and the
+    model version if model=True), the path, query string and session (who is
+    asking and what the page shows them). Place it above login_required: a
+    matching If-None-Match (or If-Modified-Since) skips the view entirely.
+    """
+    def decorator(f):
+        @wraps(f)
+        def decorated_function(*args, **kwargs):
+            versions = db.data_version(*tables)
+            last_modified = storage_last_modified(tables)
+            model_version = model_manager.version if model else None
+
+            def etag():
+                return storage_etag(request.path, request.query_string, session, versions, model_version)
+
+            if not is_resource_modified(request.environ, etag=etag(), last_modified=last_modified):
+                response = app.response_class(status=304)
             else:
-                base[col] = X_train[col].mode().iloc[0]
-        _base_input_row = pd.DataFrame([base])
-    return _base_input_row.copy(deep=True)
+                response = app.make_response(f(*args, **kwargs))
+                if response.status_code != 200:
+                    return response
+            # Computed after the view, which may have updated the session
+            response.set_etag(etag())
+            if last_modified is not None:
+                response.last_modified = last_modified
+            response.cache_control.private = True
+            response.cache_control.no_cache = True
+            response.vary.add('Cookie')
+            return response
+        return decorated_function
+    return decorator
 
-# Precompute feature pairs
-_feature_pairs = None
+# ------------------------------------------------------------------
+# Template rendering: render time per template (served by /api/metrics) and
+# fragments that are rendered once per data version
 
-def _compute_feature_pairs():
-    global _feature_pairs
-    try:
-        reg = model.named_steps["regressor"]
-        enc = model.named_steps["preprocess"].named_transformers_["categorical"]
-        cat_names = list(enc.get_feature_names_out(categorical_cols))
-        all_names = cat_names + numeric_cols
-        coefs = np.ravel(reg.coef_)
-        _feature_pairs = sorted(zip(all_names, coefs), key=lambda x: abs(x[1]), reverse=True)
-    except Exception:
-        _feature_pairs = []
+_render_started = threading.local()
 
-_compute_feature_pairs()
+@before_render_template.connect_via(app)
+def start_render_timer(sender, template, context, **extra):
+    _render_started.at = time.perf_counter()
 
-def get_top_features(k=8):
-    return _feature_pairs[:k] if _feature_pairs else []
+@template_rendered.connect_via(app)
+def record_render_time(sender, template, context, **extra):
+    started = getattr(_render_started, 'at', None)
+    if started is not None:
+        RENDERS.record(template.name, time.perf_counter() - started)
+        _render_started.at = None
+
+fragments = FragmentCache()
+
+# Everything templates/dept_stat_card.html shows, and so its cache key
+DEPT_CARD_FIELDS = ('name', 'total_students', 'avg_cgpa', 'avg_attendance',
+                    'best_count', 'average_count', 'worst_count')
+
+def render_fragment(template_name, key, **context):
+    """HTML of a template fragment, rendered only the first time (template_name, *key) is seen"""
+    def render():
+        with RENDERS.timed(f'fragment:{template_name}'):
+            return Markup(app.jinja_env.get_template(template_name).render(**context))
+    return fragments.get_or_render((template_name, *key), render)
+
+# ------------------------------------------------------------------
+# Performance helpers
+
+def get_top_features(k=8, bundle=None):
+    return (bundle or model_manager.current()).top_features(k)
+
+MAX_SCORE_BATCH = 1000
+
+def model_metrics_context(bundle):
+    """Template variables describing a model version"""
+    return {
+        'r2': bundle.metrics['r2'],
+        'rmse': bundle.metrics['rmse'],
+        'mae': bundle.metrics['mae'],
+        'test_samples': len(bundle.X_test),
+        'model_version': bundle.version
+    }
 
 def sgpa_to_letter_grade(sgpa):
     """Convert SGPA (0-4.0 scale) to letter grade"""
@@ -252,6 +352,8 @@ def home():
     return render_template('login.html')
 
 @app.route('/login', methods=['GET', 'POST'])
+@rate_limited('login', methods=('POST',), template='login.html',
+              key=lambda: f"{request.remote_addr}:{request.form.get('username', '').strip()}")
 def login():
     if request.method == 'GET':
         return render_template('login.html')
@@ -400,17 +502,190 @@ def reset_password(token):
 @app.route('/api/metrics')
 def api_metrics():
     """Expose trained model metrics for UI display."""
+    bundle = model_manager.current()
     try:
         return jsonify({
-            'r2': round(float(r2), 3),
-            'rmse': round(float(rmse), 3),
-            'mae': round(float(mae), 3),
-            'test_samples': int(len(X_test))
+            'r2': round(float(bundle.metrics['r2']), 3),
+            'rmse': round(float(bundle.metrics['rmse']), 3),
+            'mae': round(float(bundle.metrics['mae']), 3),
+            'test_samples': int(len(bundle.X_test)),
+            'model_version': bundle.version,
+            'model_swapped_at': model_manager.swapped_at,
+            'model_error': model_manager.last_error,
+            'online_learner': online_learner.stats(),
+            'rate_limits': {name: limiter.stats() for name, limiter in RATE_LIMITERS.items()},
+            'startup': STARTUP.summary(),
+            'templates': RENDERS.summary(),
+            'fragment_cache': fragments.stats()
         })
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 
+@app.route('/api/score', methods=['POST'])
+@login_required
+def score_students():
+    """Score one feature row ("row") or a batch ("rows") with the G3 and pass/fail models.
+    Features missing from a row or given as null default to the training median/mode.
+    """
+    data = request.get_json() or {}
+    rows = data.get('rows')
+    if rows is None:
+        rows = [data.get('row') or {}]
+    
+    if not isinstance(rows, list) or not all(isinstance(r, dict) for r in rows):
+        return jsonify({'error': 'rows must be a list of feature objects'}), 400
+    if len(rows) > MAX_SCORE_BATCH:
+        return jsonify({'error': f'At most {MAX_SCORE_BATCH} rows can be scored per request'}), 400
+    
+    bundle = model_manager.current()
+    try:
+        g3_values, pass_probs = bundle.score_rows(rows)
+    except (ValueError, TypeError) as e:
+        return jsonify({'error': f'Invalid feature values: {e}'}), 400
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+    # NaN or Infinity inputs give scores that JSON cannot represent
+    if not (np.all(np.isfinite(g3_values)) and np.all(np.isfinite(pass_probs))):
+        return jsonify({'error': 'Invalid feature values: numbers must be finite'}), 400
+    
+    predictions = []
+    for g3, pass_prob in zip(g3_values, pass_probs):
+        risk, insight = risk_level(g3)
+        predictions.append({
+            'predicted_g3': round(float(g3), 2),
+            'pass_probability': round(float(pass_prob) * 100, 1),
+            'pass': bool(pass_prob >= 0.5),
+            'risk': risk,
+            'insight': insight
+        })
+    
+    return jsonify({'predictions': predictions, 'model_version': bundle.version})
+
+
+@app.route('/api/forecast/simulate', methods=['POST'])
+@login_required
+def simulate_forecast():
+    """Monte Carlo SGPA forecasts for a cohort.
+    Body: {"histories": [[sgpa, ...], ...], "pass_cgpa": 2.0, "n_paths": 2000}
+    """
+    data = request.get_json() or {}
+    histories = data.get('histories')
+    if not isinstance(histories, list) or not histories:
+        return jsonify({'error': 'histories must be a non-empty list of SGPA lists'}), 400
+    if len(histories) > MAX_SIMULATION_BATCH:
+        return jsonify({'error': f'At most {MAX_SIMULATION_BATCH} students can be simulated per request'}), 400
+    
+    try:
+        histories = [[float(v) for v in h] for h in histories]
+        pass_cgpa = float(data.get('pass_cgpa', forecasting.PASS_CGPA))
+        n_paths = min(max(int(data.get('n_paths', 2000)), 100), 10000)
+    except (TypeError, ValueError):
+        return jsonify({'error': 'SGPA values, pass_cgpa and n_paths must be numbers'}), 400
+    if any(not 1 <= len(h) < forecasting.FINAL_SEMESTER or not all(0 <= v <= 4 for v in h) for h in histories):
+        return jsonify({'error': 'Each history needs 1-7 SGPAs between 0 and 4'}), 400
+    
+    forecast_version, forecast_params = forecast_store.active()
+    noise_std = get_forecast_noise(forecast_version, forecast_params)
+    results = forecasting.simulate_forecasts(
+        histories, forecast_params, noise_std=noise_std, n_paths=n_paths, pass_cgpa=pass_cgpa
+    )
+    return jsonify({
+        'forecasts': results,
+        'noise_std': round(noise_std, 4),
+        'forecast_version': forecast_version
+    })
+
+
+MAX_FIRST_SEMESTER_BATCH = 1000
+
+def parse_first_semester_inputs(entries):
+    """Attendance (0-100) and midterm (0-50) arrays from request entries; raises ValueError"""
+    attendance, midterm = [], []
+    for entry in entries:
+        att = float(entry.get('attendance'))
+        mid = float(entry.get('midterm'))
+        if not (0 <= att <= 100 and 0 <= mid <= 50):
+            raise ValueError('Attendance must be 0-100 and midterm 0-50')
+        attendance.append(att)
+        midterm.append(mid)
+    return attendance, midterm
+
+def first_semester_record(username, attendance, estimate):
+    """save_prediction fields for a first-semester estimate"""
+    return {
+        'username': username,
+        'semester': 1,
+        'predicted_cgpa': estimate['estimated_sgpa'],
+        'predicted_grade': sgpa_to_letter_grade(estimate['estimated_sgpa']),
+        'pass_probability': estimate['pass_probability'],
+        'attendance': int(round(attendance))
+    }
+
+@app.route('/api/predict/first-semester', methods=['POST'])
+@login_required
+@rate_limited('predict')
+def predict_first_semester():
+    """Estimate a first-semester student's SGPA from attendance and midterm marks and save it"""
+    data = request.get_json() or {}
+    try:
+        attendance, midterm = parse_first_semester_inputs([data])
+    except (TypeError, ValueError) as e:
+        return jsonify({'error': f'Invalid attendance or midterm: {e}'}), 400
+    
+    _, forecast_params = forecast_store.active()
+    estimate = forecasting.estimate_first_semester(attendance, midterm, forecast_params)[0]
+    
+    username = session.get('username')
+    if username and session.get('role') == 'student':
+        estimate['prediction_id'] = db.save_prediction(**first_semester_record(username, attendance[0], estimate))
+    
+    return jsonify(estimate)
+
+
+# Default what-if grid: 21 attendance x 11 midterm x 4 improvement scenarios
+WHAT_IF_ATTENDANCE = list(range(0, 101, 5))
+WHAT_IF_MIDTERM = list(range(0, 51, 5))
+WHAT_IF_IMPROVEMENT = [0.0, 0.3, 0.5, 1.0]
+MAX_WHAT_IF_SCENARIOS = 5000
+
+@app.route('/api/what-if', methods=['POST'])
+@login_required
+def what_if():
+    """Response surface of the forecast over attendance / midterm / grade-improvement scenarios.
+    Body: {"history": [sgpa, ...]} plus optional "attendance", "midterm" and
+    "improvement" value lists replacing the default grid.
+    """
+    data = request.get_json() or {}
+    try:
+        history = [float(v) for v in data.get('history') or []]
+        attendance = [float(v) for v in data.get('attendance', WHAT_IF_ATTENDANCE)]
+        midterm = [float(v) for v in data.get('midterm', WHAT_IF_MIDTERM)]
+        improvement = [float(v) for v in data.get('improvement', WHAT_IF_IMPROVEMENT)]
+    except (TypeError, ValueError):
+        return jsonify({'error': 'history and scenario values must be lists of numbers'}), 400
+    
+    if not 1 <= len(history) < forecasting.FINAL_SEMESTER or not all(0 <= v <= 4 for v in history):
+        return jsonify({'error': 'history needs 1-7 SGPAs between 0 and 4'}), 400
+    if not attendance or not midterm or not improvement:
+        return jsonify({'error': 'Scenario value lists cannot be empty'}), 400
+    if len(attendance) * len(midterm) * len(improvement) > MAX_WHAT_IF_SCENARIOS:
+        return jsonify({'error': f'At most {MAX_WHAT_IF_SCENARIOS} scenarios per request'}), 400
+    
+    forecast_version, forecast_params = forecast_store.active()
+    surfaces = forecasting.what_if_grid(
+        history, attendance, midterm, improvement, forecast_params,
+        noise_std=get_forecast_noise(forecast_version, forecast_params)
+    )
+    return jsonify({
+        'attendance': attendance,
+        'midterm': midterm,
+        'improvement': improvement,
+        'forecast_version': forecast_version,
+        **surfaces
+    })
+
+
 @app.route('/start')
 def start():
     """Student setup page: ask name, semester, and degree program."""
@@ -419,6 +694,7 @@ def start():
     return render_template('start.html')
 
 @app.route('/predictor')
+@conditional('grades', model=True)
 def index():
     """Serve the main predictor page. Accepts optional query params from the landing page."""
     # Prefer query params; fallback to session
@@ -455,10 +731,7 @@ def index():
 
     return render_template(
         'index.html',
-        r2=r2,
-        rmse=rmse,
-        mae=mae,
-        test_samples=len(X_test),
+        **model_metrics_context(model_manager.current()),
         student_name=student_name,
         semesters_completed=semesters_int,
         department=department,
@@ -467,36 +740,25 @@ def index():
     )
 
 @app.route('/teacher')
+@conditional('users', 'predictions', model=True)
 def teacher_dashboard():
     if session.get('role') != 'teacher':
         return redirect(url_for('login'))
     
-    # Get real data from CSV files
-    categorized = db.get_categorized_students()
-    dept_stats = db.get_department_statistics()
-    
-    best_students = categorized['best']
-    average_students = categorized['average']
-    worst_students = categorized['worst']
-    
-    # If no students have predictions yet, show empty state
-    if not best_students and not average_students and not worst_students:
-        best_students = []
-        average_students = []
-        worst_students = []
-        dept_stats = []
+    # Students are loaded page by page from /api/teacher/students by teacher.js.
+    # Each department's card is keyed on the statistics it shows, so a write
+    # only re-renders the cards of the departments whose numbers changed
+    dept_cards = [
+        render_fragment('dept_stat_card.html', tuple(dept[field] for field in DEPT_CARD_FIELDS), dept=dept)
+        for dept in db.get_department_statistics()
+    ]
     
     return render_template('teacher.html', 
-                         r2=r2, 
-                         rmse=rmse, 
-                         mae=mae, 
-                         test_samples=len(X_test),
-                         best_students=best_students,
-                         average_students=average_students,
-                         worst_students=worst_students,
-                         dept_stats=dept_stats)
+                         **model_metrics_context(model_manager.current()),
+                         dept_cards=dept_cards)
 
 @app.route('/api/predict', methods=['POST'])
+@rate_limited('predict')
 def predict():
     """Handle prediction requests for all remaining semester SGPAs based on previous semester grades."""
     try:
@@ -522,21 +784,13 @@ def predict():
         avg_sgpa = np.mean(sgpa_values)
         num_semesters = len(semesters)
 
-        # If subject grades were provided, store them internally keyed by student name
+        # Subject grades are kept with the student's last report, keyed by student name
         subject_grades_payload = data.get('subject_grades')
         student_name = data.get('student_name', '')
-        if subject_grades_payload and student_name:
-            try:
-                stored_subject_grades[student_name] = subject_grades_payload
-            except Exception:
-                pass
         
         # Calculate trend
+        trend_slope = forecasting.trend_slope(sgpa_values)
         if num_semesters > 1:
-            # Linear regression on semester progression to detect trend
-            semester_nums = np.arange(1, num_semesters + 1)
-            trend_slope = np.polyfit(semester_nums, sgpa_values, 1)[0]
-            
             if trend_slope > 0.05:
                 trend_direction = "Improving ↑"
             elif trend_slope < -0.05:
@@ -545,47 +799,28 @@ def predict():
                 trend_direction = "Stable →"
         else:
             trend_direction = "First Semester"
-            trend_slope = 0
         
-        # Predict all remaining semesters
-        predictions = []
-        current_sgpa_history = sgpa_values.copy()
+        # Predict all remaining semesters with the active (fitted or default) parameters
+        forecast_version, forecast_params = forecast_store.active()
+        predictions = [
+            {'semester': sem_num, 'predicted_sgpa': round(pred_sgpa, 2)}
+            for sem_num, pred_sgpa in forecasting.forecast_sgpa(sgpa_values, forecast_params)
+        ]
         
-        for next_sem_num in range(num_semesters + 1, 9):  # Predict up to semester 8
-            # Predict next semester SGPA using weighted approach
-            num_hist = len(current_sgpa_history)
-            last_sgpa = current_sgpa_history[-1]
-            
-            if num_hist == 1:
-                # Only one semester: use it as baseline with slight regression to mean
-                pred_sgpa = last_sgpa * 0.9 + 2.5 * 0.1
-            else:
-                # Multiple semesters: weighted average with trend consideration
-                weights = np.exp(np.linspace(0, 1, num_hist))  # Exponential weights favoring recent
-                weighted_avg = np.average(current_sgpa_history, weights=weights)
-                
-                # Calculate momentum (recent performance vs overall average)
-                recent_avg = np.mean(current_sgpa_history[-min(3, num_hist):])
-                momentum = recent_avg - np.mean(current_sgpa_history)
-                
-                # Predict with trend and momentum
-                pred_sgpa = weighted_avg + (momentum * 0.3)
-                
-                # Add trend influence with decay for distant predictions
-                if num_hist > 2:
-                    decay_factor = 0.9 ** (next_sem_num - num_semesters - 1)
-                    pred_sgpa += trend_slope * 0.2 * decay_factor
-            
-            # Bound the prediction to valid SGPA range
-            pred_sgpa = max(0, min(4, pred_sgpa))
-            
-            predictions.append({
-                'semester': next_sem_num,
-                'predicted_sgpa': round(pred_sgpa, 2)
-            })
-            
-            # Add prediction to history for next iteration
-            current_sgpa_history.append(pred_sgpa)
+        # Shift the forecast by the correction learned from actual outcomes (0 until it beats the forecast)
+        raw_forecast_cgpa = float(np.mean([p['predicted_sgpa'] for p in predictions]))
+        online_correction = online_learner.correction(sgpa_values, raw_forecast_cgpa)
+        if online_correction:
+            for p in predictions:
+                p['predicted_sgpa'] = round(max(0, min(4, p['predicted_sgpa'] + online_correction)), 2)
+        
+        # Monte Carlo intervals around the forecast and the chance of a passing final CGPA
+        noise_std = get_forecast_noise(forecast_version, forecast_params)
+        simulation = forecasting.simulate_forecasts(
+            [sgpa_values], forecast_params, noise_std=noise_std, shift=online_correction
+        )[0]
+        for p, interval in zip(predictions, simulation['semesters']):
+            p['interval'] = {'p10': interval['p10'], 'p50': interval['p50'], 'p90': interval['p90']}
         
         # Risk assessment based on average of predicted SGPAs
         avg_predicted = np.mean([p['predicted_sgpa'] for p in predictions])
@@ -639,7 +874,11 @@ def predict():
             'semesters_count': num_semesters,
             'risk': risk,
             'insight': insight,
-            'features': features_list
+            'features': features_list,
+            'forecast_version': forecast_version,
+            'online_correction': round(online_correction, 3),
+            'cgpa_interval': simulation['cgpa'],
+            'pass_probability': simulation['pass_probability']
         }
 
         if grade_counts:
@@ -649,21 +888,26 @@ def predict():
             resp['subject_grades'] = subject_grades_payload
 
         # include any stored subject grades for this student in response
-        if student_name and student_name in stored_subject_grades:
-            resp['subject_grades_stored'] = stored_subject_grades.get(student_name)
-
-        # Cache last report data for this student so they can download directly
-        try:
-            report_payload = resp.copy()
-            report_payload['semesters'] = semesters
-            report_payload['student_name'] = student_name
-            report_payload['department'] = data.get('department', '')
-            report_payload['subject_grades'] = subject_grades_payload
-            report_payload['attendance'] = data.get('attendance')
-            report_payload['midterm'] = data.get('midterm')
-            last_reports[student_name] = report_payload
-        except Exception:
-            pass
+        if student_name:
+            previous_report = db.get_report(student_name) or {}
+            stored_grades = subject_grades_payload or previous_report.get('subject_grades_stored')
+            if stored_grades:
+                resp['subject_grades_stored'] = stored_grades
+
+        # Store last report data for this student so they can download it directly
+        # (in storage, so any server worker can serve the download)
+        if student_name:
+            try:
+                report_payload = resp.copy()
+                report_payload['semesters'] = semesters
+                report_payload['student_name'] = student_name
+                report_payload['department'] = data.get('department', '')
+                report_payload['subject_grades'] = subject_grades_payload
+                report_payload['attendance'] = data.get('attendance')
+                report_payload['midterm'] = data.get('midterm')
+                db.save_report(student_name, report_payload)
+            except Exception as e:
+                print(f"Error storing report: {e}")
 
         # Save prediction to history for logged-in users
         try:
@@ -686,8 +930,8 @@ def predict():
                 # Convert SGPA to letter grade
                 predicted_grade = sgpa_to_letter_grade(avg_predicted_cgpa)
                 
-                # Calculate pass probability
-                pass_prob = 100.0 if avg_predicted_cgpa >= 2.0 else (avg_predicted_cgpa / 2.0) * 100
+                # Simulated probability of finishing with a passing CGPA
+                pass_prob = simulation['pass_probability']
                 
                 # Calculate average attendance from subject grades payload
                 attendance_val = None
@@ -717,7 +961,8 @@ def predict():
                     pass_probability=pass_prob,
                     attendance=attendance_val,
                     study_hours=None,  # Not tracked in current version
-                    absences=None
+                    absences=None,
+                    raw_forecast_cgpa=raw_forecast_cgpa
                 )
                 resp['prediction_id'] = prediction_id
         except Exception as e:
@@ -730,11 +975,13 @@ def predict():
         return jsonify({'error': str(e)}), 500
 
 @app.route('/api/download-report', methods=['POST'])
+@rate_limited('report')
 def download_report():
     try:
         data = request.get_json()
         
         # Create PDF
+        from fpdf import FPDF
         pdf = FPDF()
         pdf.add_page()
         pdf.set_font("Arial", size=12)
@@ -874,17 +1121,19 @@ def download_report():
 
 
 @app.route('/download-latest')
+@rate_limited('report')
 def download_latest():
     """Download the last generated report for a student by name (GET).
-    Uses cached `last_reports` stored when `/api/predict` was called.
+    Uses the report stored when `/api/predict` was called.
     """
     name = request.args.get('name', '')
-    if not name or name not in last_reports:
+    data = db.get_report(name) if name else None
+    if not data:
         return jsonify({'error': 'No report found for this student (generate predictions first).'}), 404
 
-    data = last_reports.get(name, {})
     # Reuse the PDF generation logic from download_report
     try:
+        from fpdf import FPDF
         pdf = FPDF()
         pdf.add_page()
         pdf.set_font("Arial", size=12)
@@ -959,6 +1208,7 @@ def download_latest():
 # ------------------------------------------------------------------
 
 @app.route('/api/prediction-history', methods=['GET'])
+@conditional('predictions')
 @login_required
 def get_prediction_history():
     """Get prediction history for the logged-in user"""
@@ -988,6 +1238,7 @@ def get_department_subjects(department):
         return jsonify({'success': False, 'error': str(e)}), 500
 
 @app.route('/api/get-saved-grades', methods=['GET'])
+@conditional('grades', 'sgpa')
 @login_required
 def get_saved_grades():
     """Get saved grades for logged-in student"""
@@ -1000,9 +1251,27 @@ def get_saved_grades():
         else:
             grades = db.get_student_grades(username)
         
+        # Precomputed SGPA per semester (maintained by save_student_grades)
+        sgpa = db.get_student_sgpa(username)
+        if semester:
+            sgpa = {sem: val for sem, val in sgpa.items() if sem == semester}
+        
+        return jsonify({
+            'success': True,
+            'grades': grades,
+            'sgpa': sgpa
+        })
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+@app.route('/api/subject-predictions', methods=['GET'])
+@login_required
+def get_subject_predictions():
+    """Per-subject outlook for the logged-in student from the cohort baselines"""
+    try:
         return jsonify({
             'success': True,
-            'grades': grades
+            'subjects': db.get_subject_predictions(session.get('username'))
         })
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)}), 500
@@ -1032,11 +1301,208 @@ def update_actual_performance():
         actual_cgpa = float(data.get('actual_cgpa'))
         actual_grade = data.get('actual_grade')
         
+        # Outcomes train the correction applied to every student's forecast, so a
+        # student may only record them for their own predictions
+        owner = db.get_prediction_owner(prediction_id)
+        if owner is not None and session.get('role') != 'teacher' and owner != session.get('username'):
+            return jsonify({'success': False, 'error': 'You can only record outcomes for your own predictions'}), 403
+        
         result = db.update_actual_performance(prediction_id, actual_cgpa, actual_grade)
+        if result['success']:
+            # Learn from the forecast before any online correction, or the correction would feed back into itself
+            online_learner.submit(result['username'], result['semester'], result['raw_forecast_cgpa'], actual_cgpa)
         
         return jsonify(result)
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)}), 500
 
+# ------------------------------------------------------------------
+# TEACHER ANALYTICS API ENDPOINTS
+# ------------------------------------------------------------------
+
+@app.route('/api/teacher/first-semester', methods=['POST'])
+@login_required
+@role_required('teacher')
+def score_first_semester_cohort():
+    """Estimate and save first-semester predictions for a cohort.
+    Body: {"students": [{"username": ..., "attendance": 0-100, "midterm": 0-50}, ...]}
+    """
+    students = (request.get_json() or {}).get('students')
+    if not isinstance(students, list) or not students or not all(isinstance(s, dict) for s in students):
+        return jsonify({'error': 'students must be a non-empty list of objects'}), 400
+    if len(students) > MAX_FIRST_SEMESTER_BATCH:
+        return jsonify({'error': f'At most {MAX_FIRST_SEMESTER_BATCH} students can be scored per request'}), 400
+    
+    registered = db.get_student_usernames()
+    valid, errors = [], []
+    seen = set()
+    for entry in students:
+        username = str(entry.get('username', ''))
+        try:
+            if username not in registered:
+                raise ValueError('Unknown student')
+            if username in seen:
+                raise ValueError('Duplicate student in this request')
+            parse_first_semester_inputs([entry])
+        except (TypeError, ValueError) as e:
+            errors.append({'username': username, 'error': str(e)})
+            continue
+        seen.add(username)
+        valid.append({**entry, 'username': username})
+    
+    results = []
+    if valid:
+        attendance, midterm = parse_first_semester_inputs(valid)
+        _, forecast_params = forecast_store.active()
+        estimates = forecasting.estimate_first_semester(attendance, midterm, forecast_params)
+        prediction_ids = db.save_predictions([
+            first_semester_record(entry['username'], att, estimate)
+            for entry, att, estimate in zip(valid, attendance, estimates)
+        ])
+        for entry, estimate, prediction_id in zip(valid, estimates, prediction_ids):
+            results.append({'username': entry['username'], 'prediction_id': prediction_id, **estimate})
+    
+    return jsonify({'results': results, 'errors': errors})
+
+@app.route('/api/teacher/students', methods=['GET'])
+@login_required
+@role_required('teacher')
+def get_teacher_students():
+    """Get one page of student summaries, filtered and sorted on the server"""
+    try:
+        page = db.get_student_page(
+            department=request.args.get('department', '').strip() or None,
+            category=request.args.get('category', '').strip() or None,
+            min_cgpa=request.args.get('min_cgpa', type=float),
+            max_cgpa=request.args.get('max_cgpa', type=float),
+            semester=request.args.get('semester', type=int),
+            search=request.args.get('search', '').strip() or None,
+            sort=request.args.get('sort', 'cgpa'),
+            order=request.args.get('order', 'desc'),
+            limit=request.args.get('limit', 20, type=int),
+            cursor=request.args.get('cursor') or None
+        )
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+    
+    return jsonify({
+        'success': True,
+        'students': page['students'],
+        'total': page['total'],
+        'next_cursor': page['next_cursor']
+    })
+
+@app.route('/api/teacher/stream', methods=['GET'])
+@login_required
+@role_required('teacher')
+def stream_student_updates():
+    """Server-sent events with the summaries of students whose data changed"""
+    last_event_id = request.headers.get('Last-Event-ID', type=int)
+    stream = live_updates.StudentUpdateStream(db, app.json.dumps, last_event_id)
+
+    def events():
+        yield stream.opening()
+        started = last_sent = time.monotonic()
+        while not db.changes.closed and time.monotonic() - started < live_updates.MAX_STREAM_AGE:
+            message = stream.wait(live_updates.POLL_INTERVAL)
+            if not message and time.monotonic() - last_sent >= live_updates.KEEPALIVE_INTERVAL:
+                message = ': keepalive\n\n'
+            if message:
+                last_sent = time.monotonic()
+                yield message
+
+    return app.response_class(events(), mimetype='text/event-stream',
+                              headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+@app.route('/api/teacher/changes', methods=['GET'])
+@login_required
+@role_required('teacher')
+def get_student_changes():
+    """Delta sync: summaries of the students changed after ?since=<version>.
+    Clients keep the returned version and send it next time; reset=True means
+    the response holds every student and replaces the client's copy.
+    """
+    try:
+        changes = db.get_student_changes(request.args.get('since', type=int))
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+    return jsonify({'success': True, **changes})
+
+@app.route('/api/teacher/students/<username>', methods=['GET'])
+@login_required
+@role_required('teacher')
+def get_teacher_student_details(username):
+    """Get full details (history, semester grades) for one student"""
+    try:
+        student = db.get_student_details(username)
+        if student is None:
+            return jsonify({'success': False, 'error': 'Student not found'}), 404
+        
+        return jsonify({
+            'success': True,
+            'student': student
+        })
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+@app.route('/api/teacher/rank/<username>', methods=['GET'])
+@login_required
+@role_required('teacher')
+def get_student_rank(username):
+    """Get a student's rank and percentile within their department"""
+    try:
+        rank = db.get_student_rank(username)
+        if rank is None:
+            return jsonify({'success': False, 'error': 'Student has no predictions yet'}), 404
+        
+        return jsonify({
+            'success': True,
+            'rank': rank
+        })
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+@app.route('/api/teacher/rankings', methods=['GET'])
+@login_required
+@role_required('teacher')
+def get_department_rankings():
+    """Get the top or bottom K students of one or all departments"""
+    try:
+        department = request.args.get('department', '').strip()
+        k = request.args.get('k', 10, type=int)
+        order = request.args.get('order', 'top')
+        
+        if order not in ('top', 'bottom'):
+            return jsonify({'success': False, 'error': "order must be 'top' or 'bottom'"}), 400
+        
+        rankings = db.get_department_rankings(department or None, k, order)
+        
+        return jsonify({
+            'success': True,
+            'order': order,
+            'rankings': rankings
+        })
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+@app.route('/api/teacher/subject-baselines', methods=['GET'])
+@login_required
+@role_required('teacher')
+def get_subject_baselines():
+    """Cohort average and difficulty of every graded subject, hardest first"""
+    try:
+        return jsonify({
+            'success': True,
+            'subjects': db.get_subject_baselines()
+        })
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+# Everything above runs on import; the model itself may still be loading
+STARTUP.mark_ready()
+STARTUP.print_summary()
+
 if __name__ == '__main__':
     app.run(debug=True, host='127.0.0.1', port=5000)
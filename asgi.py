@@ -0,0 +1,371 @@
+"""
+ASGI Entry Point
+Serves the storage-bound read endpoints (prediction history, saved grades and
+the teacher dashboard's student pages and delta sync) natively async: their CSV reads run on
+an I/O thread pool while the event loop keeps accepting requests, so one
+process can hold many concurrent dashboard and history requests. The teacher
+dashboard's live-update stream is served here too, without holding a thread. Every other
+route is handed to the Flask app on a separate, smaller pool, so CPU-heavy
+predictions neither block the event loop nor take the I/O threads.
+
+Usage (with any ASGI server, e.g. pip install uvicorn):
+    uvicorn asgi:application --host 127.0.0.1 --port 8000
+"""
+
+import asyncio
+import io
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from http.cookies import SimpleCookie
+from urllib.parse import parse_qsl
+
+from itsdangerous import BadSignature
+from werkzeug.datastructures import MultiDict
+from werkzeug.http import http_date, is_resource_modified
+
+import app as flask_module
+import live_updates
+
+flask_app = flask_module.app
+db = flask_module.db
+
+# Storage reads mostly wait on the disk, so this pool can be much larger than the core count
+IO_POOL = ThreadPoolExecutor(max_workers=32, thread_name_prefix='storage-io')
+# Everything routed to Flask (predictions, reports, pages)
+APP_POOL = ThreadPoolExecutor(max_workers=os.cpu_count() or 1, thread_name_prefix='flask')
+
+# Seconds between change feed checks of an open live-update stream
+STREAM_POLL_INTERVAL = 0.5
+
+_session_serializer = flask_app.session_interface.get_signing_serializer(flask_app)
+_END = object()
+
+
+# ------------------------------------------------------------------
+# Request helpers
+
+def load_session(scope):
+    """The Flask session dict from the signed cookie ({} if missing or invalid)"""
+    cookies = SimpleCookie()
+    for name, value in scope['headers']:
+        if name == b'cookie':
+            cookies.load(value.decode('latin-1'))
+    morsel = cookies.get(flask_app.config['SESSION_COOKIE_NAME'])
+    if morsel is None:
+        return {}
+    try:
+        return _session_serializer.loads(
+            morsel.value, max_age=int(flask_app.permanent_session_lifetime.total_seconds())
+        )
+    except BadSignature:
+        return {}
+
+
+async def read_body(receive):
+    body = b''
+    while True:
+        message = await receive()
+        body += message.get('body', b'')
+        if not message.get('more_body'):
+            return body
+
+
+async def send_response(send, status, body, headers=()):
+    await send({'type': 'http.response.start', 'status': status, 'headers': list(headers)})
+    await send({'type': 'http.response.body', 'body': body})
+
+
+async def send_json(send, payload, status=200, headers=()):
+    body = (flask_app.json.dumps(payload, separators=(",", ":")) + "\n").encode()  # same bytes as jsonify
+    await send_response(send, status, body, [
+        (b'content-type', b'application/json'),
+        (b'content-length', str(len(body)).encode()),
+        *headers,
+    ])
+
+
+def cache_validators(scope, tables):
+    """(client copy is current, ETag/Last-Modified headers) for a response built
+    from the given tables; the same validators the Flask conditional decorator uses
+    """
+    session = load_session(scope)
+    etag = flask_module.storage_etag(scope['path'], scope.get('query_string', b''), session,
+                                     db.data_version(*tables))
+    last_modified = flask_module.storage_last_modified(tables)
+    request_headers = dict(scope['headers'])
+    environ = {
+        'HTTP_IF_NONE_MATCH': request_headers.get(b'if-none-match', b'').decode('latin-1') or None,
+        'HTTP_IF_MODIFIED_SINCE': request_headers.get(b'if-modified-since', b'').decode('latin-1') or None,
+    }
+    headers = [
+        (b'etag', f'"{etag}"'.encode()),
+        (b'cache-control', b'private, no-cache'),
+        (b'vary', b'Cookie'),
+    ]
+    if last_modified is not None:
+        headers.append((b'last-modified', http_date(last_modified).encode()))
+    return not is_resource_modified(environ, etag=etag, last_modified=last_modified), headers
+
+
+async def redirect_to_login(send, clear_session=False):
+    headers = [(b'location', b'/login'), (b'content-length', b'0')]
+    if clear_session:
+        cookie_name = flask_app.config['SESSION_COOKIE_NAME']
+        headers.append((b'set-cookie', f'{cookie_name}=; Expires=Thu, 01 Jan 1970 00:00:00 GMT; '
+                                       'Max-Age=0; Path=/'.encode()))
+    await send_response(send, 302, b'', headers)
+
+
+async def run_io(func, *args):
+    return await asyncio.get_running_loop().run_in_executor(IO_POOL, func, *args)
+
+
+async def authenticate(scope, send, role=None):
+    """The session if it is valid (and has the role); otherwise redirect and return None"""
+    session = load_session(scope)
+    session_id = session.get('session_id')
+    if not session_id:
+        await redirect_to_login(send)
+        return None
+    validation = await run_io(db.validate_session, session_id)
+    if not validation['valid']:
+        await redirect_to_login(send, clear_session=True)
+        return None
+    if role is not None and session.get('role') != role:
+        await redirect_to_login(send)
+        return None
+    return session
+
+
+# ------------------------------------------------------------------
+# Async routes (same responses as the Flask routes of the same path)
+
+async def prediction_history(scope, send, args):
+    current, validators = cache_validators(scope, ('predictions',))
+    if current:
+        return await send_response(send, 304, b'', validators)
+    session = await authenticate(scope, send)
+    if session is None:
+        return
+    try:
+        history = await run_io(db.get_prediction_history, session.get('user'), args.get('limit', 10, type=int))
+    except Exception as e:
+        return await send_json(send, {'success': False, 'error': str(e)}, 500)
+    await send_json(send, {'success': True, 'history': history}, headers=validators)
+
+
+async def saved_grades(scope, send, args):
+    current, validators = cache_validators(scope, ('grades', 'sgpa'))
+    if current:
+        return await send_response(send, 304, b'', validators)
+    session = await authenticate(scope, send)
+    if session is None:
+        return
+    username = session.get('username')
+    semester = args.get('semester', type=int)
+    try:
+        # Both files are read concurrently
+        grades, sgpa = await asyncio.gather(
+            run_io(db.get_student_grades, username, semester),
+            run_io(db.get_student_sgpa, username),
+        )
+    except Exception as e:
+        return await send_json(send, {'success': False, 'error': str(e)}, 500)
+    if semester:
+        sgpa = {sem: val for sem, val in sgpa.items() if sem == semester}
+    await send_json(send, {'success': True, 'grades': grades, 'sgpa': sgpa}, headers=validators)
+
+
+async def teacher_students(scope, send, args):
+    if await authenticate(scope, send, role='teacher') is None:
+        return
+
+    def build_page():
+        return db.get_student_page(
+            department=args.get('department', '').strip() or None,
+            category=args.get('category', '').strip() or None,
+            min_cgpa=args.get('min_cgpa', type=float),
+            max_cgpa=args.get('max_cgpa', type=float),
+            semester=args.get('semester', type=int),
+            search=args.get('search', '').strip() or None,
+            sort=args.get('sort', 'cgpa'),
+            order=args.get('order', 'desc'),
+            limit=args.get('limit', 20, type=int),
+            cursor=args.get('cursor') or None
+        )
+
+    try:
+        page = await run_io(build_page)
+    except ValueError as e:
+        return await send_json(send, {'success': False, 'error': str(e)}, 400)
+    except Exception as e:
+        return await send_json(send, {'success': False, 'error': str(e)}, 500)
+    await send_json(send, {
+        'success': True,
+        'students': page['students'],
+        'total': page['total'],
+        'next_cursor': page['next_cursor']
+    })
+
+
+async def teacher_changes(scope, send, args):
+    if await authenticate(scope, send, role='teacher') is None:
+        return
+    try:
+        changes = await run_io(db.get_student_changes, args.get('since', type=int))
+    except Exception as e:
+        return await send_json(send, {'success': False, 'error': str(e)}, 500)
+    await send_json(send, {'success': True, **changes})
+
+
+async def wait_for_disconnect(receive):
+    while (await receive())['type'] != 'http.disconnect':
+        pass
+
+
+async def teacher_stream(scope, receive, send):
+    """Same events as the Flask /api/teacher/stream, polled on the event loop"""
+    if await authenticate(scope, send, role='teacher') is None:
+        return
+    try:
+        last_event_id = int(dict(scope['headers']).get(b'last-event-id', b''))
+    except ValueError:
+        last_event_id = None
+    stream = await run_io(live_updates.StudentUpdateStream, db, flask_app.json.dumps, last_event_id)
+
+    await send({'type': 'http.response.start', 'status': 200, 'headers': [
+        (b'content-type', b'text/event-stream; charset=utf-8'),
+        (b'cache-control', b'no-cache'),
+        (b'x-accel-buffering', b'no'),
+    ]})
+
+    async def push(text):
+        await send({'type': 'http.response.body', 'body': text.encode(), 'more_body': True})
+
+    loop = asyncio.get_running_loop()
+    disconnected = asyncio.ensure_future(wait_for_disconnect(receive))
+    try:
+        await push(stream.opening())
+        started = last_sent = loop.time()
+        while not db.changes.closed and loop.time() - started < live_updates.MAX_STREAM_AGE:
+            done, _ = await asyncio.wait({disconnected}, timeout=STREAM_POLL_INTERVAL)
+            if done:
+                return
+            message = await run_io(stream.poll)
+            if not message and loop.time() - last_sent >= live_updates.KEEPALIVE_INTERVAL:
+                message = ': keepalive\n\n'
+            if message:
+                last_sent = loop.time()
+                await push(message)
+        await send({'type': 'http.response.body', 'body': b''})
+    finally:
+        disconnected.cancel()
+
+
+ASYNC_ROUTES = {
+    '/api/prediction-history': prediction_history,
+    '/api/get-saved-grades': saved_grades,
+    '/api/teacher/students': teacher_students,
+    '/api/teacher/changes': teacher_changes,
+}
+# Long-lived responses that also watch for the client going away
+STREAMING_ROUTES = {
+    '/api/teacher/stream': teacher_stream,
+}
+
+
+# ------------------------------------------------------------------
+# Flask fallback
+
+def build_environ(scope, body):
+    """WSGI environ for an ASGI HTTP scope"""
+    server_name, server_port = scope.get('server') or ('localhost', 80)
+    environ = {
+        'REQUEST_METHOD': scope['method'],
+        'SCRIPT_NAME': scope.get('root_path', '').encode('utf-8').decode('latin-1'),
+        'PATH_INFO': scope['path'].encode('utf-8').decode('latin-1'),
+        'QUERY_STRING': scope.get('query_string', b'').decode('latin-1'),
+        'SERVER_NAME': str(server_name),
+        'SERVER_PORT': str(server_port),
+        'SERVER_PROTOCOL': f"HTTP/{scope.get('http_version', '1.1')}",
+        'REMOTE_ADDR': (scope.get('client') or ('', 0))[0],
+        'wsgi.version': (1, 0),
+        'wsgi.url_scheme': scope.get('scheme', 'http'),
+        'wsgi.input': io.BytesIO(body),
+        'wsgi.errors': sys.stderr,
+        'wsgi.multithread': True,
+        'wsgi.multiprocess': False,
+        'wsgi.run_once': False,
+    }
+    for name, value in scope['headers']:
+        name = name.decode('latin-1').upper().replace('-', '_')
+        value = value.decode('latin-1')
+        if name in ('CONTENT_TYPE', 'CONTENT_LENGTH'):
+            environ[name] = value
+            continue
+        key = f'HTTP_{name}'
+        environ[key] = f'{environ[key]},{value}' if key in environ else value
+    return environ
+
+
+async def call_flask(scope, receive, send):
+    """Run the Flask app on APP_POOL, streaming its response body chunk by chunk"""
+    loop = asyncio.get_running_loop()
+    environ = build_environ(scope, await read_body(receive))
+    started = {}
+
+    def start_response(status, headers, exc_info=None):
+        started['status'] = int(status.split(' ', 1)[0])
+        started['headers'] = [(k.lower().encode('latin-1'), v.encode('latin-1')) for k, v in headers]
+        return lambda data: None
+
+    def start():
+        result = flask_app(environ, start_response)
+        return result, iter(result)
+
+    result, chunks = await loop.run_in_executor(APP_POOL, start)
+    try:
+        await send({'type': 'http.response.start', 'status': started['status'], 'headers': started['headers']})
+        while True:
+            chunk = await loop.run_in_executor(APP_POOL, next, chunks, _END)
+            if chunk is _END:
+                break
+            if chunk:
+                await send({'type': 'http.response.body', 'body': chunk, 'more_body': True})
+        await send({'type': 'http.response.body', 'body': b''})
+    finally:
+        if hasattr(result, 'close'):
+            await loop.run_in_executor(APP_POOL, result.close)
+
+
+# ------------------------------------------------------------------
+# ASGI application
+
+async def lifespan(receive, send):
+    while True:
+        message = await receive()
+        if message['type'] == 'lifespan.startup':
+            await send({'type': 'lifespan.startup.complete'})
+        elif message['type'] == 'lifespan.shutdown':
+            db.changes.close()
+            IO_POOL.shutdown(wait=False)
+            APP_POOL.shutdown(wait=False)
+            await send({'type': 'lifespan.shutdown.complete'})
+            return
+
+
+async def application(scope, receive, send):
+    if scope['type'] == 'lifespan':
+        return await lifespan(receive, send)
+    if scope['type'] != 'http':
+        return
+
+    route = ASYNC_ROUTES.get(scope['path'])
+    if route is not None and scope['method'] in ('GET', 'HEAD'):
+        args = MultiDict(parse_qsl(scope.get('query_string', b'').decode('latin-1'), keep_blank_values=True))
+        return await route(scope, send, args)
+    route = STREAMING_ROUTES.get(scope['path'])
+    if route is not None and scope['method'] == 'GET':
+        return await route(scope, receive, send)
+    await call_flask(scope, receive, send)
@@ -0,0 +1,130 @@
+"""
+Student Change Log
+Append-only log with one (seq, username, kind, timestamp) row per student
+whose dashboard data a committed write changed. ExcelDatabase appends to it
+on every mutation; the teacher dashboard's live stream and the delta-sync API
+(/api/teacher/changes) read it. The file is shared by every server process
+(appends are serialised with a file lock) and survives restarts, so seq is a
+storage version clients can sync from. Only the most recent rows are kept; a
+reader that fell behind them is told to resync.
+
+    data/change_log.csv
+"""
+
+import csv
+import io
+import os
+import threading
+from collections import deque
+from datetime import datetime
+
+from table_versions import file_lock
+
+HEADER = ['seq', 'username', 'kind', 'timestamp']
+
+
+class ChangeFeed:
+    def __init__(self, path, max_events=10000):
+        self.path = path
+        self.lock_path = path + '.lock'
+        self.max_events = max_events
+        self._events = deque(maxlen=max_events)  # (seq, username, kind, timestamp), oldest first
+        self._seq = 0
+        self._first_seq = None  # first seq in the file, to know when to compact it
+        self._source = (None, 0)  # (inode, bytes read) of the file
+        self._cond = threading.Condition()
+        self.closed = False
+
+    @property
+    def latest(self):
+        with self._cond:
+            self._refresh()
+            return self._seq
+
+    def _refresh(self):
+        """Read the rows any process appended since the last call (caller holds _cond)"""
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            return
+        inode, offset = self._source
+        if inode != stat.st_ino:
+            # New or compacted file: read it from the start
+            self._events.clear()
+            self._seq, self._first_seq, offset = 0, None, 0
+        if stat.st_size <= offset:
+            return
+
+        with open(self.path, 'rb') as f:
+            f.seek(offset)
+            chunk = f.read()
+        end = chunk.rfind(b'\n') + 1  # a row still being written is read next time
+        for row in csv.reader(io.StringIO(chunk[:end].decode('utf-8'))):
+            if not row or row[0] == 'seq':
+                continue
+            seq = int(row[0])
+            self._events.append((seq, row[1], row[2], row[3]))
+            self._seq = seq
+            if self._first_seq is None:
+                self._first_seq = seq
+        self._source = (stat.st_ino, offset + end)
+
+    def publish(self, usernames, kind):
+        """Append one row per changed student; returns the new latest seq"""
+        with self._cond, file_lock(self.lock_path):
+            self._refresh()
+            timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+            buffer = io.StringIO()
+            writer = csv.writer(buffer, lineterminator='\n')
+            if not os.path.exists(self.path):
+                writer.writerow(HEADER)
+            for seq, username in enumerate(usernames, start=self._seq + 1):
+                writer.writerow([seq, username, kind, timestamp])
+            with open(self.path, 'a', encoding='utf-8', newline='') as f:
+                f.write(buffer.getvalue())
+            self._refresh()
+
+            if self._first_seq is not None and self._seq - self._first_seq >= 2 * self.max_events:
+                self._compact()
+            self._cond.notify_all()
+            return self._seq
+
+    def _compact(self):
+        """Rewrite the file with only the rows still kept in memory"""
+        buffer = io.StringIO()
+        writer = csv.writer(buffer, lineterminator='\n')
+        writer.writerow(HEADER)
+        writer.writerows(self._events)
+        tmp_path = f'{self.path}.{os.getpid()}.tmp'
+        with open(tmp_path, 'w', encoding='utf-8', newline='') as f:
+            f.write(buffer.getvalue())
+        os.replace(tmp_path, self.path)
+        self._source = (None, 0)
+        self._refresh()
+
+    def _since(self, seq):
+        if not 0 <= seq <= self._seq or (self._events and self._events[0][0] > seq + 1):
+            return None, self._seq
+        return [event for event in self._events if event[0] > seq], self._seq
+
+    def since(self, seq):
+        """(events after seq, latest seq); events is None if they are no longer all known"""
+        with self._cond:
+            self._refresh()
+            return self._since(seq)
+
+    def wait(self, seq, timeout):
+        """since(seq), after waiting up to timeout seconds for a change from this
+        process; changes from other processes are picked up when it returns
+        """
+        with self._cond:
+            self._refresh()
+            self._cond.wait_for(lambda: self._seq != seq or self.closed, timeout)
+            self._refresh()
+            return self._since(seq)
+
+    def close(self):
+        """Wake every waiting reader; used when the process is shutting down"""
+        with self._cond:
+            self.closed = True
+            self._cond.notify_all()
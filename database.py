@@ -5,21 +5,130 @@ Students stored in CSV, Single Teacher with hardcoded credentials
 
 import pandas as pd
 import os
+import copy
+import json
+import base64
+import hashlib
+import threading
+import bisect
 from datetime import datetime, timedelta
 from werkzeug.security import generate_password_hash, check_password_hash
 import secrets
+import uuid
+from rank_index import DepartmentRankIndex
+from subject_predictions import SubjectPredictor
+from singleflight import SingleFlight
+from table_versions import TableVersions, file_lock
+from change_feed import ChangeFeed
+
+# Optional columnar snapshot support (Arrow IPC / Feather v2)
+try:
+    import pyarrow as pa
+    import pyarrow.feather as feather
+except ImportError:
+    pa = None
+    feather = None
+
+TIMESTAMP_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+# Grade to GPA mapping for calculating SGPA from grades
+GRADE_TO_GPA = {
+    'A': 4.0, 'A-': 3.7,
+    'B+': 3.3, 'B': 3.0, 'B-': 2.7,
+    'C+': 2.3, 'C': 2.0, 'C-': 1.7,
+    'D': 1.0, 'F': 0.0
+}
+
+# Every subject currently counts for the same number of credits
+SUBJECT_CREDITS = 3
+
+
+def performance_category(cgpa):
+    """Dashboard category of a CGPA: best (>= 3.5), average (>= 2.5) or worst"""
+    if cgpa >= 3.5:
+        return 'best'
+    elif cgpa >= 2.5:
+        return 'average'
+    return 'worst'
+
+
+def calculate_sgpa(grades):
+    """Credit-weighted SGPA from a list of letter grades (None if no grade is gradable)"""
+    total_points = 0
+    total_credits = 0
+    for grade in grades:
+        if grade in GRADE_TO_GPA:
+            total_points += GRADE_TO_GPA[grade] * SUBJECT_CREDITS
+            total_credits += SUBJECT_CREDITS
+    
+    if total_credits == 0:
+        return None
+    return round(total_points / total_credits, 2)
+
+
+# Explicit column types for the analytics tables: repeated strings become
+# categoricals, semesters small ints and timestamps real datetimes
+ANALYTICS_SCHEMAS = {
+    'predictions': {
+        'dtype': {
+            'prediction_id': str, 'username': 'category', 'semester': 'Int8',
+            'predicted_cgpa': 'float64', 'predicted_grade': 'category',
+            'pass_probability': 'float64', 'attendance': str,
+            'study_hours': 'float64', 'absences': 'float64',
+            'actual_cgpa': 'float64', 'actual_grade': 'category',
+            'accuracy_score': 'float64', 'raw_forecast_cgpa': 'float64'
+        },
+        'dates': ['timestamp', 'updated_at'],
+    },
+    'grades': {
+        'dtype': {
+            'username': 'category', 'semester': 'int8',
+            'subject': 'category', 'grade': 'category'
+        },
+        'dates': ['updated_at'],
+    },
+}
 
 class ExcelDatabase:
-    def __init__(self, data_folder='data'):
+    def __init__(self, data_folder='data', use_snapshots=True):
         self.data_folder = data_folder
         self.users_file = os.path.join(data_folder, 'users.csv')
         self.predictions_file = os.path.join(data_folder, 'predictions_history.csv')
         self.sessions_file = os.path.join(data_folder, 'sessions.csv')
         self.grades_file = os.path.join(data_folder, 'student_grades.csv')
+        self.sgpa_file = os.path.join(data_folder, 'semester_sgpa.csv')
+        
+        # Columnar snapshots of the analytics tables (only when pyarrow is installed)
+        self.snapshot_folder = os.path.join(data_folder, 'snapshots')
+        self.use_snapshots = use_snapshots and feather is not None
+        
+        # Last report generated for each student name, for /download-latest
+        self.reports_folder = os.path.join(data_folder, 'reports')
+        
+        # Per-department CGPA rank index, built on first use
+        self._rank_index = None
+        
+        # Cohort subject baselines, built on first use and dropped when grades change
+        self._subject_predictor = None
+        
+        # Version of the CSV each cache was built from; another process writing
+        # the file (e.g. a second server worker) makes the cache rebuild
+        self._cache_sources = {}
+        
+        # Concurrent dashboard builds over the same data version share one computation
+        self._student_builds = SingleFlight()
+        self._students_cache = {}  # details flag -> (data version, students)
+        
+        # Monotonic per-table write counters, shared by every process using this folder
+        self.versions = TableVersions(os.path.join(data_folder, 'table_versions.json'))
+        
+        # Students changed by each committed write (live dashboard updates and delta sync)
+        self.changes = ChangeFeed(os.path.join(data_folder, 'change_log.csv'))
         
         # Hardcoded single teacher credentials
         self.TEACHER_USERNAME = 'Aatka Ali'
-        self.TEACHER_PASSWORD_HASH = generate_password_hash('Aatka123')
+        # generate_password_hash('Aatka123'), precomputed: scrypt takes ~130 ms per startup
+        self.TEACHER_PASSWORD_HASH = 'scrypt:32768:8:1$O8bkvkKlbIEe7swE$fe9bcc32075c408a7895e0c881a28e6ad8831e8c3588c3dad47c5746fa14408967921fdba425262eed77ee77189e7c4a79782953febbf6acf90d358ba6081c91'
         self.TEACHER_FULL_NAME = 'Aatka Ali'
         self.TEACHER_DEPARTMENT = 'Computer Science'
         
@@ -47,6 +156,7 @@ class ExcelDatabase:
         self._init_predictions_file()
         self._init_sessions_file()
         self._init_grades_file()
+        self._init_sgpa_file()
     
     def _init_users_file(self):
         """Initialize users CSV file (empty - students will register themselves)"""
@@ -65,7 +175,8 @@ class ExcelDatabase:
                 'prediction_id', 'username', 'timestamp', 'semester',
                 'predicted_cgpa', 'predicted_grade', 'pass_probability',
                 'attendance', 'study_hours', 'absences',
-                'actual_cgpa', 'actual_grade', 'accuracy_score', 'updated_at'
+                'actual_cgpa', 'actual_grade', 'accuracy_score', 'updated_at',
+                'raw_forecast_cgpa'
             ])
             predictions_df.to_csv(self.predictions_file, index=False)
     
@@ -85,33 +196,55 @@ class ExcelDatabase:
             ])
             grades_df.to_csv(self.grades_file, index=False)
     
+    def _init_sgpa_file(self):
+        """Initialize per-semester SGPA CSV file, backfilled from existing grades"""
+        if not os.path.exists(self.sgpa_file):
+            grades_df = pd.read_csv(self.grades_file)
+            rows = []
+            for (username, semester), sem_grades in grades_df.groupby(['username', 'semester']):
+                sgpa = calculate_sgpa(sem_grades['grade'].tolist())
+                if sgpa is not None:
+                    rows.append({
+                        'username': username,
+                        'semester': int(semester),
+                        'sgpa': sgpa,
+                        'credits': SUBJECT_CREDITS * int(sem_grades['grade'].isin(GRADE_TO_GPA.keys()).sum()),
+                        'updated_at': datetime.now().strftime(TIMESTAMP_FORMAT)
+                    })
+            sgpa_df = pd.DataFrame(rows, columns=['username', 'semester', 'sgpa', 'credits', 'updated_at'])
+            sgpa_df.to_csv(self.sgpa_file, index=False)
+    
     # =============================================
     # USER AUTHENTICATION METHODS
     # =============================================
     
     def register_student(self, username, password, department, semester):
         """Register a new student in CSV"""
-        users_df = pd.read_csv(self.users_file)
-        
-        # Check if username already exists
-        if username in users_df['username'].values:
-            return {'success': False, 'message': 'Username already exists'}
-        
-        # Use username as full_name
-        # Create new user
-        new_user = pd.DataFrame({
-            'username': [username],
-            'password_hash': [generate_password_hash(password)],
-            'full_name': [username],
-            'department': [department],
-            'semester': [semester],
-            'registration_date': [datetime.now().strftime('%Y-%m-%d %H:%M:%S')],
-            'last_login': [None],
-            'is_active': [True]
-        })
-        
-        users_df = pd.concat([users_df, new_user], ignore_index=True)
-        users_df.to_csv(self.users_file, index=False)
+        password_hash = generate_password_hash(password)
+        with self._table_lock(self.users_file):
+            users_df = pd.read_csv(self.users_file)
+            
+            # Check if username already exists
+            if username in users_df['username'].values:
+                return {'success': False, 'message': 'Username already exists'}
+            
+            # Use username as full_name
+            # Create new user
+            new_user = pd.DataFrame({
+                'username': [username],
+                'password_hash': [password_hash],
+                'full_name': [username],
+                'department': [department],
+                'semester': [semester],
+                'registration_date': [datetime.now().strftime('%Y-%m-%d %H:%M:%S')],
+                'last_login': [None],
+                'is_active': [True]
+            })
+            
+            users_df = pd.concat([users_df, new_user], ignore_index=True)
+            users_df.to_csv(self.users_file, index=False)
+            self.versions.bump('users')
+        self.changes.publish([username], 'registered')
         
         return {'success': True, 'message': 'Registration successful'}
     
@@ -145,9 +278,14 @@ class ExcelDatabase:
             return {'success': False, 'message': 'Account is deactivated'}
         
         if check_password_hash(user_data['password_hash'], password):
-            # Update last login
-            users_df.loc[users_df['username'] == username, 'last_login'] = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-            users_df.to_csv(self.users_file, index=False)
+            # Update last login (re-read under the lock so a concurrent write is kept).
+            # No page shows last_login, so this write leaves the 'users' version alone
+            # and logins do not invalidate cached pages
+            with self._table_lock(self.users_file):
+                # As text: a column with no logins yet would otherwise be read as float
+                users_df = pd.read_csv(self.users_file, dtype={'last_login': object})
+                users_df.loc[users_df['username'] == username, 'last_login'] = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+                users_df.to_csv(self.users_file, index=False)
             
             return {
                 'success': True,
@@ -161,23 +299,24 @@ class ExcelDatabase:
     
     def create_session(self, username, user_type, timeout_minutes=120):
         """Create a new session for authenticated user"""
-        sessions_df = pd.read_csv(self.sessions_file)
-        
-        session_id = secrets.token_urlsafe(32)
-        created_at = datetime.now()
-        expires_at = created_at + timedelta(minutes=timeout_minutes)
-        
-        new_session = pd.DataFrame({
-            'session_id': [session_id],
-            'username': [username],
-            'user_type': [user_type],
-            'created_at': [created_at.strftime('%Y-%m-%d %H:%M:%S')],
-            'expires_at': [expires_at.strftime('%Y-%m-%d %H:%M:%S')],
-            'is_active': [True]
-        })
-        
-        sessions_df = pd.concat([sessions_df, new_session], ignore_index=True)
-        sessions_df.to_csv(self.sessions_file, index=False)
+        with self._table_lock(self.sessions_file):
+            sessions_df = pd.read_csv(self.sessions_file)
+            
+            session_id = secrets.token_urlsafe(32)
+            created_at = datetime.now()
+            expires_at = created_at + timedelta(minutes=timeout_minutes)
+            
+            new_session = pd.DataFrame({
+                'session_id': [session_id],
+                'username': [username],
+                'user_type': [user_type],
+                'created_at': [created_at.strftime('%Y-%m-%d %H:%M:%S')],
+                'expires_at': [expires_at.strftime('%Y-%m-%d %H:%M:%S')],
+                'is_active': [True]
+            })
+            
+            sessions_df = pd.concat([sessions_df, new_session], ignore_index=True)
+            sessions_df.to_csv(self.sessions_file, index=False)
         
         return session_id
     
@@ -200,8 +339,7 @@ class ExcelDatabase:
         expires_at = pd.to_datetime(session_data['expires_at'])
         if datetime.now() > expires_at:
             # Deactivate expired session
-            sessions_df.loc[sessions_df['session_id'] == session_id, 'is_active'] = False
-            sessions_df.to_csv(self.sessions_file, index=False)
+            self.invalidate_session(session_id)
             return {'valid': False, 'message': 'Session expired'}
         
         return {
@@ -212,43 +350,87 @@ class ExcelDatabase:
     
     def invalidate_session(self, session_id):
         """Logout - invalidate session"""
-        sessions_df = pd.read_csv(self.sessions_file)
-        sessions_df.loc[sessions_df['session_id'] == session_id, 'is_active'] = False
-        sessions_df.to_csv(self.sessions_file, index=False)
+        with self._table_lock(self.sessions_file):
+            sessions_df = pd.read_csv(self.sessions_file)
+            sessions_df.loc[sessions_df['session_id'] == session_id, 'is_active'] = False
+            sessions_df.to_csv(self.sessions_file, index=False)
     
     # =============================================
     # PREDICTION HISTORY METHODS
     # =============================================
     
     def save_prediction(self, username, semester, predicted_cgpa, predicted_grade, 
-                       pass_probability, attendance=None, study_hours=None, absences=None):
-        """Save a new prediction to history"""
-        predictions_df = pd.read_csv(self.predictions_file)
-        
-        # Generate unique prediction ID
-        prediction_id = f"{username}_{datetime.now().strftime('%Y%m%d%H%M%S')}"
-        
-        new_prediction = pd.DataFrame({
-            'prediction_id': [prediction_id],
-            'username': [username],
-            'timestamp': [datetime.now().strftime('%Y-%m-%d %H:%M:%S')],
-            'semester': [semester],
-            'predicted_cgpa': [predicted_cgpa],
-            'predicted_grade': [predicted_grade],
-            'pass_probability': [pass_probability],
-            'attendance': [attendance],
-            'study_hours': [study_hours],
-            'absences': [absences],
-            'actual_cgpa': [None],
-            'actual_grade': [None],
-            'accuracy_score': [None],
-            'updated_at': [None]
-        })
-        
-        predictions_df = pd.concat([predictions_df, new_prediction], ignore_index=True)
-        predictions_df.to_csv(self.predictions_file, index=False)
+                       pass_probability, attendance=None, study_hours=None, absences=None,
+                       raw_forecast_cgpa=None):
+        """Save a new prediction to history. raw_forecast_cgpa is the forecast mean
+        before the online correction was applied (what the learner trains on).
+        """
+        return self.save_predictions([{
+            'username': username,
+            'semester': semester,
+            'predicted_cgpa': predicted_cgpa,
+            'predicted_grade': predicted_grade,
+            'pass_probability': pass_probability,
+            'attendance': attendance,
+            'study_hours': study_hours,
+            'absences': absences,
+            'raw_forecast_cgpa': raw_forecast_cgpa
+        }])[0]
+    
+    def save_predictions(self, records):
+        """Save many predictions with a single read and write of the history file.
+        Each record has the save_prediction arguments as keys; returns the prediction IDs.
+        """
+        with self._table_lock(self.predictions_file):
+            predictions_df = pd.read_csv(self.predictions_file)
+            
+            # Generate unique prediction IDs; the random suffix keeps two predictions
+            # for one student within the same second apart
+            now = datetime.now()
+            timestamp = now.strftime('%Y-%m-%d %H:%M:%S')
+            prediction_ids = [f"{r['username']}_{now.strftime('%Y%m%d%H%M%S')}_{uuid.uuid4().hex[:8]}" for r in records]
+            
+            new_predictions = pd.DataFrame({
+                'prediction_id': prediction_ids,
+                'username': [r['username'] for r in records],
+                'timestamp': [timestamp] * len(records),
+                'semester': [r['semester'] for r in records],
+                'predicted_cgpa': [r['predicted_cgpa'] for r in records],
+                'predicted_grade': [r['predicted_grade'] for r in records],
+                'pass_probability': [r['pass_probability'] for r in records],
+                'attendance': [r.get('attendance') for r in records],
+                'study_hours': [r.get('study_hours') for r in records],
+                'absences': [r.get('absences') for r in records],
+                'actual_cgpa': [None] * len(records),
+                'actual_grade': [None] * len(records),
+                'accuracy_score': [None] * len(records),
+                'updated_at': [None] * len(records),
+                'raw_forecast_cgpa': [r.get('raw_forecast_cgpa') for r in records]
+            })
+            
+            # The index may only be patched if it reflects the file as it was before this
+            # write; a change made by another process would otherwise be marked as seen
+            index_current = self._cache_sources.get('rank_index') == self._file_version(self.predictions_file)
+            
+            predictions_df = pd.concat([predictions_df, new_predictions], ignore_index=True)
+            predictions_df.to_csv(self.predictions_file, index=False)
+            self.versions.bump('predictions')
+            
+            # Keep the department rank index in step with each student's new average
+            if self._rank_index is not None and not index_current:
+                self._rank_index = None
+            elif self._rank_index is not None:
+                usernames = set(new_predictions['username'])
+                touched = predictions_df[predictions_df['username'].isin(usernames)]
+                user_cgpas = touched['predicted_cgpa'].astype(float).groupby(touched['username']).mean()
+                for username, user_cgpa in user_cgpas.items():
+                    department = self._rank_index.department_of(username) or self._get_student_department(username)
+                    if department is not None:
+                        self._rank_index.update(username, department, round(user_cgpa, 2))
+                self._cache_sources['rank_index'] = self._file_version(self.predictions_file)
         
-        return prediction_id
+        self.changes.publish(dict.fromkeys(r['username'] for r in records), 'prediction')
+        return prediction_ids
     
     def get_prediction_history(self, username, limit=10):
         """Get prediction history for a user"""
@@ -263,26 +445,47 @@ class ExcelDatabase:
         
         return user_predictions.to_dict('records')
     
+    def get_prediction_owner(self, prediction_id):
+        """Username a prediction was made for, or None if there is no such prediction"""
+        predictions_df = pd.read_csv(self.predictions_file, usecols=['prediction_id', 'username'])
+        owners = predictions_df.loc[predictions_df['prediction_id'] == prediction_id, 'username']
+        return None if owners.empty else owners.iloc[0]
+    
     def update_actual_performance(self, prediction_id, actual_cgpa, actual_grade):
         """Update prediction with actual performance for accuracy tracking"""
-        predictions_df = pd.read_csv(self.predictions_file)
-        
-        if prediction_id not in predictions_df['prediction_id'].values:
-            return {'success': False, 'message': 'Prediction not found'}
-        
-        # Calculate accuracy score (percentage difference)
-        pred_row = predictions_df[predictions_df['prediction_id'] == prediction_id].iloc[0]
-        predicted_cgpa = pred_row['predicted_cgpa']
-        accuracy = 100 - (abs(predicted_cgpa - actual_cgpa) / 4.0 * 100)  # Assuming 4.0 scale
-        
-        predictions_df.loc[predictions_df['prediction_id'] == prediction_id, 'actual_cgpa'] = actual_cgpa
-        predictions_df.loc[predictions_df['prediction_id'] == prediction_id, 'actual_grade'] = actual_grade
-        predictions_df.loc[predictions_df['prediction_id'] == prediction_id, 'accuracy_score'] = accuracy
-        predictions_df.loc[predictions_df['prediction_id'] == prediction_id, 'updated_at'] = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-        
-        predictions_df.to_csv(self.predictions_file, index=False)
+        with self._table_lock(self.predictions_file):
+            # As text: columns with no recorded outcome yet would otherwise be read as float
+            predictions_df = pd.read_csv(self.predictions_file, dtype={'actual_grade': object, 'updated_at': object})
+            
+            if prediction_id not in predictions_df['prediction_id'].values:
+                return {'success': False, 'message': 'Prediction not found'}
+            
+            # Calculate accuracy score (percentage difference)
+            pred_row = predictions_df[predictions_df['prediction_id'] == prediction_id].iloc[0]
+            predicted_cgpa = pred_row['predicted_cgpa']
+            # Older rows and first-semester estimates have no separate uncorrected forecast
+            raw_forecast_cgpa = pred_row.get('raw_forecast_cgpa')
+            if raw_forecast_cgpa is None or pd.isna(raw_forecast_cgpa):
+                raw_forecast_cgpa = predicted_cgpa
+            accuracy = 100 - (abs(predicted_cgpa - actual_cgpa) / 4.0 * 100)  # Assuming 4.0 scale
+            
+            predictions_df.loc[predictions_df['prediction_id'] == prediction_id, 'actual_cgpa'] = actual_cgpa
+            predictions_df.loc[predictions_df['prediction_id'] == prediction_id, 'actual_grade'] = actual_grade
+            predictions_df.loc[predictions_df['prediction_id'] == prediction_id, 'accuracy_score'] = accuracy
+            predictions_df.loc[predictions_df['prediction_id'] == prediction_id, 'updated_at'] = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+            
+            predictions_df.to_csv(self.predictions_file, index=False)
+            self.versions.bump('predictions')
+        self.changes.publish([pred_row['username']], 'actual')
         
-        return {'success': True, 'accuracy': accuracy}
+        return {
+            'success': True,
+            'accuracy': accuracy,
+            'username': pred_row['username'],
+            'semester': int(pred_row['semester']),
+            'predicted_cgpa': float(predicted_cgpa),
+            'raw_forecast_cgpa': float(raw_forecast_cgpa)
+        }
     
     def get_prediction_accuracy_stats(self, username):
         """Get accuracy statistics for user's predictions"""
@@ -309,6 +512,25 @@ class ExcelDatabase:
             'worst_accuracy': user_predictions['accuracy_score'].min()
         }
     
+    def get_forecast_training_pairs(self):
+        """(SGPA history, actual_cgpa) for every prediction with a recorded outcome.
+        The history is the student's stored SGPA for semesters 1..semester-1;
+        predictions without that full history are skipped.
+        """
+        predictions_df = pd.read_csv(self.predictions_file)
+        validated = predictions_df[predictions_df['actual_cgpa'].notna()]
+        sgpa_lookup = self.get_sgpa_lookup()
+
+        histories, actual = [], []
+        for username, semester, actual_cgpa in zip(validated['username'], validated['semester'], validated['actual_cgpa']):
+            semester = int(semester)
+            history = [sgpa_lookup.get((username, s)) for s in range(1, semester)]
+            if history and None not in history:
+                histories.append(history)
+                actual.append(float(actual_cgpa))
+
+        return histories, actual
+
     def get_user_info(self, username, user_type='student'):
         """Get user information"""
         if user_type == 'teacher':
@@ -328,280 +550,466 @@ class ExcelDatabase:
         
         return user.iloc[0].to_dict()
     
+    # =============================================
+    # LATEST REPORT METHODS
+    # =============================================
+    
+    def _report_path(self, student_name):
+        digest = hashlib.sha1(student_name.encode('utf-8')).hexdigest()
+        return os.path.join(self.reports_folder, f'{digest}.json')
+    
+    def save_report(self, student_name, payload):
+        """Store the last generated report for a student name, replacing the previous one"""
+        os.makedirs(self.reports_folder, exist_ok=True)
+        path = self._report_path(student_name)
+        tmp_path = f'{path}.{os.getpid()}.{threading.get_ident()}.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(payload, f, default=str)
+        os.replace(tmp_path, path)
+    
+    def get_report(self, student_name):
+        """Last report stored for a student name, or None"""
+        try:
+            with open(self._report_path(student_name), encoding='utf-8') as f:
+                return json.load(f)
+        except (FileNotFoundError, ValueError):
+            return None
+    
+    # =============================================
+    # COLUMNAR SNAPSHOT METHODS
+    # =============================================
+    
+    def _analytics_csv_path(self, table):
+        """CSV source file for an analytics table"""
+        return {'predictions': self.predictions_file, 'grades': self.grades_file}[table]
+    
+    def _snapshot_path(self, table):
+        """Arrow IPC snapshot file for an analytics table"""
+        return os.path.join(self.snapshot_folder, f'{table}.arrow')
+    
+    def read_typed_table(self, table):
+        """Parse an analytics CSV with explicit dtypes instead of inferred object columns"""
+        schema = ANALYTICS_SCHEMAS[table]
+        return pd.read_csv(
+            self._analytics_csv_path(table),
+            dtype=schema['dtype'],
+            parse_dates=schema['dates'],
+            date_format=TIMESTAMP_FORMAT
+        )
+    
+    def write_analytics_snapshot(self, table):
+        """Parse the CSV once and store it as an uncompressed Arrow snapshot.
+        Uncompressed Arrow files can be memory mapped without copying.
+        """
+        csv_path = self._analytics_csv_path(table)
+        source = self._file_version(csv_path)
+        df = self.read_typed_table(table)
+        if not self.use_snapshots:
+            return df
+        
+        # Remember which version (mtime and size) of the CSV the snapshot was built from
+        arrow_table = pa.Table.from_pandas(df, preserve_index=False)
+        metadata = dict(arrow_table.schema.metadata or {})
+        metadata[b'source_version'] = json.dumps(source).encode()
+        arrow_table = arrow_table.replace_schema_metadata(metadata)
+        
+        os.makedirs(self.snapshot_folder, exist_ok=True)
+        snapshot_path = self._snapshot_path(table)
+        # Unique per writer, so two processes rebuilding the same snapshot never share a file
+        tmp_path = f'{snapshot_path}.{os.getpid()}.{threading.get_ident()}.tmp'
+        feather.write_feather(arrow_table, tmp_path, compression='uncompressed')
+        os.replace(tmp_path, snapshot_path)
+        return df
+    
+    def _load_analytics_table(self, table):
+        """Load a typed analytics table, preferring a fresh memory-mapped snapshot"""
+        csv_path = self._analytics_csv_path(table)
+        if not self.use_snapshots:
+            return self.read_typed_table(table)
+        
+        try:
+            arrow_table = feather.read_table(self._snapshot_path(table), memory_map=True)
+            source = (arrow_table.schema.metadata or {}).get(b'source_version')
+            if source is not None and source == json.dumps(self._file_version(csv_path)).encode():
+                return arrow_table.to_pandas()
+        except (OSError, pa.ArrowInvalid):
+            pass
+        
+        # Snapshot missing or stale - rebuild it from the CSV
+        return self.write_analytics_snapshot(table)
+    
     # =============================================
     # TEACHER DASHBOARD ANALYTICS METHODS
     # =============================================
     
-    def get_all_students_with_predictions(self):
-        """Get all students with their prediction history for teacher dashboard"""
+    def get_all_students_with_predictions(self, details=True):
+        """Get all students with their prediction history for teacher dashboard.
+        With details=False only the summary fields are built (no subjects,
+        history or semester_details), which is all the list views need.
+        The list is built once per data version: concurrent callers wait for
+        the build in flight and later callers reuse it until the data changes.
+        """
+        tables = ('users', 'predictions', 'grades', 'sgpa') if details else ('users', 'predictions')
+        version = self.data_version(*tables)
+        cached = self._students_cache.get(details)
+        if cached is None or cached[0] != version:
+            students = self._student_builds.do((details, version), lambda: self._build_all_students(details))
+            cached = (version, students)
+            self._students_cache[details] = cached
+        # Callers filter, sort and annotate what they get (get_student_page sets
+        # 'category'), so each gets its own copy down to the nested history and
+        # prediction dicts; the cached ones are shared by every request
+        return copy.deepcopy(cached[1])
+    
+    def _build_all_students(self, details):
         users_df = pd.read_csv(self.users_file)
-        predictions_df = pd.read_csv(self.predictions_file)
-        grades_df = pd.read_csv(self.grades_file)
+        predictions_df = self._load_analytics_table('predictions')
+        predictions_by_user = dict(tuple(predictions_df.groupby('username', observed=True)))
+        
+        grades_by_user = {}
+        sgpa_lookup = {}
+        if details:
+            grades_df = self._load_analytics_table('grades')
+            grades_by_user = dict(tuple(grades_df.groupby('username', observed=True)))
+            sgpa_lookup = self.get_sgpa_lookup()
         
         students_data = []
         
         for _, student in users_df.iterrows():
             username = student['username']
+            student_data = self._build_student_record(
+                student,
+                predictions_by_user.get(username, predictions_df.iloc[0:0]),
+                grades_by_user.get(username),
+                sgpa_lookup,
+                details
+            )
+            students_data.append(student_data)
+        
+        return students_data
+    
+    def get_student_details(self, username):
+        """Get the full dashboard record (history, semester details, subject outlook) for one student"""
+        users_df = pd.read_csv(self.users_file)
+        user = users_df[users_df['username'] == username]
+        if user.empty:
+            return None
+        
+        predictions_df = self._load_analytics_table('predictions')
+        grades_df = self._load_analytics_table('grades')
+        student_data = self._build_student_record(
+            user.iloc[0],
+            predictions_df[predictions_df['username'] == username],
+            grades_df[grades_df['username'] == username],
+            self.get_sgpa_lookup(),
+            details=True
+        )
+        student_data['subject_predictions'] = self.get_subject_predictions(username)
+        return student_data
+    
+    def _build_student_record(self, student, student_predictions, student_grades, sgpa_lookup, details=True):
+        """Build one student's dashboard record from their own prediction and grade rows"""
+        username = student['username']
+        
+        student_data = {
+            'id': username,
+            'name': student['full_name'],
+            'cgpa': 0.0,  # No predictions yet
+            'semester': int(student['semester']) if pd.notna(student['semester']) else 1,
+            'department': student['department'] if pd.notna(student['department']) else 'N/A',
+            'attendance': 0,
+            'prediction_count': 0,
+            'latest_prediction': {
+                'cgpa': 0.0,
+                'grade': 'N/A',
+                'pass_probability': 0.0,
+                'timestamp': 'No predictions yet'
+            }
+        }
+        
+        if student_predictions.empty:
+            # Student has no predictions yet - show basic info with default values
+            if details:
+                student_data.update({'subjects': [], 'history': [], 'semester_details': []})
+            return student_data
+        
+        # Get latest prediction
+        latest_pred = student_predictions.sort_values('timestamp', ascending=False).iloc[0]
+        
+        # Calculate average CGPA from predictions
+        avg_predicted_cgpa = student_predictions['predicted_cgpa'].mean()
+        
+        # Get attendance if available - safely convert to int
+        attendance = 0
+        try:
+            att_value = latest_pred['attendance']
+            if pd.notna(att_value):
+                att_str = str(att_value).strip()
+                
+                # Check if it's a dictionary string
+                if att_str.startswith('{') or att_str.startswith("'{"):
+                    # Parse dictionary string and get average
+                    try:
+                        import ast
+                        # Handle both single and double quotes
+                        att_str_clean = att_str.replace("'", '"') if not att_str.startswith('"{') else att_str
+                        try:
+                            att_dict = ast.literal_eval(att_str)
+                        except:
+                            # If ast fails, try json
+                            import json
+                            att_dict = json.loads(att_str_clean)
+                        
+                        # Extract all attendance values
+                        all_vals = []
+                        for sem_key, sem_data in att_dict.items():
+                            if isinstance(sem_data, dict):
+                                for subject, att_val in sem_data.items():
+                                    try:
+                                        all_vals.append(int(att_val))
+                                    except (ValueError, TypeError):
+                                        pass
+                        
+                        if all_vals:
+                            attendance = int(sum(all_vals) / len(all_vals))
+                    except Exception as e:
+                        print(f"Error parsing attendance dict: {e}")
+                        attendance = 0
+                else:
+                    # Direct integer conversion
+                    attendance = int(float(att_str))
+        except (ValueError, TypeError) as e:
+            print(f"Error converting attendance: {e}")
+            attendance = 0
+        
+        student_data.update({
+            'cgpa': round(avg_predicted_cgpa, 2),
+            'attendance': int(attendance) if attendance > 0 else 0,
+            'prediction_count': len(student_predictions),
+            'latest_prediction': {
+                'cgpa': round(latest_pred['predicted_cgpa'], 2),
+                'grade': latest_pred['predicted_grade'],
+                'pass_probability': round(latest_pred['pass_probability'] * 100, 1),
+                'timestamp': latest_pred['timestamp'].strftime(TIMESTAMP_FORMAT) if pd.notna(latest_pred['timestamp']) else ''
+            }
+        })
+        
+        if not details:
+            return student_data
+        
+        # Get real subject grades for all semesters
+        subjects = []
+        
+        # Get all grades organized by semester
+        all_semester_grades = {}
+        if student_grades is not None and not student_grades.empty:
+            for _, grade_row in student_grades.iterrows():
+                sem = int(grade_row['semester'])
+                if sem not in all_semester_grades:
+                    all_semester_grades[sem] = []
+                all_semester_grades[sem].append({
+                    'name': grade_row['subject'],
+                    'grade': grade_row['grade'],
+                    'credits': 3
+                })
             
-            # Get all predictions for this student
-            student_predictions = predictions_df[predictions_df['username'] == username]
-            
-            # Check if student has predictions
-            has_predictions = not student_predictions.empty
+            # Get latest semester grades for subjects list
+            if student_grades['semester'].nunique() > 0:
+                latest_sem = int(student_grades['semester'].max())
+                latest_grades = student_grades[student_grades['semester'] == latest_sem]
+                for _, subject_row in latest_grades.iterrows():
+                    subjects.append({
+                        'name': subject_row['subject'],
+                        'grade': subject_row['grade'],
+                        'credits': 3
+                    })
+        
+        # Build complete history including all semesters with grades
+        history = []
+        all_semesters = set()
+        
+        # Add semesters from predictions
+        for idx, pred in student_predictions.iterrows():
+            sem = int(pred['semester']) if pd.notna(pred['semester']) else 1
+            all_semesters.add(sem)
+        
+        # Add semesters from grades
+        all_semesters.update(all_semester_grades.keys())
+        
+        # Build history for each semester
+        for sem_num in sorted(all_semesters):
+            sgpa = None
+            attendance_val = 0
             
-            if has_predictions:
-                # Get latest prediction
-                latest_pred = student_predictions.sort_values('timestamp', ascending=False).iloc[0]
-                
-                # Calculate average CGPA from predictions
-                avg_predicted_cgpa = student_predictions['predicted_cgpa'].mean()
-                
-                # Get attendance if available - safely convert to int
-                attendance = 0
+            # Try to get SGPA from prediction first
+            sem_preds = student_predictions[student_predictions['semester'] == sem_num]
+            if not sem_preds.empty:
+                latest_sem_pred = sem_preds.sort_values('timestamp', ascending=False).iloc[0]
+                sgpa = round(latest_sem_pred['predicted_cgpa'], 2)
+                # Try to extract attendance from prediction
                 try:
-                    att_value = latest_pred['attendance']
-                    if pd.notna(att_value):
-                        att_str = str(att_value).strip()
-                        
-                        # Check if it's a dictionary string
-                        if att_str.startswith('{') or att_str.startswith("'{"):
-                            # Parse dictionary string and get average
+                    att_val = latest_sem_pred['attendance']
+                    if pd.notna(att_val):
+                        att_str = str(att_val).strip()
+                        if att_str.startswith('{'):
+                            # Parse dict for this semester's attendance
                             try:
                                 import ast
-                                # Handle both single and double quotes
-                                att_str_clean = att_str.replace("'", '"') if not att_str.startswith('"{') else att_str
-                                try:
-                                    att_dict = ast.literal_eval(att_str)
-                                except:
-                                    # If ast fails, try json
-                                    import json
-                                    att_dict = json.loads(att_str_clean)
-                                
-                                # Extract all attendance values
-                                all_vals = []
-                                for sem_key, sem_data in att_dict.items():
-                                    if isinstance(sem_data, dict):
-                                        for subject, att_val in sem_data.items():
-                                            try:
-                                                all_vals.append(int(att_val))
-                                            except (ValueError, TypeError):
-                                                pass
-                                
-                                if all_vals:
-                                    attendance = int(sum(all_vals) / len(all_vals))
-                            except Exception as e:
-                                print(f"Error parsing attendance dict: {e}")
-                                attendance = 0
+                                att_dict = ast.literal_eval(att_str)
+                                if str(sem_num) in att_dict and isinstance(att_dict[str(sem_num)], dict):
+                                    sem_att_vals = [int(v) for v in att_dict[str(sem_num)].values() if str(v).isdigit()]
+                                    if sem_att_vals:
+                                        attendance_val = int(sum(sem_att_vals) / len(sem_att_vals))
+                            except:
+                                pass
                         else:
-                            # Direct integer conversion
-                            attendance = int(float(att_str))
-                except (ValueError, TypeError) as e:
-                    print(f"Error converting attendance: {e}")
-                    attendance = 0
-                
-                # Get real subject grades for all semesters
-                student_grades = grades_df[grades_df['username'] == username]
-                subjects = []
-                
-                # Get all grades organized by semester
-                all_semester_grades = {}
-                if not student_grades.empty:
-                    for _, grade_row in student_grades.iterrows():
-                        sem = int(grade_row['semester'])
-                        if sem not in all_semester_grades:
-                            all_semester_grades[sem] = []
-                        all_semester_grades[sem].append({
-                            'name': grade_row['subject'],
-                            'grade': grade_row['grade'],
-                            'credits': 3
-                        })
-                    
-                    # Get latest semester grades for subjects list
-                    if student_grades['semester'].nunique() > 0:
-                        latest_sem = int(student_grades['semester'].max())
-                        latest_grades = student_grades[student_grades['semester'] == latest_sem]
-                        for _, subject_row in latest_grades.iterrows():
-                            subjects.append({
-                                'name': subject_row['subject'],
-                                'grade': subject_row['grade'],
-                                'credits': 3
-                            })
-                
-                # Grade to GPA mapping for calculating SGPA from grades
-                grade_to_gpa = {
-                    'A': 4.0, 'A-': 3.7,
-                    'B+': 3.3, 'B': 3.0, 'B-': 2.7,
-                    'C+': 2.3, 'C': 2.0, 'C-': 1.7,
-                    'D': 1.0, 'F': 0.0
-                }
-                
-                # Build complete history including all semesters with grades
-                history = []
-                all_semesters = set()
-                
-                # Add semesters from predictions
-                for idx, pred in student_predictions.iterrows():
-                    sem = int(pred['semester']) if pd.notna(pred['semester']) else 1
-                    all_semesters.add(sem)
-                
-                # Add semesters from grades
-                all_semesters.update(all_semester_grades.keys())
-                
-                # Build history for each semester
-                for sem_num in sorted(all_semesters):
-                    sgpa = None
-                    attendance_val = 0
-                    
-                    # Try to get SGPA from prediction first
-                    sem_preds = student_predictions[student_predictions['semester'] == sem_num]
-                    if not sem_preds.empty:
-                        latest_sem_pred = sem_preds.sort_values('timestamp', ascending=False).iloc[0]
-                        sgpa = round(latest_sem_pred['predicted_cgpa'], 2)
-                        # Try to extract attendance from prediction
-                        try:
-                            att_val = latest_sem_pred['attendance']
-                            if pd.notna(att_val):
-                                att_str = str(att_val).strip()
-                                if att_str.startswith('{'):
-                                    # Parse dict for this semester's attendance
-                                    try:
-                                        import ast
-                                        att_dict = ast.literal_eval(att_str)
-                                        if str(sem_num) in att_dict and isinstance(att_dict[str(sem_num)], dict):
-                                            sem_att_vals = [int(v) for v in att_dict[str(sem_num)].values() if str(v).isdigit()]
-                                            if sem_att_vals:
-                                                attendance_val = int(sum(sem_att_vals) / len(sem_att_vals))
-                                    except:
-                                        pass
-                                else:
-                                    attendance_val = int(float(att_str))
-                        except:
-                            pass
-                    
-                    # If no prediction SGPA, calculate from grades
-                    if sgpa is None and sem_num in all_semester_grades:
-                        grades_list = all_semester_grades[sem_num]
-                        total_points = 0
-                        total_credits = 0
-                        for subject in grades_list:
-                            grade = subject['grade']
-                            credits = subject['credits']
-                            if grade in grade_to_gpa:
-                                total_points += grade_to_gpa[grade] * credits
-                                total_credits += credits
-                        
-                        if total_credits > 0:
-                            sgpa = round(total_points / total_credits, 2)
-                    
-                    # Add to history if we have SGPA
-                    if sgpa is not None:
-                        history.append({
-                            'semester': sem_num,
-                            'sgpa': sgpa,
-                            'attendance': attendance_val
-                        })
-                
-                # Sort history by semester
-                history.sort(key=lambda x: x['semester'])
-                
-                if not subjects:
-                    # Fallback to placeholder if no grades saved
-                    subjects = [
-                        {'name': 'Course ' + str(i+1), 'grade': latest_pred['predicted_grade'], 'credits': 3}
-                        for i in range(4)
-                    ]
-                
-                # Build complete semester history with grades and SGPA
-                semester_details = {}
-                
-                # Create a map of semester -> SGPA from history (use the latest/last entry for each semester)
-                semester_sgpa_map = {}
-                for h in history:
-                    # This will naturally use the latest value if there are multiple entries for same semester
-                    # because history is sorted by semester and we iterate in order
-                    semester_sgpa_map[h['semester']] = h['sgpa']
-                
-                # Grade to GPA mapping
-                grade_to_gpa = {
-                    'A': 4.0, 'A-': 3.7,
-                    'B+': 3.3, 'B': 3.0, 'B-': 2.7,
-                    'C+': 2.3, 'C': 2.0, 'C-': 1.7,
-                    'D': 1.0, 'F': 0.0
-                }
-                
-                for sem_num, grades_list in all_semester_grades.items():
-                    # Get SGPA for this semester from history
-                    sgpa = semester_sgpa_map.get(sem_num, None)
-                    
-                    # If no prediction exists for this semester, calculate SGPA from grades
-                    if sgpa is None and grades_list:
-                        total_points = 0
-                        total_credits = 0
-                        for subject in grades_list:
-                            grade = subject['grade']
-                            credits = subject['credits']
-                            if grade in grade_to_gpa:
-                                total_points += grade_to_gpa[grade] * credits
-                                total_credits += credits
-                        
-                        if total_credits > 0:
-                            sgpa = round(total_points / total_credits, 2)
-                    
-                    semester_details[sem_num] = {
-                        'semester': sem_num,
-                        'subjects': grades_list,
-                        'sgpa': sgpa
-                    }
-                
-                student_data = {
-                    'id': username,
-                    'name': student['full_name'],
-                    'cgpa': round(avg_predicted_cgpa, 2),
-                    'semester': int(student['semester']) if pd.notna(student['semester']) else 1,
-                    'department': student['department'] if pd.notna(student['department']) else 'N/A',
-                    'attendance': int(attendance) if attendance > 0 else 0,
-                    'prediction_count': len(student_predictions),
-                    'latest_prediction': {
-                        'cgpa': round(latest_pred['predicted_cgpa'], 2),
-                        'grade': latest_pred['predicted_grade'],
-                        'pass_probability': round(latest_pred['pass_probability'] * 100, 1),
-                        'timestamp': latest_pred['timestamp']
-                    },
-                    'subjects': subjects,
-                    'history': history,
-                    'semester_details': list(semester_details.values())  # All semester grades with SGPA
-                }
-                
-                students_data.append(student_data)
+                            attendance_val = int(float(att_str))
+                except:
+                    pass
             
-            else:
-                # Student has no predictions yet - show basic info with default values
-                student_data = {
-                    'id': username,
-                    'name': student['full_name'],
-                    'cgpa': 0.0,  # No predictions yet
-                    'semester': int(student['semester']) if pd.notna(student['semester']) else 1,
-                    'department': student['department'] if pd.notna(student['department']) else 'N/A',
-                    'attendance': 0,
-                    'prediction_count': 0,
-                    'latest_prediction': {
-                        'cgpa': 0.0,
-                        'grade': 'N/A',
-                        'pass_probability': 0.0,
-                        'timestamp': 'No predictions yet'
-                    },
-                    'subjects': [],
-                    'history': [],
-                    'semester_details': []
-                }
-                
-                students_data.append(student_data)
+            # If no prediction SGPA, use the precomputed SGPA from grades
+            if sgpa is None:
+                sgpa = sgpa_lookup.get((username, sem_num))
+            
+            # Add to history if we have SGPA
+            if sgpa is not None:
+                history.append({
+                    'semester': sem_num,
+                    'sgpa': sgpa,
+                    'attendance': attendance_val
+                })
         
-        return students_data
+        # Sort history by semester
+        history.sort(key=lambda x: x['semester'])
+        
+        if not subjects:
+            # Fallback to placeholder if no grades saved
+            subjects = [
+                {'name': 'Course ' + str(i+1), 'grade': latest_pred['predicted_grade'], 'credits': 3}
+                for i in range(4)
+            ]
+        
+        # Build complete semester history with grades and SGPA
+        semester_details = {}
+        
+        # Create a map of semester -> SGPA from history (use the latest/last entry for each semester)
+        semester_sgpa_map = {}
+        for h in history:
+            # This will naturally use the latest value if there are multiple entries for same semester
+            # because history is sorted by semester and we iterate in order
+            semester_sgpa_map[h['semester']] = h['sgpa']
+        
+        for sem_num, grades_list in all_semester_grades.items():
+            # Get SGPA for this semester from history
+            sgpa = semester_sgpa_map.get(sem_num, None)
+            
+            # If no prediction exists for this semester, use the SGPA from grades
+            if sgpa is None and grades_list:
+                sgpa = sgpa_lookup.get((username, sem_num))
+            
+            semester_details[sem_num] = {
+                'semester': sem_num,
+                'subjects': grades_list,
+                'sgpa': sgpa
+            }
+        
+        student_data.update({
+            'subjects': subjects,
+            'history': history,
+            'semester_details': list(semester_details.values())  # All semester grades with SGPA
+        })
+        
+        return student_data
+    
+    def get_student_summaries(self, usernames=None):
+        """Dashboard summaries (as listed by get_student_page) of the given students (default all)"""
+        wanted = None if usernames is None else set(usernames)
+        summaries = []
+        for student in self.get_all_students_with_predictions(details=False):
+            if wanted is None or student['id'] in wanted:
+                summary = dict(student, category=performance_category(student['cgpa']))
+                summaries.append(summary)
+        return summaries
+    
+    def get_student_changes(self, since=None):
+        """Summaries of the students changed after change log version `since`.
+        Without `since`, or if the log no longer reaches back that far, returns
+        every student with reset=True so the client replaces what it holds.
+        """
+        changes, version = self.changes.since(since) if since is not None else (None, self.changes.latest)
+        usernames = None if changes is None else [event[1] for event in changes]
+        students = self.get_student_summaries(usernames)
+        return {'version': version, 'reset': changes is None, 'students': students}
+    
+    def get_student_usernames(self):
+        """Usernames of all registered students"""
+        users_df = pd.read_csv(self.users_file)
+        return set(users_df['username'].astype(str))
+    
+    def _get_student_department(self, username):
+        """Department of a registered student (None if unknown)"""
+        user = self.get_user_info(username)
+        if user is None:
+            return None
+        return user['department'] if pd.notna(user['department']) else 'N/A'
+    
+    def data_version(self, *tables):
+        """Write counters of the given tables (users, predictions, grades, sgpa);
+        changes whenever one of them is written through this class
+        """
+        versions = self.versions.snapshot()
+        return tuple(versions.get(table, (0, 0.0))[0] for table in tables)
+    
+    def data_modified(self, *tables):
+        """Unix time of the latest write to any of the given tables (0.0 if never written)"""
+        versions = self.versions.snapshot()
+        return max((versions.get(table, (0, 0.0))[1] for table in tables), default=0.0)
+    
+    def _table_lock(self, path):
+        """Hold across a CSV read-modify-write so writers in other server processes wait"""
+        return file_lock(path + '.lock')
+
+    def _file_version(self, path):
+        """(mtime, size) of a file; the size catches writes within one mtime tick"""
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+    
+    def _get_rank_index(self):
+        """Per-department CGPA rank index, rebuilt only when the predictions file changes on disk"""
+        source = self._file_version(self.predictions_file)
+        if self._rank_index is None or self._cache_sources.get('rank_index') != source:
+            index = DepartmentRankIndex()
+            users_df = pd.read_csv(self.users_file)
+            predictions_df = pd.read_csv(self.predictions_file)
+            departments = dict(zip(users_df['username'], users_df['department'].fillna('N/A')))
+            
+            # Same CGPA the dashboard shows: average of the student's predictions
+            mean_cgpa = predictions_df.groupby('username')['predicted_cgpa'].mean()
+            for username, cgpa in mean_cgpa.items():
+                if username in departments:
+                    index.update(username, departments[username], round(cgpa, 2))
+            
+            self._rank_index = index
+            self._cache_sources['rank_index'] = source
+        return self._rank_index
+    
+    def get_student_rank(self, username):
+        """Rank and percentile of a student within their department"""
+        return self._get_rank_index().percentile(username)
+    
+    def get_department_rankings(self, department=None, k=10, order='top'):
+        """Top or bottom K students per department: {department: [students]}"""
+        index = self._get_rank_index()
+        departments = [department] if department else index.departments()
+        select = index.bottom if order == 'bottom' else index.top
+        return {dept: select(dept, k) for dept in departments}
     
     def get_department_statistics(self):
         """Calculate department-wise statistics from real data"""
-        students = self.get_all_students_with_predictions()
+        students = self.get_all_students_with_predictions(details=False)
         
         if not students:
             return []
@@ -639,9 +1047,83 @@ class ExcelDatabase:
         
         return result
     
-    def get_categorized_students(self):
+    def get_student_page(self, department=None, category=None, min_cgpa=None, max_cgpa=None,
+                         semester=None, search=None, sort='cgpa', order='desc', limit=20, cursor=None):
+        """One page of student summaries with server-side filtering, sorting and
+        keyset pagination. The cursor is an opaque token holding the sort key of
+        the last student on the previous page, so pages stay stable while
+        students are added.
+        """
+        if sort not in ('cgpa', 'name', 'semester', 'attendance'):
+            raise ValueError(f'Unsupported sort field: {sort}')
+        if order not in ('asc', 'desc'):
+            raise ValueError("order must be 'asc' or 'desc'")
+        if category and category not in ('best', 'average', 'worst'):
+            raise ValueError(f'Unknown category: {category}')
+        limit = max(1, min(int(limit), 100))
+        
+        students = self.get_all_students_with_predictions(details=False)
+        for student in students:
+            student['category'] = performance_category(student['cgpa'])
+        
+        if department:
+            students = [s for s in students if s['department'] == department]
+        if category:
+            students = [s for s in students if s['category'] == category]
+        if min_cgpa is not None:
+            students = [s for s in students if s['cgpa'] >= min_cgpa]
+        if max_cgpa is not None:
+            students = [s for s in students if s['cgpa'] <= max_cgpa]
+        if semester is not None:
+            students = [s for s in students if s['semester'] == semester]
+        if search:
+            search = search.lower()
+            students = [s for s in students if search in str(s['name']).lower()]
+        
+        def sort_key(student):
+            value = str(student['name']).lower() if sort == 'name' else float(student[sort])
+            return (value, str(student['id']))
+        
+        # Keep the list ascending and walk it backwards for descending pages
+        students.sort(key=sort_key)
+        keys = [sort_key(s) for s in students]
+        
+        last_key = None
+        if cursor:
+            try:
+                last_key = json.loads(base64.urlsafe_b64decode(cursor.encode()).decode())
+            except Exception:
+                raise ValueError('Invalid cursor')
+            # The key must compare with sort_key() values: (str or number, str id)
+            value_type = str if sort == 'name' else (int, float)
+            if (not isinstance(last_key, list) or len(last_key) != 2
+                    or not isinstance(last_key[0], value_type) or isinstance(last_key[0], bool)
+                    or not isinstance(last_key[1], str)):
+                raise ValueError('Invalid cursor')
+            last_key = (last_key[0] if sort == 'name' else float(last_key[0]), last_key[1])
+        
+        if order == 'asc':
+            start = bisect.bisect_right(keys, last_key) if last_key else 0
+            page = students[start:start + limit]
+            has_more = start + limit < len(students)
+        else:
+            end = bisect.bisect_left(keys, last_key) if last_key else len(students)
+            page = students[max(end - limit, 0):end][::-1]
+            has_more = end - limit > 0
+        
+        next_cursor = None
+        if page and has_more:
+            next_cursor = base64.urlsafe_b64encode(json.dumps(list(sort_key(page[-1]))).encode()).decode()
+        
+        return {
+            'students': page,
+            'total': len(students),
+            'next_cursor': next_cursor
+        }
+    
+    def get_categorized_students(self, details=True):
         """Categorize students into best, average, and worst performers"""
-        students = self.get_all_students_with_predictions()
+        students = self.get_all_students_with_predictions(details=details)
         
         best_students = [s for s in students if s['cgpa'] >= 3.5]
         average_students = [s for s in students if 2.5 <= s['cgpa'] < 3.5]
@@ -670,33 +1152,105 @@ class ExcelDatabase:
         """Save or update student's grades for a semester
         grades_dict: {subject_name: grade_value}
         """
-        grades_df = pd.read_csv(self.grades_file)
-        
-        # Remove existing grades for this user and semester
-        grades_df = grades_df[~((grades_df['username'] == username) & (grades_df['semester'] == semester))]
-        
-        # Add new grades
-        new_grades = []
-        for subject, grade in grades_dict.items():
-            new_grades.append({
-                'username': username,
-                'semester': semester,
-                'subject': subject,
-                'grade': grade,
-                'updated_at': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-            })
+        with self._table_lock(self.grades_file):
+            grades_df = pd.read_csv(self.grades_file)
+            
+            # Remove existing grades for this user and semester
+            grades_df = grades_df[~((grades_df['username'] == username) & (grades_df['semester'] == semester))]
+            
+            # Add new grades
+            new_grades = []
+            for subject, grade in grades_dict.items():
+                new_grades.append({
+                    'username': username,
+                    'semester': semester,
+                    'subject': subject,
+                    'grade': grade,
+                    'updated_at': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+                })
+            
+            new_grades_df = pd.DataFrame(new_grades)
+            grades_df = pd.concat([grades_df, new_grades_df], ignore_index=True)
+            grades_df.to_csv(self.grades_file, index=False)
+            self.versions.bump('grades')
+            
+            # Only the semester that was just written needs a new SGPA. It is written
+            # before the grades lock is released, so two saves of the same semester
+            # leave the SGPA of whichever grades were written last
+            self._update_semester_sgpa(username, semester, list(grades_dict.values()))
         
-        new_grades_df = pd.DataFrame(new_grades)
-        grades_df = pd.concat([grades_df, new_grades_df], ignore_index=True)
-        grades_df.to_csv(self.grades_file, index=False)
+        self._subject_predictor = None
+        self.changes.publish([username], 'grades')
         
         return {'success': True}
     
+    def _get_subject_predictor(self):
+        """Subject baselines for the whole cohort, built once per grades change"""
+        source = self._file_version(self.grades_file)
+        predictor = self._subject_predictor
+        if predictor is None or self._cache_sources.get('subject_predictor') != source:
+            predictor = SubjectPredictor(self._load_analytics_table('grades'), GRADE_TO_GPA)
+            self._subject_predictor = predictor
+            self._cache_sources['subject_predictor'] = source
+        return predictor
+    
+    def get_subject_predictions(self, username):
+        """Per-subject outlook for one student, weakest subjects first"""
+        return self._get_subject_predictor().predict(username)
+    
+    def get_subject_baselines(self):
+        """Cohort average and difficulty of every graded subject"""
+        return self._get_subject_predictor().baselines()
+    
+    def _update_semester_sgpa(self, username, semester, grades):
+        """Recompute and store the SGPA for one (student, semester)"""
+        with self._table_lock(self.sgpa_file):
+            sgpa_df = pd.read_csv(self.sgpa_file)
+            sgpa_df = sgpa_df[~((sgpa_df['username'] == username) & (sgpa_df['semester'] == semester))]
+            
+            sgpa = calculate_sgpa(grades)
+            if sgpa is not None:
+                new_row = pd.DataFrame({
+                    'username': [username],
+                    'semester': [semester],
+                    'sgpa': [sgpa],
+                    'credits': [SUBJECT_CREDITS * sum(1 for g in grades if g in GRADE_TO_GPA)],
+                    'updated_at': [datetime.now().strftime(TIMESTAMP_FORMAT)]
+                })
+                sgpa_df = pd.concat([sgpa_df, new_row], ignore_index=True)
+            
+            sgpa_df.to_csv(self.sgpa_file, index=False)
+            self.versions.bump('sgpa')
+    
+    def get_sgpa_lookup(self):
+        """Precomputed SGPA for every student semester: {(username, semester): sgpa}"""
+        sgpa_df = pd.read_csv(self.sgpa_file)
+        return {
+            (username, int(semester)): sgpa
+            for username, semester, sgpa in zip(sgpa_df['username'], sgpa_df['semester'], sgpa_df['sgpa'])
+        }
+    
+    def get_student_sgpa(self, username):
+        """Precomputed SGPA per semester for one student: {semester: sgpa}"""
+        sgpa_df = pd.read_csv(self.sgpa_file)
+        student_sgpa = sgpa_df[sgpa_df['username'] == username].sort_values('semester')
+        return {int(row['semester']): row['sgpa'] for _, row in student_sgpa.iterrows()}
+    
+    def get_sgpa_histories(self):
+        """Every student's stored SGPAs from semester 1 up to the first missing semester"""
+        sgpa_df = pd.read_csv(self.sgpa_file).sort_values(['username', 'semester'])
+        histories = {}
+        for username, semester, sgpa in zip(sgpa_df['username'], sgpa_df['semester'], sgpa_df['sgpa']):
+            history = histories.setdefault(username, [])
+            if int(semester) == len(history) + 1:
+                history.append(float(sgpa))
+        return {username: history for username, history in histories.items() if history}
+    
     def get_student_grades(self, username, semester=None):
         """Get student's grades for specific semester or all semesters
         Returns: {semester: {subject: grade}}
         """
-        grades_df = pd.read_csv(self.grades_file)
+        grades_df = self.read_typed_table('grades')
         
         if semester:
             student_grades = grades_df[(grades_df['username'] == username) & (grades_df['semester'] == semester)]
@@ -718,7 +1272,7 @@ class ExcelDatabase:
     
     def get_student_all_grades_list(self, username):
         """Get all student grades as a list for teacher dashboard"""
-        grades_df = pd.read_csv(self.grades_file)
+        grades_df = self.read_typed_table('grades')
         student_grades = grades_df[grades_df['username'] == username]
         
         if student_grades.empty:
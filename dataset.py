@@ -0,0 +1,225 @@
+#!/usr/bin/env python
+"""
+Dataset Manager
+Loads the UCI student-mat dataset. The source is data/student-mat.csv or the
+UCI archive data/student.zip, downloaded only when neither exists. The CSV's
+SHA-256 is checked against DATASET_SHA256 when it is pinned, and otherwise
+against data/student-mat.sha256, which is only recorded for a file with the
+UCI table's exact columns and row count. Downloads are checked the same way
+before they are saved. The parsed frame is cached under data/cache, so later
+boots skip the CSV parser entirely.
+
+Usage (one-off download, e.g. before going offline):
+    python dataset.py --fetch
+"""
+
+import argparse
+import glob
+import hashlib
+import io
+import os
+import urllib.request
+import zipfile
+
+import pandas as pd
+
+# Parquet cache when pyarrow is installed, pickle otherwise
+try:
+    import pyarrow  # noqa: F401
+except ImportError:
+    pyarrow = None
+
+DATA_DIR = "data"
+CSV_NAME = "student-mat.csv"
+ARCHIVE_NAME = "student.zip"
+CHECKSUM_NAME = "student-mat.sha256"
+CACHE_SUBDIR = "cache"
+DATASET_URL = "https://archive.ics.uci.edu/ml/machine-learning-databases/00320/student.zip"
+
+# SHA-256 of student-mat.csv in the official UCI archive. When set, every load
+# and fetch must match it and data/student-mat.sha256 is not consulted; set it
+# to the digest `python dataset.py --checksum` prints for the official file.
+DATASET_SHA256 = None
+
+# Shape of the UCI table, checked before a file's checksum is first trusted
+EXPECTED_ROWS = 395
+EXPECTED_COLUMNS = [
+    "school", "sex", "age", "address", "famsize", "Pstatus", "Medu", "Fedu",
+    "Mjob", "Fjob", "reason", "guardian", "traveltime", "studytime", "failures",
+    "schoolsup", "famsup", "paid", "activities", "nursery", "higher", "internet",
+    "romantic", "famrel", "freetime", "goout", "Dalc", "Walc", "health",
+    "absences", "G1", "G2", "G3",
+]
+
+
+class DatasetError(RuntimeError):
+    """The dataset is missing or does not match its recorded checksum"""
+
+
+def _parse(raw):
+    return pd.read_csv(io.BytesIO(raw), sep=";")
+
+
+def _check_shape(data):
+    if list(data.columns) != EXPECTED_COLUMNS or len(data) != EXPECTED_ROWS:
+        raise DatasetError(
+            f"{CSV_NAME} is not the UCI student-mat table: expected {EXPECTED_ROWS} rows "
+            f"of {len(EXPECTED_COLUMNS)} columns, got {len(data)} rows of {len(data.columns)}"
+        )
+
+
+def _check_pinned(digest):
+    if DATASET_SHA256 is not None and digest != DATASET_SHA256:
+        raise DatasetError(
+            f"{CSV_NAME} checksum {digest[:16]}... does not match the pinned UCI checksum "
+            f"({DATASET_SHA256[:16]}...). Use the original file from {DATASET_URL}"
+        )
+
+
+def _read_source(data_dir):
+    """Raw CSV bytes from the extracted file or the archive (None if neither exists)"""
+    csv_path = os.path.join(data_dir, CSV_NAME)
+    if os.path.exists(csv_path):
+        with open(csv_path, "rb") as f:
+            return f.read()
+
+    archive_path = os.path.join(data_dir, ARCHIVE_NAME)
+    if os.path.exists(archive_path):
+        with zipfile.ZipFile(archive_path) as archive:
+            return archive.read(CSV_NAME)
+    return None
+
+
+def _recorded_checksum(data_dir):
+    path = os.path.join(data_dir, CHECKSUM_NAME)
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        return f.read().split()[0]
+
+
+def _record_checksum(data_dir, digest):
+    with open(os.path.join(data_dir, CHECKSUM_NAME), "w") as f:
+        f.write(f"{digest}  {CSV_NAME}\n")
+
+
+def _cache_path(data_dir, digest):
+    extension = "parquet" if pyarrow is not None else "pkl"
+    return os.path.join(data_dir, CACHE_SUBDIR, f"student-mat-{digest[:16]}.{extension}")
+
+
+def _read_cache(path):
+    return pd.read_parquet(path) if path.endswith(".parquet") else pd.read_pickle(path)
+
+
+def _write_cache(path, data):
+    """Write the parsed frame atomically and drop caches of older sources"""
+    cache_dir = os.path.dirname(path)
+    os.makedirs(cache_dir, exist_ok=True)
+    tmp_path = path + ".tmp"
+    if path.endswith(".parquet"):
+        data.to_parquet(tmp_path, index=False)
+    else:
+        data.to_pickle(tmp_path)
+    os.replace(tmp_path, path)
+    for old in glob.glob(os.path.join(cache_dir, "student-mat-*")):
+        if old != path:
+            os.remove(old)
+
+
+def load_dataset(data_dir=DATA_DIR, fetch_missing=False):
+    """Read the UCI student-mat dataset from the local cache, CSV or archive.
+    With fetch_missing=True a missing dataset is downloaded (and verified) first.
+    """
+    print("Loading data...")
+    recorded = DATASET_SHA256 or _recorded_checksum(data_dir)
+    raw = _read_source(data_dir)
+
+    if raw is None:
+        # The source may have been removed after it was cached
+        if recorded is not None and os.path.exists(_cache_path(data_dir, recorded)):
+            return _read_cache(_cache_path(data_dir, recorded))
+        if fetch_missing:
+            try:
+                fetch_archive(data_dir)
+            except (OSError, zipfile.BadZipFile) as e:
+                raise DatasetError(
+                    f"{CSV_NAME} not found and downloading {DATASET_URL} failed ({e}). "
+                    f"Place {ARCHIVE_NAME} or {CSV_NAME} in the {data_dir}/ folder."
+                ) from e
+            return load_dataset(data_dir)
+        raise DatasetError(
+            f"{CSV_NAME} not found. Place {ARCHIVE_NAME} or {CSV_NAME} from {DATASET_URL} "
+            f"in the {data_dir}/ folder, or run: python dataset.py --fetch"
+        )
+
+    digest = hashlib.sha256(raw).hexdigest()
+    _check_pinned(digest)
+    data = None
+    if recorded is None:
+        # Nothing pinned or recorded yet: only trust a file shaped like the UCI table
+        data = _parse(raw)
+        _check_shape(data)
+        _record_checksum(data_dir, digest)
+        print(f"Recorded dataset checksum {digest[:16]}... in {CHECKSUM_NAME}")
+    elif digest != recorded:
+        raise DatasetError(
+            f"{CSV_NAME} checksum {digest[:16]}... does not match {CHECKSUM_NAME} "
+            f"({recorded[:16]}...). Restore the original file, or delete {CHECKSUM_NAME} "
+            "to accept the new one."
+        )
+
+    cache_path = _cache_path(data_dir, digest)
+    if data is None and os.path.exists(cache_path):
+        return _read_cache(cache_path)
+
+    if data is None:
+        data = _parse(raw)
+    _write_cache(cache_path, data)
+    print(f"Cached parsed dataset in {cache_path}")
+    return data
+
+
+def fetch_archive(data_dir=DATA_DIR):
+    """Download the UCI archive into data_dir, checking its CSV before it is saved"""
+    os.makedirs(data_dir, exist_ok=True)
+    archive_path = os.path.join(data_dir, ARCHIVE_NAME)
+    print(f"Downloading {DATASET_URL}...")
+    with urllib.request.urlopen(DATASET_URL, timeout=30) as response:
+        payload = response.read()
+    # Verify the member before anything is written
+    with zipfile.ZipFile(io.BytesIO(payload)) as archive:
+        if CSV_NAME not in archive.namelist():
+            raise DatasetError(f"{DATASET_URL} has no {CSV_NAME}")
+        raw = archive.read(CSV_NAME)
+    _check_pinned(hashlib.sha256(raw).hexdigest())
+    _check_shape(_parse(raw))
+    tmp_path = archive_path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(payload)
+    os.replace(tmp_path, archive_path)
+    print(f"Saved {archive_path}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Prepare the offline UCI student dataset")
+    parser.add_argument("--fetch", action="store_true", help=f"download {ARCHIVE_NAME} first")
+    parser.add_argument("--data-dir", default=DATA_DIR, help="dataset folder")
+    parser.add_argument("--checksum", action="store_true",
+                        help=f"print the SHA-256 of the local {CSV_NAME} (the value for DATASET_SHA256)")
+    args = parser.parse_args()
+
+    if args.checksum:
+        raw = _read_source(args.data_dir)
+        if raw is None:
+            raise SystemExit(f"{CSV_NAME} not found in {args.data_dir}/")
+        print(hashlib.sha256(raw).hexdigest())
+        return
+    if args.fetch:
+        fetch_archive(args.data_dir)
+    data = load_dataset(args.data_dir)
+    print(f"Dataset ready: {len(data)} rows, {len(data.columns)} columns")
+
+
+if __name__ == "__main__":
+    main()
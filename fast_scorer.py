@@ -0,0 +1,101 @@
+"""
+Compiled Scorer for the linear G3 / pass-fail pipelines
+Folds the fitted OneHotEncoder and linear coefficients into per-category
+lookup tables and a numeric weight vector, so a row is scored with a few
+dict lookups and one NumPy dot product instead of a DataFrame round-trip
+through the sklearn Pipeline.
+"""
+
+import numpy as np
+
+
+class CompiledScorer:
+    def __init__(self, pipeline, categorical_cols, numeric_cols, defaults=None, logistic=False):
+        """Compile a fitted Pipeline(ColumnTransformer, linear estimator).
+        defaults fills features missing from a row; logistic=True returns the
+        positive-class probability instead of the raw linear score.
+        """
+        preprocess = pipeline.named_steps['preprocess']
+        estimator = pipeline.steps[-1][1]
+        encoder = preprocess.named_transformers_['categorical']
+        coef = np.ravel(estimator.coef_).astype(float)
+
+        self.categorical_cols = list(categorical_cols)
+        self.numeric_cols = list(numeric_cols)
+        self.defaults = dict(defaults or {})
+        self.logistic = logistic
+        self.intercept = float(np.ravel(estimator.intercept_)[0])
+
+        # One-hot block: each category maps straight to its coefficient,
+        # unknown categories contribute nothing (handle_unknown='ignore')
+        cat_coef = coef[preprocess.output_indices_['categorical']]
+        self.lookup_tables = []
+        self.sorted_categories = []
+        self.sorted_coefs = []
+        offset = 0
+        for categories in encoder.categories_:
+            block = cat_coef[offset:offset + len(categories)]
+            self.lookup_tables.append(dict(zip(categories, block)))
+            # Sorted copies for vectorized batch lookups with searchsorted
+            order = np.argsort(categories)
+            self.sorted_categories.append(np.asarray(categories, dtype=str)[order])
+            self.sorted_coefs.append(block[order])
+            offset += len(categories)
+
+        self.numeric_weights = coef[preprocess.output_indices_['numeric']]
+
+    def _finish(self, score):
+        if self.logistic:
+            return 1.0 / (1.0 + np.exp(-score))
+        return score
+
+    def score(self, row):
+        """Score a single row given as {feature: value}"""
+        total = self.intercept
+        for col, table in zip(self.categorical_cols, self.lookup_tables):
+            total += table.get(row.get(col, self.defaults.get(col)), 0.0)
+
+        numeric = np.fromiter(
+            (float(row.get(col, self.defaults.get(col, 0.0))) for col in self.numeric_cols),
+            dtype=float,
+            count=len(self.numeric_cols)
+        )
+        return float(self._finish(total + numeric @ self.numeric_weights))
+
+    def score_batch(self, rows):
+        """Score many rows given as a list of dicts or a DataFrame"""
+        n = len(rows)
+        if hasattr(rows, 'columns'):
+            def column(col):
+                if col in rows.columns:
+                    return rows[col].to_numpy()
+                return np.full(n, self.defaults.get(col), dtype=object)
+        else:
+            def column(col):
+                default = self.defaults.get(col)
+                return np.array([row.get(col, default) for row in rows], dtype=object)
+
+        totals = np.full(n, self.intercept)
+        for col, categories, coefs in zip(self.categorical_cols, self.sorted_categories, self.sorted_coefs):
+            if n == 0 or len(categories) == 0:
+                continue
+            values = column(col).astype(str)
+            idx = np.searchsorted(categories, values).clip(0, len(categories) - 1)
+            known = categories[idx] == values
+            totals += np.where(known, coefs[idx], 0.0)
+
+        if self.numeric_cols:
+            numeric = np.column_stack([column(col).astype(float) for col in self.numeric_cols])
+            totals += numeric.reshape(n, len(self.numeric_cols)) @ self.numeric_weights
+        return self._finish(totals)
+
+    def check_parity(self, pipeline, X, tolerance=1e-6):
+        """Largest difference from the sklearn pipeline on X (raises if above tolerance)"""
+        if self.logistic:
+            expected = pipeline.predict_proba(X)[:, 1]
+        else:
+            expected = pipeline.predict(X)
+        max_diff = float(np.max(np.abs(self.score_batch(X) - expected))) if len(X) else 0.0
+        if max_diff > tolerance:
+            raise ValueError(f'Compiled scorer differs from pipeline by {max_diff:.2e}')
+        return max_diff
@@ -0,0 +1,80 @@
+#!/usr/bin/env python
+"""
+Forecast Parameter Fitting
+Tunes the SGPA forecast parameters on predictions whose actual CGPA has been
+recorded, reports the error reduction against the parameters currently in
+use and publishes the fitted set as a new version.
+
+Usage:
+    python fit_forecast.py [--min-pairs 20] [--dry-run]
+"""
+
+import argparse
+
+import numpy as np
+
+from database import ExcelDatabase
+from forecasting import ForecastParamStore, fit_params, forecast_errors
+
+
+def holdout_split(n, fraction=0.2, seed=42):
+    order = np.random.default_rng(seed).permutation(n)
+    cut = int(n * fraction)
+    return order[cut:], order[:cut]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Fit SGPA forecast parameters to actual outcomes')
+    parser.add_argument('--min-pairs', type=int, default=20,
+                        help='minimum validated predictions needed to fit')
+    parser.add_argument('--store', default='models/forecast_params.json', help='parameter store file')
+    parser.add_argument('--dry-run', action='store_true', help='report without publishing')
+    args = parser.parse_args()
+
+    db = ExcelDatabase(data_folder='data')
+    histories, actual = db.get_forecast_training_pairs()
+    print(f"Found {len(actual)} predictions with recorded outcomes and full SGPA history")
+    if len(actual) < args.min_pairs:
+        print(f"Need at least {args.min_pairs} to fit; keeping the current parameters")
+        return
+
+    store = ForecastParamStore(args.store)
+    current_version, current = store.active()
+    actual = np.asarray(actual)
+
+    # Judge the fit on held-out pairs, then refit on everything for publishing
+    train_idx, test_idx = holdout_split(len(actual))
+    held_out = fit_params([histories[i] for i in train_idx], actual[train_idx], start=current)
+    test_histories = [histories[i] for i in test_idx]
+    before = forecast_errors(test_histories, actual[test_idx], current)
+    after = forecast_errors(test_histories, actual[test_idx], held_out)
+
+    params = fit_params(histories, actual, start=current)
+    report = {
+        'pairs': int(len(actual)),
+        'baseline_version': current_version,
+        'holdout_pairs': int(len(test_idx)),
+        'holdout_before': before,
+        'holdout_after': after,
+        'rmse_reduction_pct': round((1 - after['rmse'] / before['rmse']) * 100, 1) if before['rmse'] else 0.0,
+        'in_sample_before': forecast_errors(histories, actual, current),
+        'in_sample_after': forecast_errors(histories, actual, params),
+    }
+
+    print(f"Parameters ({current_version} -> fitted):")
+    for name, value in params.items():
+        print(f"  {name:<12} {current[name]:>7.4f} -> {value:.4f}")
+    print(f"Hold-out RMSE {before['rmse']:.4f} -> {after['rmse']:.4f} "
+          f"({report['rmse_reduction_pct']}% reduction), MAE {before['mae']:.4f} -> {after['mae']:.4f}")
+
+    if args.dry_run:
+        return
+    if after['rmse'] >= before['rmse']:
+        print("Fitted parameters do not beat the current ones on held-out pairs; not publishing")
+        return
+    version = store.publish(params, report)
+    print(f"Published forecast parameters {version}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,470 @@
+"""
+SGPA Forecasting
+Multi-semester SGPA forecast used by /api/predict, its parameters, a
+vectorized batch version used to fit them to recorded actual outcomes and
+to simulate Monte Carlo prediction intervals, and the versioned store the
+fitted parameter sets are published to.
+"""
+
+import json
+import os
+import threading
+from datetime import datetime
+
+import numpy as np
+
+FINAL_SEMESTER = 8
+
+# Hand-tuned values the forecast shipped with; always the fallback
+DEFAULT_PARAMS = {
+    'shrinkage': 0.9,       # weight on the only known SGPA
+    'prior_weight': 0.1,    # weight on PRIOR_SGPA for a single known semester
+    'weight_span': 1.0,     # history weights are exp(linspace(0, span, n))
+    'momentum': 0.3,        # weight on recent (last 3) average minus overall average
+    'trend': 0.2,           # weight on the fitted SGPA slope
+    'decay': 0.9,           # per-semester decay of the trend term
+}
+MOMENTUM_WINDOW = 3
+PRIOR_SGPA = 2.5  # mean the single-semester forecast regresses towards
+
+
+def trend_slope(sgpa_values):
+    """Least squares slope of SGPA over semesters (0 for a single semester)"""
+    if len(sgpa_values) < 2:
+        return 0.0
+    return float(np.polyfit(np.arange(1, len(sgpa_values) + 1), sgpa_values, 1)[0])
+
+
+def forecast_sgpa(sgpa_values, params=None):
+    """Forecast every remaining semester up to FINAL_SEMESTER.
+    Returns [(semester, predicted_sgpa)] with unrounded predictions.
+    """
+    p = params or DEFAULT_PARAMS
+    num_semesters = len(sgpa_values)
+    slope = trend_slope(sgpa_values)
+    history = list(sgpa_values)
+    forecast = []
+
+    for next_sem_num in range(num_semesters + 1, FINAL_SEMESTER + 1):
+        num_hist = len(history)
+        last_sgpa = history[-1]
+
+        if num_hist == 1:
+            # Only one semester: use it as baseline with regression to the prior
+            pred_sgpa = last_sgpa * p['shrinkage'] + PRIOR_SGPA * p['prior_weight']
+        else:
+            # Exponential weights favoring recent semesters
+            weights = np.exp(np.linspace(0, p['weight_span'], num_hist))
+            weighted_avg = np.average(history, weights=weights)
+
+            # Momentum: recent performance vs overall average
+            recent_avg = np.mean(history[-min(MOMENTUM_WINDOW, num_hist):])
+            momentum = recent_avg - np.mean(history)
+            pred_sgpa = weighted_avg + momentum * p['momentum']
+
+            # Trend influence, decaying for distant predictions
+            if num_hist > 2:
+                decay_factor = p['decay'] ** (next_sem_num - num_semesters - 1)
+                pred_sgpa += slope * p['trend'] * decay_factor
+
+        pred_sgpa = max(0, min(4, pred_sgpa))
+        forecast.append((next_sem_num, pred_sgpa))
+        history.append(pred_sgpa)
+
+    return forecast
+
+
+# =============================================
+# VECTORIZED FITTING
+# =============================================
+
+def pad_histories(histories):
+    """Stack histories into a (n, FINAL_SEMESTER) array plus their lengths"""
+    lengths = np.array([len(h) for h in histories], dtype=int)
+    padded = np.zeros((len(histories), FINAL_SEMESTER))
+    for i, h in enumerate(histories):
+        padded[i, :len(h)] = h
+    return padded, lengths
+
+
+def batch_slopes(padded, lengths):
+    """Least squares SGPA slope of every padded history"""
+    x = np.arange(1, FINAL_SEMESTER + 1)[None, :]
+    mask = np.arange(FINAL_SEMESTER)[None, :] < lengths[:, None]
+    n = np.maximum(lengths, 1)
+    x_mean = (x * mask).sum(axis=1) / n
+    y_mean = (padded * mask).sum(axis=1) / n
+    dx = (x - x_mean[:, None]) * mask
+    var = (dx ** 2).sum(axis=1)
+    cov = (dx * (padded - y_mean[:, None])).sum(axis=1)
+    return np.where(lengths > 1, cov / np.where(var > 0, var, 1), 0.0)
+
+
+def batch_forecast(padded, lengths, slopes, params, noise=None):
+    """Forecast trajectories of every history for P parameter candidates at once.
+    params maps each name to a length-P (or length-1, shared) array. noise, if
+    given, is an (n, FINAL_SEMESTER, P) array of shocks added to the prediction
+    at each forecast step, which then feeds the following steps.
+    Returns an (n, FINAL_SEMESTER, P) array of known followed by forecast SGPAs;
+    candidates / paths are the last axis so every step works on contiguous rows.
+    """
+    P = noise.shape[2] if noise is not None else max(len(v) for v in params.values())
+    p = {k: np.asarray(v, dtype=float)[None, :] for k, v in params.items()}
+    n = len(lengths)
+    rows_all = np.arange(n)
+    positions = np.arange(FINAL_SEMESTER)[None, :]
+
+    history = np.repeat(padded[:, :, None], P, axis=2)
+    steps = FINAL_SEMESTER - lengths
+
+    for step in range(FINAL_SEMESTER - int(lengths.min())):
+        active = step < steps
+        num_hist = lengths + step
+        mask = positions < num_hist[:, None]
+        last = history[rows_all, np.minimum(num_hist, FINAL_SEMESTER) - 1]
+
+        # exp(linspace(0, span, num_hist)) evaluated per position
+        frac = positions / np.maximum(num_hist - 1, 1)[:, None]
+        weights = np.exp(frac[:, :, None] * p['weight_span'][None]) * mask[:, :, None]
+        window = np.minimum(MOMENTUM_WINDOW, num_hist)
+        recent_mask = mask & (positions >= (num_hist - window)[:, None])
+
+        # Weighted average plus momentum * (recent - overall average) is linear
+        # in the history, so fold it into one coefficient per position and
+        # reduce the (n, positions, paths) array once
+        coef = weights / weights.sum(axis=1, keepdims=True) + p['momentum'][None] * (
+            recent_mask / window[:, None] - mask / num_hist[:, None])[:, :, None]
+        multi = np.einsum('nkp,nkp->np', history, np.broadcast_to(coef, history.shape))
+        multi += np.where(num_hist > 2, slopes, 0.0)[:, None] * p['trend'] * p['decay'] ** step
+
+        pred = np.where((num_hist == 1)[:, None], last * p['shrinkage'] + PRIOR_SGPA * p['prior_weight'], multi)
+        if noise is not None:
+            pred += noise[:, step]
+        np.clip(pred, 0, 4, out=pred)
+
+        rows = np.nonzero(active)[0]
+        history[rows, num_hist[rows]] = pred[rows]
+
+    return history
+
+
+def batch_forecast_mean(padded, lengths, slopes, params):
+    """Mean forecast SGPA of every history for P parameter candidates, as (P, n).
+    This is the quantity stored as predicted_cgpa and compared to actual_cgpa.
+    """
+    forecast_mask = np.arange(FINAL_SEMESTER)[None, :] >= lengths[:, None]
+    history = batch_forecast(padded, lengths, slopes, params)
+    total = np.einsum('nkp,nk->pn', history, forecast_mask.astype(float))
+    return total / np.maximum(FINAL_SEMESTER - lengths, 1)
+
+
+SEARCH_GRIDS = {
+    'shrinkage': np.linspace(0, 1.2, 49),
+    'prior_weight': np.linspace(0, 1, 41),
+    'weight_span': np.linspace(0, 4, 41),
+    'momentum': np.linspace(-1, 1, 41),
+    'trend': np.linspace(-1, 1, 41),
+    'decay': np.linspace(0, 1, 41),
+}
+
+
+def _mse(params, padded, lengths, slopes, actual):
+    batch = {k: [v] for k, v in params.items()}
+    return float(np.mean((batch_forecast_mean(padded, lengths, slopes, batch)[0] - actual) ** 2))
+
+
+def fit_params(histories, actual, start=None, rounds=4):
+    """Coordinate descent over SEARCH_GRIDS starting from the current params.
+    Each step scores a whole grid for one parameter in a single batched pass;
+    the start point is always a candidate, so the fit never gets worse.
+    """
+    padded, lengths = pad_histories(histories)
+    slopes = batch_slopes(padded, lengths)
+    actual = np.asarray(actual, dtype=float)
+    params = dict(start or DEFAULT_PARAMS)
+    best = _mse(params, padded, lengths, slopes, actual)
+
+    for _ in range(rounds):
+        improved = False
+        for name, grid in SEARCH_GRIDS.items():
+            candidates = np.append(grid, params[name])
+            batch = {k: np.full(len(candidates), v) for k, v in params.items()}
+            batch[name] = candidates
+            errors = ((batch_forecast_mean(padded, lengths, slopes, batch) - actual) ** 2).mean(axis=1)
+            idx = int(np.argmin(errors))
+            if errors[idx] < best - 1e-12:
+                best = float(errors[idx])
+                params[name] = float(candidates[idx])
+                improved = True
+        if not improved:
+            break
+
+    return {k: round(v, 4) for k, v in params.items()}
+
+
+def forecast_errors(histories, actual, params):
+    """RMSE and MAE of the mean forecast against actual outcomes"""
+    padded, lengths = pad_histories(histories)
+    slopes = batch_slopes(padded, lengths)
+    batch = {k: [v] for k, v in params.items()}
+    residual = batch_forecast_mean(padded, lengths, slopes, batch)[0] - np.asarray(actual, dtype=float)
+    return {
+        'rmse': round(float(np.sqrt(np.mean(residual ** 2))), 4),
+        'mae': round(float(np.mean(np.abs(residual))), 4),
+    }
+
+
+# =============================================
+# MONTE CARLO INTERVALS
+# =============================================
+
+DEFAULT_NOISE_STD = 0.3   # one-step SGPA residual when there is too little data to estimate it
+MIN_RESIDUALS = 20
+PASS_CGPA = 2.0
+DEFAULT_QUANTILES = (0.1, 0.5, 0.9)
+
+
+def one_step_residuals(sgpa_histories, params=None):
+    """Actual minus forecast SGPA for every semester after the first,
+    forecast from the semesters before it
+    """
+    p = params or DEFAULT_PARAMS
+    prefixes, targets = [], []
+    for history in sgpa_histories:
+        for k in range(1, min(len(history), FINAL_SEMESTER)):
+            prefixes.append(history[:k])
+            targets.append(history[k])
+    if not prefixes:
+        return np.array([])
+
+    padded, lengths = pad_histories(prefixes)
+    forecast = batch_forecast(padded, lengths, batch_slopes(padded, lengths), {k: [v] for k, v in p.items()})
+    return np.asarray(targets) - forecast[np.arange(len(lengths)), lengths, 0]
+
+
+def estimate_noise_std(sgpa_histories, params=None):
+    """RMS one-step residual; DEFAULT_NOISE_STD if there are too few residuals"""
+    residuals = one_step_residuals(sgpa_histories, params)
+    if len(residuals) < MIN_RESIDUALS:
+        return DEFAULT_NOISE_STD
+    return float(np.sqrt(np.mean(residuals ** 2)))
+
+
+def simulate_forecasts(histories, params=None, noise_std=DEFAULT_NOISE_STD, n_paths=2000,
+                       quantiles=DEFAULT_QUANTILES, pass_cgpa=PASS_CGPA, shift=0.0, seed=None,
+                       chunk_size=128):
+    """Simulate n_paths noisy SGPA trajectories per history.
+    Each forecast step gets a N(0, noise_std) shock that carries into the
+    following steps; shift is then added once to every forecast SGPA (a level
+    correction, like the one applied to the point forecast). Returns one dict per history with per-semester quantiles
+    of the forecast, quantiles of the final CGPA and the probability that it
+    reaches pass_cgpa. Histories are processed chunk_size at a time to bound memory.
+    """
+    p = {k: [v] for k, v in (params or DEFAULT_PARAMS).items()}
+    rng = np.random.default_rng(seed)
+    labels = [f'p{round(q * 100)}' for q in quantiles]
+    results = []
+
+    for start in range(0, len(histories), chunk_size):
+        padded, lengths = pad_histories(histories[start:start + chunk_size])
+        slopes = batch_slopes(padded, lengths)
+        noise = rng.normal(0.0, noise_std, size=(len(lengths), FINAL_SEMESTER, n_paths))
+        paths = batch_forecast(padded, lengths, slopes, p, noise)
+        if shift:
+            forecast_mask = np.arange(FINAL_SEMESTER)[None, :, None] >= lengths[:, None, None]
+            paths = np.where(forecast_mask, np.clip(paths + shift, 0, 4), paths)
+
+        # Equal credits per semester, so the CGPA is the mean of all 8 SGPAs
+        cgpa = paths.mean(axis=1)
+        semester_q = np.quantile(paths, quantiles, axis=2)
+        cgpa_q = np.quantile(cgpa, quantiles, axis=1)
+        pass_prob = (cgpa >= pass_cgpa).mean(axis=1)
+        semester_mean = paths.mean(axis=2)
+
+        for i, length in enumerate(lengths):
+            semesters = []
+            for pos in range(length, FINAL_SEMESTER):
+                entry = {'semester': pos + 1, 'mean': round(float(semester_mean[i, pos]), 2)}
+                entry.update({label: round(float(semester_q[j, i, pos]), 2) for j, label in enumerate(labels)})
+                semesters.append(entry)
+            results.append({
+                'semesters': semesters,
+                'cgpa': {label: round(float(cgpa_q[j, i]), 2) for j, label in enumerate(labels)},
+                'pass_probability': round(float(pass_prob[i]) * 100, 1),
+            })
+
+    return results
+
+
+# =============================================
+# WHAT-IF SCENARIOS
+# =============================================
+
+# A scenario shifts the next semester's SGPA by its grade improvement plus
+# these attendance / midterm effects; the forecast then carries it forward
+ATTENDANCE_BASELINE = 75
+ATTENDANCE_IMPACT = 0.5   # SGPA per 100 attendance points above the baseline
+MIDTERM_BASELINE = 25
+MIDTERM_IMPACT = 0.3      # SGPA per 50 midterm marks above the baseline
+
+
+def scenario_shift(attendance, midterm, improvement):
+    """Next-semester SGPA shift of a scenario (works elementwise on arrays)"""
+    return (np.asarray(improvement, dtype=float)
+            + (np.asarray(attendance, dtype=float) - ATTENDANCE_BASELINE) / 100 * ATTENDANCE_IMPACT
+            + (np.asarray(midterm, dtype=float) - MIDTERM_BASELINE) / 50 * MIDTERM_IMPACT)
+
+
+def what_if_grid(sgpa_values, attendance_values, midterm_values, improvement_values, params=None,
+                 noise_std=DEFAULT_NOISE_STD, n_paths=300, pass_cgpa=PASS_CGPA, seed=0):
+    """Evaluate every improvement x attendance x midterm scenario in one pass.
+    Returns surfaces indexed [improvement][attendance][midterm] of the next
+    semester SGPA, the projected final CGPA and the pass probability, plus the
+    no-change baseline. All scenarios share the same simulated shocks, so
+    differences between cells come from the scenarios alone.
+    """
+    p = {k: [v] for k, v in (params or DEFAULT_PARAMS).items()}
+    grid = np.meshgrid(attendance_values, midterm_values, improvement_values, indexing='ij')
+    shifts = scenario_shift(grid[0], grid[1], grid[2]).transpose(2, 0, 1)
+    shape = shifts.shape
+    # The baseline (no change) rides along as one extra scenario
+    shifts = np.append(shifts.ravel(), scenario_shift(ATTENDANCE_BASELINE, MIDTERM_BASELINE, 0.0))
+    P = len(shifts)
+
+    padded, lengths = pad_histories([sgpa_values])
+    slopes = batch_slopes(padded, lengths)
+
+    # Point forecast of every scenario
+    offsets = np.zeros((1, FINAL_SEMESTER, P))
+    offsets[0, 0] = shifts
+    point = batch_forecast(padded, lengths, slopes, p, offsets)[0]
+
+    # Monte Carlo with common random numbers across scenarios
+    rng = np.random.default_rng(seed)
+    shocks = rng.normal(0, noise_std, size=(FINAL_SEMESTER, 1, n_paths))
+    noise = np.broadcast_to(shocks, (FINAL_SEMESTER, P, n_paths)).copy()
+    noise[0] += shifts[:, None]
+    paths = batch_forecast(padded, lengths, slopes, p, noise.reshape(1, FINAL_SEMESTER, P * n_paths))[0]
+    pass_prob = (paths.mean(axis=0) >= pass_cgpa).reshape(P, n_paths).mean(axis=1)
+
+    next_sgpa = point[lengths[0]]
+    cgpa = point.mean(axis=0)
+
+    def surface(values, decimals=2):
+        return np.round(values[:-1].reshape(shape), decimals).tolist()
+
+    return {
+        'next_sgpa': surface(next_sgpa),
+        'cgpa': surface(cgpa),
+        'pass_probability': surface(pass_prob * 100, decimals=1),
+        'baseline': {
+            'next_sgpa': round(float(next_sgpa[-1]), 2),
+            'cgpa': round(float(cgpa[-1]), 2),
+            'pass_probability': round(float(pass_prob[-1]) * 100, 1),
+        },
+    }
+
+
+# =============================================
+# FIRST SEMESTER ESTIMATES
+# =============================================
+
+# Without any SGPA history the estimate comes from the midterm (out of 50)
+# and attendance (%), weighted 70 / 30 on the 4.0 scale
+FIRST_SEMESTER_MIDTERM_WEIGHT = 0.7
+FIRST_SEMESTER_ATTENDANCE_WEIGHT = 0.3
+# (minimum estimated SGPA, pass probability %), checked top down
+FIRST_SEMESTER_PASS_BANDS = [(3.5, 95), (3.0, 85), (2.5, 70), (2.0, 55), (0.0, 30)]
+
+
+def estimate_first_semester(attendance, midterm, params=None):
+    """Estimated SGPA, pass probability and remaining-semester forecast for
+    many first-semester students at once. attendance and midterm are arrays
+    (or lists) of equal length; returns one dict per student.
+    """
+    attendance = np.asarray(attendance, dtype=float)
+    midterm = np.asarray(midterm, dtype=float)
+    estimated = np.clip(
+        midterm / 50 * 4.0 * FIRST_SEMESTER_MIDTERM_WEIGHT
+        + attendance / 100 * 4.0 * FIRST_SEMESTER_ATTENDANCE_WEIGHT,
+        0, 4
+    )
+
+    thresholds = np.array([band for band, _ in FIRST_SEMESTER_PASS_BANDS])
+    probabilities = np.array([prob for _, prob in FIRST_SEMESTER_PASS_BANDS])
+    # Bands are in descending order, so count the thresholds each estimate misses
+    pass_prob = probabilities[np.sum(estimated[:, None] < thresholds[None, :], axis=1)]
+
+    # Semesters 2-8 forecast from the estimate as a one-semester history
+    padded, lengths = pad_histories(estimated[:, None])
+    p = {k: [v] for k, v in (params or DEFAULT_PARAMS).items()}
+    forecast = batch_forecast(padded, lengths, batch_slopes(padded, lengths), p)[:, :, 0]
+
+    return [
+        {
+            'estimated_sgpa': round(float(estimated[i]), 2),
+            'pass_probability': int(pass_prob[i]),
+            'predictions': [
+                {'semester': sem + 1, 'predicted_sgpa': round(float(forecast[i, sem]), 2)}
+                for sem in range(1, FINAL_SEMESTER)
+            ],
+        }
+        for i in range(len(estimated))
+    ]
+
+
+# =============================================
+# VERSIONED PARAMETER STORE
+# =============================================
+
+class ForecastParamStore:
+    """Versioned forecast parameter sets in one JSON file; the prediction path
+    reloads the active set whenever the file changes.
+    """
+
+    def __init__(self, path='models/forecast_params.json'):
+        self.path = path
+        self._lock = threading.Lock()
+        self._mtime = None
+        self._active = ('default', dict(DEFAULT_PARAMS))
+
+    def _read(self):
+        if not os.path.exists(self.path):
+            return {'active': None, 'versions': {}}
+        with open(self.path) as f:
+            return json.load(f)
+
+    def publish(self, params, report, activate=True):
+        """Store a fitted parameter set; returns its version"""
+        with self._lock:
+            store = self._read()
+            version = f"v{len(store['versions']) + 1:03d}"
+            store['versions'][version] = {
+                'created_at': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+                'params': params,
+                'report': report
+            }
+            if activate:
+                store['active'] = version
+
+            os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+            tmp_path = self.path + '.tmp'
+            with open(tmp_path, 'w') as f:
+                json.dump(store, f, indent=2)
+            os.replace(tmp_path, self.path)
+        return version
+
+    def active(self):
+        """(version, params) currently in use; DEFAULT_PARAMS until one is published"""
+        try:
+            mtime = os.stat(self.path).st_mtime_ns
+        except FileNotFoundError:
+            return self._active
+        if mtime != self._mtime:
+            with self._lock:
+                store = self._read()
+                version = store['active']
+                if version is not None:
+                    self._active = (version, {**DEFAULT_PARAMS, **store['versions'][version]['params']})
+                self._mtime = mtime
+        return self._active
@@ -0,0 +1,41 @@
+"""
+Rendered Fragment Cache
+Keeps the HTML of template fragments that depend only on a few inputs, so a
+page whose data has not changed reuses the markup instead of rendering it
+again. Keys are the inputs the fragment was rendered from; entries for inputs
+that no longer occur are never hit again and fall out least recently used first.
+"""
+
+import threading
+from collections import OrderedDict
+
+
+class FragmentCache:
+    def __init__(self, max_entries=256):
+        self.max_entries = max_entries
+        self._fragments = OrderedDict()  # key -> rendered HTML, least recently used first
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get_or_render(self, key, render):
+        """Cached HTML for key, or render() stored under it"""
+        with self._lock:
+            html = self._fragments.get(key)
+            if html is not None:
+                self._fragments.move_to_end(key)
+                self.hits += 1
+                return html
+            self.misses += 1
+
+        # Rendered outside the lock; two requests may both render a new key once
+        html = render()
+        with self._lock:
+            self._fragments[key] = html
+            self._fragments.move_to_end(key)
+            if len(self._fragments) > self.max_entries:
+                self._fragments.popitem(last=False)
+        return html
+
+    def stats(self):
+        return {'hits': self.hits, 'misses': self.misses, 'entries': len(self._fragments)}
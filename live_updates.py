@@ -0,0 +1,48 @@
+"""
+Live Dashboard Updates
+Turns the database's change feed into server-sent events for one teacher
+dashboard: after each committed write the dashboard gets the new summaries
+of just the students that changed, instead of reloading every list.
+
+Events:
+    students   {"version": seq, "students": [summary, ...]}
+    resync     the client missed changes and should reload its lists
+"""
+
+POLL_INTERVAL = 2  # seconds a stream waits before checking for changes from other processes
+KEEPALIVE_INTERVAL = 15  # seconds between comments on an idle stream
+MAX_STREAM_AGE = 300  # streams end after this long; the browser reconnects with Last-Event-ID
+RETRY_MS = 3000  # browser reconnect delay
+
+
+def format_event(event, data, event_id):
+    return f'id: {event_id}\nevent: {event}\ndata: {data}\n\n'
+
+
+class StudentUpdateStream:
+    def __init__(self, db, dumps, last_event_id=None):
+        self.db = db
+        self.dumps = dumps
+        # A new stream starts at the present; a reconnecting one where it left off
+        self.seq = db.changes.latest if last_event_id is None else last_event_id
+
+    def opening(self):
+        return f'retry: {RETRY_MS}\n\n'
+
+    def poll(self):
+        """Event text for the changes since the last call ('' if there are none)"""
+        return self._message(*self.db.changes.since(self.seq))
+
+    def wait(self, timeout):
+        """poll(), after waiting up to timeout seconds for a change"""
+        return self._message(*self.db.changes.wait(self.seq, timeout))
+
+    def _message(self, changes, latest):
+        self.seq = latest
+        if changes is None:
+            return format_event('resync', '{}', latest)
+        if not changes:
+            return ''
+        usernames = list(dict.fromkeys(event[1] for event in changes))
+        payload = {'version': latest, 'students': self.db.get_student_summaries(usernames)}
+        return format_event('students', self.dumps(payload, separators=(',', ':')), latest)
@@ -0,0 +1,216 @@
+"""
+Model Manager
+Holds the active model version behind a single reference that is swapped
+atomically. A background watcher polls the registry and loads, validates and
+warms up a newly activated version before swapping it in; requests grab the
+current bundle once and keep using it, so a swap never changes the model in
+the middle of a prediction.
+"""
+
+import os
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+from fast_scorer import CompiledScorer
+
+
+class ModelBundle:
+    """One immutable, ready-to-serve model version"""
+
+    def __init__(self, trained, version=None):
+        self.version = version or trained.get('version', 'inline')
+        self.model = trained['model']
+        self.clf = trained['clf']
+        self.categorical_cols = trained['categorical_cols']
+        self.numeric_cols = trained['numeric_cols']
+        self.X_train = trained['X_train']
+        self.X_test = trained['X_test']
+        self.metrics = dict(trained['metrics'])
+        self.feature_columns = list(self.X_train.columns)
+
+        # Training median/mode fills features missing from a scored row
+        self.base_row = {}
+        for col in self.feature_columns:
+            if col in self.numeric_cols:
+                self.base_row[col] = float(self.X_train[col].median())
+            else:
+                self.base_row[col] = self.X_train[col].mode().iloc[0]
+
+        self.feature_pairs = self._compute_feature_pairs()
+        self._compile_scorers()
+
+    def _compute_feature_pairs(self):
+        try:
+            reg = self.model.named_steps['regressor']
+            enc = self.model.named_steps['preprocess'].named_transformers_['categorical']
+            all_names = list(enc.get_feature_names_out(self.categorical_cols)) + self.numeric_cols
+            # Tree ensembles from the registry expose importances instead of coefficients
+            coefs = np.ravel(reg.coef_) if hasattr(reg, 'coef_') else reg.feature_importances_
+            return sorted(zip(all_names, coefs), key=lambda x: abs(x[1]), reverse=True)
+        except Exception:
+            return []
+
+    def _compile_scorers(self):
+        """Compiled fast-path scorers, checked against the sklearn pipelines.
+        Only linear models can be compiled; anything else is scored through its pipeline.
+        """
+        self.fast_scoring_enabled = True
+        try:
+            self.g3_scorer = CompiledScorer(self.model, self.categorical_cols, self.numeric_cols,
+                                            defaults=self.base_row)
+            self.pass_scorer = CompiledScorer(self.clf, self.categorical_cols, self.numeric_cols,
+                                              defaults=self.base_row, logistic=True)
+            g3_diff = self.g3_scorer.check_parity(self.model, self.X_test)
+            pass_diff = self.pass_scorer.check_parity(self.clf, self.X_test)
+            print(f"[{self.version}] Fast scorer parity OK - max diff G3: {g3_diff:.2e}, "
+                  f"pass probability: {pass_diff:.2e}")
+        except (AttributeError, ValueError) as e:
+            self.fast_scoring_enabled = False
+            self.g3_scorer = self.pass_scorer = None
+            print(f"[{self.version}] Fast scorer disabled, falling back to pipelines: {e}")
+
+    def top_features(self, k=8):
+        return self.feature_pairs[:k]
+
+    def score_rows(self, rows):
+        """Predicted G3 and pass probability for a list of feature dicts.
+        A feature given as None (null in JSON) is treated as missing.
+        """
+        rows = [{col: value for col, value in row.items() if value is not None} for row in rows]
+        if self.fast_scoring_enabled:
+            return self.g3_scorer.score_batch(rows), self.pass_scorer.score_batch(rows)
+
+        frame = pd.DataFrame([{**self.base_row, **row} for row in rows])[self.feature_columns]
+        return self.model.predict(frame), self.clf.predict_proba(frame)[:, 1]
+
+    def validate(self):
+        """Score the hold-out split and a default row; raises ValueError if unusable"""
+        g3 = self.model.predict(self.X_test)
+        pass_prob = self.clf.predict_proba(self.X_test)[:, 1]
+        if len(g3) != len(self.X_test) or not np.all(np.isfinite(g3)):
+            raise ValueError(f'Model {self.version} produced invalid G3 predictions')
+        if not np.all((pass_prob >= 0) & (pass_prob <= 1)):
+            raise ValueError(f'Model {self.version} produced invalid pass probabilities')
+
+        g3_row, pass_row = self.score_rows([{}])
+        if not np.isfinite(g3_row[0]) or not 0 <= pass_row[0] <= 1:
+            raise ValueError(f'Model {self.version} failed to score a default row')
+
+
+class ModelManager:
+    def __init__(self, registry, bundle=None, poll_interval=5.0, loader=None):
+        """Serve bundle, or the one loader() returns when no bundle is given.
+        The loader runs in the watcher thread right after start_watcher(), or
+        in the first request that needs a model if that comes sooner.
+        """
+        self.registry = registry
+        self.poll_interval = poll_interval
+        self._loader = loader
+        # Replaced as a whole on swap; readers never see a half-loaded version
+        self._active = bundle
+        self._swap_lock = threading.Lock()
+        self._watcher = None
+        self._stop = threading.Event()
+        self._index_mtime = self._registry_mtime()
+        self.last_error = None
+        self.swapped_at = None
+
+    def current(self):
+        """The bundle to use for one whole request"""
+        bundle = self._active
+        if bundle is None:
+            bundle = self._load_initial()
+        return bundle
+
+    def _load_initial(self):
+        with self._swap_lock:
+            if self._active is None:
+                self._active = self._loader()
+            return self._active
+
+    @property
+    def loaded(self):
+        return self._active is not None
+
+    @property
+    def version(self):
+        return self.current().version
+
+    def _registry_mtime(self):
+        try:
+            return os.stat(self.registry.index_file).st_mtime_ns
+        except FileNotFoundError:
+            return None
+
+    def load_version(self, version):
+        """Load, prepare and validate a version without touching the active one"""
+        trained = self.registry.load(version)
+        if trained is None:
+            raise ValueError('Model registry is empty')
+        bundle = ModelBundle(trained)
+        bundle.validate()
+        return bundle
+
+    def reload(self, version=None):
+        """Swap to the given (default: registry active) version if it differs.
+        Returns True if a swap happened; a version that fails validation is
+        rejected and the current one keeps serving.
+        """
+        with self._swap_lock:
+            version = version or self.registry.active_version()
+            if self._active is None:
+                self._active = self._loader()
+            if version is None or version == self._active.version:
+                self.last_error = None
+                return False
+            try:
+                bundle = self.load_version(version)
+            except Exception as e:
+                self.last_error = f'{version}: {e}'
+                print(f"Model {version} rejected, keeping {self._active.version}: {e}")
+                return False
+
+            previous = self._active.version
+            self._active = bundle
+            self.last_error = None
+            self.swapped_at = time.strftime('%Y-%m-%d %H:%M:%S')
+            print(f"Swapped model {previous} -> {bundle.version}")
+            return True
+
+    def check_for_update(self):
+        """Reload if the registry index changed since the last successful check;
+        a version that failed to load is tried again on the next poll
+        """
+        mtime = self._registry_mtime()
+        if mtime is None or mtime == self._index_mtime:
+            return False
+        swapped = self.reload()
+        if self.last_error is None:
+            self._index_mtime = mtime
+        return swapped
+
+    def _watch(self):
+        try:
+            self.current()
+        except Exception as e:
+            self.last_error = str(e)
+            print(f"Model load failed: {e}")
+        while not self._stop.wait(self.poll_interval):
+            try:
+                self.check_for_update()
+            except Exception as e:
+                self.last_error = str(e)
+                print(f"Model watcher error: {e}")
+
+    def start_watcher(self):
+        """Poll the registry in a daemon thread"""
+        if self._watcher is None or not self._watcher.is_alive():
+            self._stop.clear()
+            self._watcher = threading.Thread(target=self._watch, name='model-watcher', daemon=True)
+            self._watcher.start()
+
+    def stop_watcher(self):
+        self._stop.set()
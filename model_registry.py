@@ -0,0 +1,82 @@
+"""
+Local Model Registry
+Versioned, on-disk store of trained model bundles and the cross-validation
+report that selected them. Layout:
+
+    models/registry.json          index of versions and the active one
+    models/<version>/bundle.joblib
+"""
+
+import json
+import os
+from datetime import datetime
+
+
+class ModelRegistry:
+    def __init__(self, root='models'):
+        self.root = root
+        self.index_file = os.path.join(root, 'registry.json')
+
+    def _read_index(self):
+        if not os.path.exists(self.index_file):
+            return {'active': None, 'versions': {}}
+        with open(self.index_file) as f:
+            return json.load(f)
+
+    def _write_index(self, index):
+        os.makedirs(self.root, exist_ok=True)
+        tmp_path = self.index_file + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(index, f, indent=2)
+        os.replace(tmp_path, self.index_file)
+
+    def list_versions(self):
+        """All registered versions with their reports, oldest first"""
+        return self._read_index()['versions']
+
+    def active_version(self):
+        return self._read_index()['active']
+
+    def register(self, bundle, report, activate=True):
+        """Store a trained bundle with its selection report; returns the new version"""
+        index = self._read_index()
+        version = f"v{len(index['versions']) + 1:03d}"
+        while version in index['versions'] or os.path.exists(os.path.join(self.root, version)):
+            version = f"v{int(version[1:]) + 1:03d}"
+
+        version_dir = os.path.join(self.root, version)
+        os.makedirs(version_dir)
+        import joblib
+        artifact = os.path.join(version, 'bundle.joblib')
+        joblib.dump(bundle, os.path.join(self.root, artifact))
+
+        index['versions'][version] = {
+            'created_at': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+            'artifact': artifact,
+            **report
+        }
+        if activate:
+            index['active'] = version
+        self._write_index(index)
+        return version
+
+    def set_active(self, version):
+        index = self._read_index()
+        if version not in index['versions']:
+            raise KeyError(f'Unknown model version: {version}')
+        index['active'] = version
+        self._write_index(index)
+
+    def load(self, version=None):
+        """Load a bundle (the active one by default); None if the registry is empty"""
+        index = self._read_index()
+        version = version or index['active']
+        if version is None:
+            return None
+
+        entry = index['versions'][version]
+        # Imported here so the app can start before any artifact is read
+        import joblib
+        bundle = joblib.load(os.path.join(self.root, entry['artifact']))
+        bundle['version'] = version
+        return bundle
@@ -0,0 +1,297 @@
+"""
+Online Forecast Learner
+Learns a correction to the SGPA forecast from actual outcomes as they are
+recorded. /api/update-actual-performance appends each outcome to a feedback
+log shared by every server process; one process at a time (the holder of
+the learner lock) reads the new rows in a background thread and updates an
+SGDRegressor with partial_fit, so the model improves continuously without
+retraining on the whole history. The state and the feedback log position
+are checkpointed every few updates; the other processes load each new
+checkpoint, and take over learning from it if the learning process exits.
+
+The correction is only applied once its running (prequential) error beats
+the uncorrected forecast on the same feedback.
+
+    models/online_learner.joblib     checkpoint
+    models/online_feedback.csv       username, semester, predicted_cgpa, actual_cgpa
+"""
+
+import csv
+import io
+import os
+import threading
+
+import numpy as np
+
+import forecasting
+from table_versions import file_lock
+
+# Optional cross-process learner lock (POSIX only); without it every process learns
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+MAX_CORRECTION = 0.5  # largest SGPA shift the learner may apply
+ERROR_SMOOTHING = 0.05  # weight of the newest example in the running errors
+POLL_INTERVAL = 5  # seconds between checks for feedback or checkpoints from other processes
+
+
+def forecast_features(sgpa_history, forecast_mean):
+    """Feature vector for one forecast; every feature is on a 0-4 or 0-1 scale"""
+    history = np.asarray(sgpa_history, dtype=float)
+    return np.array([
+        forecast_mean,
+        history[-1],
+        history.mean(),
+        forecasting.trend_slope(history),
+        len(history) / forecasting.FINAL_SEMESTER,
+    ])
+
+
+class OnlineLearner:
+    def __init__(self, db, checkpoint_path='models/online_learner.joblib',
+                 feedback_path='models/online_feedback.csv',
+                 checkpoint_every=20, min_samples=30, batch_size=64):
+        self.db = db
+        self.checkpoint_path = checkpoint_path
+        self.feedback_path = feedback_path
+        self.checkpoint_every = checkpoint_every
+        self.min_samples = min_samples
+        self.batch_size = batch_size
+        self._wake = threading.Event()
+        self._thread = None
+        self._lock = threading.Lock()
+        self._leader_file = None  # open learner lock file while this process learns
+
+        # Created (or restored from the checkpoint) by the background thread, so
+        # sklearn and joblib are not imported while the app starts
+        self._model = None
+        self.samples_seen = 0
+        self.learner_error = None
+        self.baseline_error = None
+        self._since_checkpoint = 0
+        self._feedback_offset = 0  # bytes of the feedback log already learned from
+        self._checkpoint_source = None  # (mtime, size) of the checkpoint last loaded
+        # (coef, intercept) read by the prediction path; replaced after every batch
+        self._weights = None
+
+    # =============================================
+    # PREDICTION PATH
+    # =============================================
+
+    @property
+    def ready(self):
+        return bool(self._weights is not None
+                    and self.samples_seen >= self.min_samples
+                    and self.learner_error < self.baseline_error)
+
+    def correction(self, sgpa_history, forecast_mean):
+        """Learned SGPA adjustment for a forecast (0 until the learner is ready)"""
+        weights = self._weights
+        if weights is None or not self.ready:
+            return 0.0
+        coef, intercept = weights
+        residual = float(forecast_features(sgpa_history, forecast_mean) @ coef + intercept)
+        return max(-MAX_CORRECTION, min(MAX_CORRECTION, residual))
+
+    def stats(self):
+        return {
+            'samples_seen': self.samples_seen,
+            'learning': self.learning,
+            'ready': self.ready,
+            'learner_mae': None if self.learner_error is None else round(self.learner_error, 4),
+            'baseline_mae': None if self.baseline_error is None else round(self.baseline_error, 4),
+        }
+
+    # =============================================
+    # FEEDBACK AND BACKGROUND UPDATES
+    # =============================================
+
+    @property
+    def learning(self):
+        """True in the one process that currently updates the model"""
+        return fcntl is None or self._leader_file is not None
+
+    def submit(self, username, semester, predicted_cgpa, actual_cgpa):
+        """Append one recorded outcome to the feedback log; returns immediately.
+        predicted_cgpa is the forecast before the online correction was added.
+        """
+        buffer = io.StringIO()
+        writer = csv.writer(buffer, lineterminator='\n')
+        writer.writerow([username, int(semester), float(predicted_cgpa), float(actual_cgpa)])
+        os.makedirs(os.path.dirname(self.feedback_path) or '.', exist_ok=True)
+        with file_lock(self.feedback_path + '.lock'):
+            with open(self.feedback_path, 'a', encoding='utf-8', newline='') as f:
+                f.write(buffer.getvalue())
+        self._wake.set()
+
+    def _build_example(self, username, semester, predicted_cgpa, actual_cgpa):
+        sgpa = self.db.get_student_sgpa(username)
+        history = [sgpa.get(s) for s in range(1, semester)]
+        if not history or None in history:
+            return None
+        return forecast_features(history, predicted_cgpa), actual_cgpa - predicted_cgpa
+
+    def _read_feedback(self):
+        """(up to batch_size rows appended after the last learned one, log offset after them)"""
+        try:
+            size = os.path.getsize(self.feedback_path)
+        except FileNotFoundError:
+            return [], 0
+        # A log shorter than the position was replaced; learn it from the start
+        offset = self._feedback_offset if self._feedback_offset <= size else 0
+        if size == offset:
+            return [], offset
+        with open(self.feedback_path, 'rb') as f:
+            f.seek(offset)
+            chunk = f.read()
+
+        items = []
+        for line in chunk.splitlines(keepends=True):
+            if len(items) == self.batch_size or not line.endswith(b'\n'):
+                break  # a row still being written is read next time
+            offset += len(line)
+            username, semester, predicted, actual = next(csv.reader([line.decode('utf-8')]))
+            items.append((username, int(semester), float(predicted), float(actual)))
+        return items, offset
+
+    def learn(self, items, feedback_offset=None):
+        """Update the model with a batch of (username, semester, predicted, actual);
+        feedback_offset is the feedback log position just after the batch
+        """
+        examples = [e for e in (self._build_example(*item) for item in items) if e is not None]
+        with self._lock:
+            if feedback_offset is not None:
+                self._feedback_offset = feedback_offset
+            if not examples:
+                return 0
+            X = np.array([features for features, _ in examples])
+            y = np.array([residual for _, residual in examples])
+
+            if self._model is None:
+                self._init_model()
+
+            # Score each example before learning from it
+            if self._weights is not None:
+                learner_pred = X @ self._weights[0] + self._weights[1]
+            else:
+                learner_pred = np.zeros(len(y))
+            learner_pred = np.clip(learner_pred, -MAX_CORRECTION, MAX_CORRECTION)
+            for learner_abs, baseline_abs in zip(np.abs(y - learner_pred).tolist(), np.abs(y).tolist()):
+                if self.learner_error is None:
+                    self.learner_error, self.baseline_error = learner_abs, baseline_abs
+                else:
+                    self.learner_error += ERROR_SMOOTHING * (learner_abs - self.learner_error)
+                    self.baseline_error += ERROR_SMOOTHING * (baseline_abs - self.baseline_error)
+
+            self._model.partial_fit(X, y)
+            self._weights = (self._model.coef_.copy(), float(self._model.intercept_[0]))
+            self.samples_seen += len(y)
+            self._since_checkpoint += len(y)
+            if self._since_checkpoint >= self.checkpoint_every:
+                self.checkpoint()
+        return len(y)
+
+    def _try_lead(self):
+        """Take the learner lock if no other process holds it"""
+        if fcntl is None:
+            return True
+        os.makedirs(os.path.dirname(self.checkpoint_path) or '.', exist_ok=True)
+        lock_file = open(self.checkpoint_path + '.lock', 'a')
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            lock_file.close()
+            return False
+        self._leader_file = lock_file
+        return True
+
+    def _step(self):
+        if not self.learning:
+            took_lead = self._try_lead()
+            # Other processes serve the learning process's latest checkpoint; a
+            # new learner continues from it and from its feedback log position
+            with self._lock:
+                self._load_checkpoint()
+            if not took_lead:
+                return
+        while True:
+            items, offset = self._read_feedback()
+            if not items:
+                return
+            self.learn(items, offset)
+
+    def _run(self):
+        with self._lock:
+            self._init_model()
+        while True:
+            try:
+                self._step()
+            except Exception as e:
+                print(f"Online learner update failed: {e}")
+            self._wake.wait(POLL_INTERVAL)
+            self._wake.clear()
+
+    def start(self):
+        """Learn (or follow the learning process) in a daemon thread. Threads do
+        not survive fork, so a pre-forking server calls this in each worker.
+        """
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._run, name='online-learner', daemon=True)
+            self._thread.start()
+
+    # =============================================
+    # CHECKPOINTS
+    # =============================================
+
+    def _init_model(self):
+        """Restore the checkpoint, or start a new model if there is none"""
+        if self._model is not None:
+            return
+        if not self._load_checkpoint():
+            from sklearn.linear_model import SGDRegressor
+            self._model = SGDRegressor(learning_rate='invscaling', eta0=0.01, alpha=1e-4, random_state=42)
+
+    def checkpoint(self):
+        """Write the model and running errors atomically"""
+        import joblib
+        state = {
+            'model': self._model,
+            'samples_seen': self.samples_seen,
+            'learner_error': self.learner_error,
+            'baseline_error': self.baseline_error,
+            'feedback_offset': self._feedback_offset,
+        }
+        os.makedirs(os.path.dirname(self.checkpoint_path) or '.', exist_ok=True)
+        tmp_path = self.checkpoint_path + '.tmp'
+        joblib.dump(state, tmp_path)
+        os.replace(tmp_path, self.checkpoint_path)
+        self._since_checkpoint = 0
+
+    def _load_checkpoint(self):
+        """Restore the checkpoint unless it is the one already loaded"""
+        try:
+            stat = os.stat(self.checkpoint_path)
+        except FileNotFoundError:
+            return False
+        source = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+        if source == self._checkpoint_source:
+            return True
+        import joblib
+        try:
+            state = joblib.load(self.checkpoint_path)
+        except Exception as e:
+            print(f"Ignoring unreadable online learner checkpoint: {e}")
+            return False
+        self._model = state['model']
+        self.samples_seen = state['samples_seen']
+        self.learner_error = state['learner_error']
+        self.baseline_error = state['baseline_error']
+        self._feedback_offset = state.get('feedback_offset', 0)
+        self._since_checkpoint = 0
+        if hasattr(self._model, 'coef_'):
+            self._weights = (self._model.coef_.copy(), float(self._model.intercept_[0]))
+        self._checkpoint_source = source
+        print(f"Loaded online learner checkpoint ({self.samples_seen} samples)")
+        return True
@@ -0,0 +1,234 @@
+#!/usr/bin/env python
+"""
+Startup and Render Profiling
+Breaks the app's cold start into named phases (imports, database, model
+loading, ...) so a slow import or initialisation step shows up by name.
+app.py records its phases in STARTUP, prints the breakdown once it is
+importable and serves it under /api/metrics, together with the time spent
+rendering each template and cached fragment (RENDERS).
+
+Usage:
+    python perf.py                    # time a fresh interpreter importing the app
+    python perf.py http URL [-c 8]    # requests/sec of a running server
+    python perf.py score [-n 1000]    # compiled scorer vs sklearn pipeline
+"""
+
+import threading
+import time
+from contextlib import contextmanager
+
+# Seconds until the app is importable, with a registered model. Import only: the
+# model loads in the background, so the first prediction comes later and is
+# reported next to it (model_ready_ms)
+COLD_START_TARGET = 1.0
+
+
+class StartupReport:
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.ready_after = None
+        self.model_ready_after = None
+        self._phases = []
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def phase(self, name, background=False):
+        """Time a block; background phases run after the app is already serving"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            with self._lock:
+                self._phases.append((name, time.perf_counter() - start, background))
+
+    def mark_ready(self):
+        self.ready_after = time.perf_counter() - self.started
+
+    def mark_model_ready(self):
+        """The first model is loaded and predictions no longer wait for it"""
+        if self.model_ready_after is None:
+            self.model_ready_after = time.perf_counter() - self.started
+
+    def summary(self):
+        with self._lock:
+            phases = list(self._phases)
+        return {
+            'ready_ms': None if self.ready_after is None else round(self.ready_after * 1000, 1),
+            'target_ms': COLD_START_TARGET * 1000,
+            'model_ready_ms': None if self.model_ready_after is None else round(self.model_ready_after * 1000, 1),
+            'phases': [
+                {'name': name, 'ms': round(seconds * 1000, 1), 'background': background}
+                for name, seconds, background in phases
+            ],
+        }
+
+    def print_summary(self):
+        summary = self.summary()
+        model = 'still loading' if summary['model_ready_ms'] is None else f"{summary['model_ready_ms']:.0f} ms"
+        print(f"Startup: importable in {summary['ready_ms']:.0f} ms (target {summary['target_ms']:.0f} ms), "
+              f"model ready: {model}")
+        for phase in summary['phases']:
+            suffix = ' (background)' if phase['background'] else ''
+            print(f"  {phase['name']:<28} {phase['ms']:>8.1f} ms{suffix}")
+
+
+STARTUP = StartupReport()
+
+
+class RenderTimes:
+    """Count, total and slowest render time per template or fragment"""
+
+    def __init__(self):
+        self._stats = {}  # name -> [count, total seconds, max seconds]
+        self._lock = threading.Lock()
+
+    def record(self, name, seconds):
+        with self._lock:
+            stats = self._stats.setdefault(name, [0, 0.0, 0.0])
+            stats[0] += 1
+            stats[1] += seconds
+            stats[2] = max(stats[2], seconds)
+
+    @contextmanager
+    def timed(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - start)
+
+    def summary(self):
+        with self._lock:
+            stats = {name: list(values) for name, values in self._stats.items()}
+        return {
+            name: {
+                'count': count,
+                'total_ms': round(total * 1000, 1),
+                'avg_ms': round(total / count * 1000, 2),
+                'max_ms': round(slowest * 1000, 2),
+            }
+            for name, (count, total, slowest) in stats.items()
+        }
+
+
+RENDERS = RenderTimes()
+
+
+def measure_startup():
+    import subprocess
+    import sys
+
+    # A fresh interpreter, so nothing is already imported or cached in memory
+    script = (
+        "import time; t = time.perf_counter()\n"
+        "import app\n"
+        "ready = time.perf_counter() - t\n"
+        "app.model_manager.current().score_rows([{}])\n"
+        "first = time.perf_counter() - t\n"
+        "print(f'Import to ready: {ready * 1000:.0f} ms')\n"
+        "print(f'Import to first prediction: {first * 1000:.0f} ms')\n"
+        "app.STARTUP.print_summary()\n"
+    )
+    started = time.perf_counter()
+    result = subprocess.run([sys.executable, '-c', script], capture_output=True, text=True)
+    total = time.perf_counter() - started
+    print(result.stdout, end='')
+    if result.returncode != 0:
+        print(result.stderr, end='')
+        sys.exit(result.returncode)
+    print(f"Process total (interpreter start to first prediction): {total * 1000:.0f} ms")
+
+
+def measure_http(url, concurrency=8, seconds=10.0):
+    """Closed-loop load: each client thread sends its next request when the last returns"""
+    import urllib.request
+
+    latencies = []
+    errors = []
+    deadline = time.perf_counter() + seconds
+
+    def client():
+        local = []
+        while time.perf_counter() < deadline:
+            start = time.perf_counter()
+            try:
+                with urllib.request.urlopen(url, timeout=30) as response:
+                    response.read()
+                local.append(time.perf_counter() - start)
+            except Exception as e:
+                errors.append(e)
+        latencies.extend(local)
+
+    threads = [threading.Thread(target=client) for _ in range(concurrency)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    p50 = latencies[len(latencies) // 2] * 1000 if latencies else 0.0
+    p99 = latencies[int(len(latencies) * 0.99)] * 1000 if latencies else 0.0
+    print(f"{url}: {len(latencies) / elapsed:.0f} req/s over {elapsed:.1f}s "
+          f"(concurrency {concurrency}, p50 {p50:.1f} ms, p99 {p99:.1f} ms, {len(errors)} errors)")
+
+
+def measure_scoring(rows=1000, repeat=20):
+    """Per-batch time of the compiled scorer against the sklearn pipeline,
+    on rows drawn from the active model's hold-out split
+    """
+    from model_manager import ModelBundle
+    from model_registry import ModelRegistry
+
+    registry = ModelRegistry()
+    if registry.active_version() is None:
+        raise SystemExit('No registered model; run select_model.py first')
+    bundle = ModelBundle(registry.load())
+    if not bundle.fast_scoring_enabled:
+        raise SystemExit(f'Model {bundle.version} cannot be compiled')
+
+    frame = bundle.X_test.sample(rows, replace=True, random_state=0).reset_index(drop=True)
+    records = frame.to_dict('records')
+
+    def best_of(fn):
+        best = float('inf')
+        for _ in range(repeat):
+            start = time.perf_counter()
+            fn()
+            best = min(best, time.perf_counter() - start)
+        return best
+
+    compiled = best_of(lambda: bundle.score_rows(records))
+    pipeline = best_of(lambda: (bundle.model.predict(frame), bundle.clf.predict_proba(frame)))
+    single = best_of(lambda: bundle.score_rows(records[:1]))
+    single_pipeline = best_of(lambda: (bundle.model.predict(frame[:1]), bundle.clf.predict_proba(frame[:1])))
+    print(f"Model {bundle.version}, {rows} rows, best of {repeat}:")
+    print(f"  compiled scorer   batch {compiled * 1000:8.2f} ms   one row {single * 1000:6.3f} ms")
+    print(f"  sklearn pipeline  batch {pipeline * 1000:8.2f} ms   one row {single_pipeline * 1000:6.3f} ms")
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Startup and throughput measurements')
+    subparsers = parser.add_subparsers(dest='command')
+    http = subparsers.add_parser('http', help='requests/sec of a running server')
+    http.add_argument('url')
+    http.add_argument('-c', '--concurrency', type=int, default=8)
+    http.add_argument('-s', '--seconds', type=float, default=10.0)
+    score = subparsers.add_parser('score', help='compiled scorer vs sklearn pipeline')
+    score.add_argument('-n', '--rows', type=int, default=1000)
+    score.add_argument('-r', '--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    if args.command == 'http':
+        measure_http(args.url, args.concurrency, args.seconds)
+    elif args.command == 'score':
+        measure_scoring(args.rows, args.repeat)
+    else:
+        measure_startup()
+
+
+if __name__ == '__main__':
+    main()
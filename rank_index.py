@@ -0,0 +1,97 @@
+"""
+Department Rank Index
+Keeps every department's students sorted by CGPA so percentile and
+top/bottom K queries use binary search instead of rebuilding and sorting
+the whole teacher dashboard on each request.
+"""
+
+import bisect
+import threading
+
+
+class DepartmentRankIndex:
+    def __init__(self):
+        self._lock = threading.Lock()
+        # department -> parallel sorted lists of (cgpa, username) keys and cgpa values
+        self._keys = {}
+        self._cgpas = {}
+        # username -> (department, cgpa)
+        self._entries = {}
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, username):
+        return username in self._entries
+
+    def update(self, username, department, cgpa):
+        """Insert or move a student to their current CGPA"""
+        cgpa = float(cgpa)
+        with self._lock:
+            self._remove(username)
+            keys = self._keys.setdefault(department, [])
+            cgpas = self._cgpas.setdefault(department, [])
+            idx = bisect.bisect_left(keys, (cgpa, username))
+            keys.insert(idx, (cgpa, username))
+            cgpas.insert(idx, cgpa)
+            self._entries[username] = (department, cgpa)
+
+    def remove(self, username):
+        """Drop a student from the index"""
+        with self._lock:
+            self._remove(username)
+
+    def _remove(self, username):
+        entry = self._entries.pop(username, None)
+        if entry is None:
+            return
+        department, cgpa = entry
+        keys = self._keys[department]
+        idx = bisect.bisect_left(keys, (cgpa, username))
+        del keys[idx]
+        del self._cgpas[department][idx]
+
+    def department_of(self, username):
+        entry = self._entries.get(username)
+        return entry[0] if entry else None
+
+    def percentile(self, username):
+        """Rank of a student within their department.
+        Percentile counts students below plus half of the ties (0-100).
+        Rank 1 is the highest CGPA; tied students share a rank.
+        """
+        with self._lock:
+            entry = self._entries.get(username)
+            if entry is None:
+                return None
+            department, cgpa = entry
+            cgpas = self._cgpas[department]
+            total = len(cgpas)
+            below = bisect.bisect_left(cgpas, cgpa)
+            at_or_below = bisect.bisect_right(cgpas, cgpa)
+
+        return {
+            'username': username,
+            'department': department,
+            'cgpa': round(cgpa, 2),
+            'rank': total - at_or_below + 1,
+            'total': total,
+            'percentile': round((below + 0.5 * (at_or_below - below)) / total * 100, 1)
+        }
+
+    def top(self, department, k=10):
+        """Highest CGPA students of a department, best first"""
+        with self._lock:
+            keys = self._keys.get(department, [])
+            selected = keys[max(len(keys) - k, 0):] if k > 0 else []
+        return [{'username': u, 'cgpa': round(c, 2)} for c, u in reversed(selected)]
+
+    def bottom(self, department, k=10):
+        """Lowest CGPA students of a department, lowest first"""
+        with self._lock:
+            selected = self._keys.get(department, [])[:max(k, 0)]
+        return [{'username': u, 'cgpa': round(c, 2)} for c, u in selected]
+
+    def departments(self):
+        with self._lock:
+            return sorted(d for d, keys in self._keys.items() if keys)
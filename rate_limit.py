@@ -0,0 +1,81 @@
+"""
+Admission Control
+In-memory token buckets that shed overload before a request reaches storage.
+Each limiter has one bucket per key (user or client address) and one global
+bucket shared by everyone; a request is admitted only if both have a token,
+otherwise the caller gets the number of seconds to wait before retrying.
+
+Buckets live in one process. When the app runs in several worker processes
+(serve.py), each limiter is given the worker count and every worker admits
+its share of the configured rates, so together they admit about the limit.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+
+
+class TokenBucket:
+    def __init__(self, rate, capacity, now=None):
+        self.rate = float(rate)  # tokens added per second
+        self.capacity = float(capacity)  # burst size
+        self.tokens = float(capacity)
+        self.updated = time.monotonic() if now is None else now
+
+    def _refill(self, now):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, now):
+        """Seconds until a token is available (0 if one is available now)"""
+        self._refill(now)
+        if self.tokens >= 1:
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+    def take(self):
+        self.tokens -= 1
+
+
+class RateLimiter:
+    def __init__(self, per_key_rate, per_key_burst, global_rate, global_burst, max_keys=10000, processes=1):
+        """Rates and bursts are for the whole app; with processes > 1 this
+        process admits its share (bursts keep at least one token per process).
+        """
+        self.processes = max(1, int(processes))
+        self.per_key_rate = per_key_rate / self.processes
+        self.per_key_burst = max(1.0, per_key_burst / self.processes)
+        self.global_bucket = TokenBucket(global_rate / self.processes,
+                                         max(1.0, global_burst / self.processes))
+        self.max_keys = max_keys
+        self._buckets = OrderedDict()  # key -> TokenBucket, least recently used first
+        self._lock = threading.Lock()
+        self.admitted = 0
+        self.rejected = 0
+
+    def acquire(self, key):
+        """Take a token for key; returns 0 if admitted, else seconds to wait"""
+        now = time.monotonic()
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                bucket = TokenBucket(self.per_key_rate, self.per_key_burst, now)
+                self._buckets[key] = bucket
+                if len(self._buckets) > self.max_keys:
+                    self._buckets.popitem(last=False)
+            else:
+                self._buckets.move_to_end(key)
+
+            # Take from both buckets or neither
+            wait = max(bucket.wait_time(now), self.global_bucket.wait_time(now))
+            if wait > 0:
+                self.rejected += 1
+                return wait
+            bucket.take()
+            self.global_bucket.take()
+            self.admitted += 1
+            return 0.0
+
+    def stats(self):
+        return {'admitted': self.admitted, 'rejected': self.rejected,
+                'tracked_keys': len(self._buckets), 'processes': self.processes}
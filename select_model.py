@@ -0,0 +1,176 @@
+#!/usr/bin/env python
+"""
+Offline Model Selection
+Runs k-fold cross-validation over candidate estimators and hyperparameter
+grids in a process pool, refits the best regressor and classifier on the
+training split and registers them in the local model registry.
+
+Usage:
+    python select_model.py [--folds 5] [--workers N] [--no-activate]
+"""
+
+import argparse
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+from sklearn.base import clone
+from sklearn.ensemble import (GradientBoostingRegressor, RandomForestClassifier,
+                              RandomForestRegressor)
+from sklearn.linear_model import Lasso, LinearRegression, LogisticRegression, Ridge
+from sklearn.model_selection import KFold, StratifiedKFold, cross_validate
+from sklearn.pipeline import Pipeline
+
+from dataset import load_dataset
+from model_registry import ModelRegistry
+from training import PASS_THRESHOLD, build_preprocess, dataset_fingerprint, split_columns, train_models
+
+RANDOM_STATE = 42
+
+REGRESSION_SCORING = {
+    'r2': 'r2',
+    'rmse': 'neg_root_mean_squared_error',
+    'mae': 'neg_mean_absolute_error',
+}
+CLASSIFICATION_SCORING = {
+    'accuracy': 'accuracy',
+    'f1': 'f1',
+}
+
+
+def regression_candidates():
+    """(name, estimator) pairs tried for the G3 regressor"""
+    candidates = [('LinearRegression', LinearRegression())]
+    candidates += [(f'Ridge(alpha={a})', Ridge(alpha=a)) for a in (0.1, 1.0, 10.0, 100.0)]
+    candidates += [(f'Lasso(alpha={a})', Lasso(alpha=a, max_iter=10000)) for a in (0.01, 0.1, 1.0)]
+    candidates += [
+        (f'RandomForestRegressor(n_estimators={n}, max_depth={d})',
+         RandomForestRegressor(n_estimators=n, max_depth=d, random_state=RANDOM_STATE))
+        for n in (200,) for d in (None, 8)
+    ]
+    candidates += [
+        (f'GradientBoostingRegressor(learning_rate={lr})',
+         GradientBoostingRegressor(learning_rate=lr, random_state=RANDOM_STATE))
+        for lr in (0.05, 0.1)
+    ]
+    return candidates
+
+
+def classification_candidates():
+    """(name, estimator) pairs tried for the pass/fail classifier"""
+    candidates = [
+        (f'LogisticRegression(C={c})', LogisticRegression(C=c, max_iter=1000))
+        for c in (0.01, 0.1, 1.0, 10.0)
+    ]
+    candidates += [
+        (f'RandomForestClassifier(n_estimators={n}, max_depth={d})',
+         RandomForestClassifier(n_estimators=n, max_depth=d, random_state=RANDOM_STATE))
+        for n in (200,) for d in (None, 8)
+    ]
+    return candidates
+
+
+def evaluate_candidate(task, name, estimator, X, y, categorical_cols, numeric_cols, folds):
+    """Cross-validate one candidate; runs inside a worker process"""
+    pipeline = Pipeline(steps=[
+        ('preprocess', build_preprocess(categorical_cols, numeric_cols)),
+        ('estimator', estimator),
+    ])
+    if task == 'regression':
+        cv = KFold(n_splits=folds, shuffle=True, random_state=RANDOM_STATE)
+        scoring = REGRESSION_SCORING
+    else:
+        cv = StratifiedKFold(n_splits=folds, shuffle=True, random_state=RANDOM_STATE)
+        scoring = CLASSIFICATION_SCORING
+
+    started = time.perf_counter()
+    scores = cross_validate(pipeline, X, y, cv=cv, scoring=scoring, n_jobs=1)
+    metrics = {}
+    for metric in scoring:
+        values = scores[f'test_{metric}']
+        # sklearn negates error metrics so that higher is better; report them as errors
+        if metric in ('rmse', 'mae'):
+            values = -values
+        metrics[metric] = round(float(np.mean(values)), 4)
+        metrics[f'{metric}_std'] = round(float(np.std(values)), 4)
+
+    return {
+        'task': task,
+        'name': name,
+        'metrics': metrics,
+        'fit_time': round(float(np.mean(scores['fit_time'])), 4),
+        'wall_time': round(time.perf_counter() - started, 4),
+    }
+
+
+def run_selection(data, folds=5, workers=None):
+    """Cross-validate every candidate in a process pool; returns the results per task"""
+    features, target, categorical_cols, numeric_cols = split_columns(data)
+    passed = (target >= PASS_THRESHOLD).astype(int)
+
+    jobs = [('regression', name, est, target) for name, est in regression_candidates()]
+    jobs += [('classification', name, est, passed) for name, est in classification_candidates()]
+
+    estimators = {(task, name): est for task, name, est, _ in jobs}
+    with ProcessPoolExecutor(max_workers=workers or os.cpu_count()) as pool:
+        futures = [
+            pool.submit(evaluate_candidate, task, name, est, features, y,
+                        categorical_cols, numeric_cols, folds)
+            for task, name, est, y in jobs
+        ]
+        results = [f.result() for f in futures]
+
+    regression = sorted((r for r in results if r['task'] == 'regression'),
+                        key=lambda r: r['metrics']['rmse'])
+    classification = sorted((r for r in results if r['task'] == 'classification'),
+                            key=lambda r: -r['metrics']['f1'])
+    return regression, classification, estimators
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Cross-validated model selection')
+    parser.add_argument('--folds', type=int, default=5, help='number of CV folds')
+    parser.add_argument('--workers', type=int, default=None, help='worker processes (default: all cores)')
+    parser.add_argument('--registry', default='models', help='registry folder')
+    parser.add_argument('--no-activate', action='store_true',
+                        help='register the winner without making it the active model')
+    args = parser.parse_args()
+
+    data = load_dataset()
+    print(f"Cross-validating candidates ({args.folds} folds, {args.workers or os.cpu_count()} workers)...")
+    started = time.perf_counter()
+    regression, classification, estimators = run_selection(data, args.folds, args.workers)
+    print(f"Cross-validation finished in {time.perf_counter() - started:.1f}s")
+
+    for results, metric in ((regression, 'rmse'), (classification, 'f1')):
+        for r in results:
+            print(f"  {r['name']:<55} {metric}={r['metrics'][metric]:.4f} fit={r['fit_time']:.3f}s")
+
+    best_regressor = regression[0]
+    best_classifier = classification[0]
+    print(f"Best regressor: {best_regressor['name']}")
+    print(f"Best classifier: {best_classifier['name']}")
+
+    # Refit the winners on the same 80/20 split the app reports hold-out metrics on
+    trained = train_models(
+        data,
+        regressor=clone(estimators[('regression', best_regressor['name'])]),
+        classifier=clone(estimators[('classification', best_classifier['name'])]),
+    )
+    report = {
+        'dataset_fingerprint': dataset_fingerprint(data),
+        'cv_folds': args.folds,
+        'regressor': best_regressor['name'],
+        'classifier': best_classifier['name'],
+        'holdout_metrics': {k: round(float(v), 4) for k, v in trained['metrics'].items()},
+        'candidates': regression + classification,
+    }
+
+    registry = ModelRegistry(args.registry)
+    version = registry.register(trained, report, activate=not args.no_activate)
+    print(f"Registered model {version}" + ("" if args.no_activate else " (active)"))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,218 @@
+#!/usr/bin/env python
+"""
+Production Pre-fork Server
+Imports the app once in a master process, loads the active model and warms
+the read-only caches, then forks worker processes that serve requests from
+one shared listening socket. Workers start with the fitted pipelines,
+dataset arrays and caches already in memory and share those pages with the
+master copy-on-write. Each worker handles its requests in threads, so a
+teacher's open live-update stream does not hold up anyone else's requests.
+
+Workers are recycled after --max-requests requests (plus jitter), and the
+master replaces any worker that exits. Signals to the master:
+    SIGHUP            graceful reload: reload the active model, warm the caches
+                      again and replace every worker once it finishes its request
+    SIGTERM / SIGINT  graceful shutdown
+
+Usage:
+    python serve.py [--host 127.0.0.1] [--port 8000] [--workers 4] [--max-requests 1000] [--access-log]
+"""
+
+import argparse
+import gc
+import os
+import random
+import signal
+import socket
+import threading
+import time
+
+# Seconds a worker waits in accept() before checking whether it should stop
+WORKER_POLL_INTERVAL = 1.0
+# Seconds workers get to finish their current request on shutdown
+GRACEFUL_TIMEOUT = 30
+
+
+def warm_up(app_module):
+    """Load the model and the read-only caches so forked workers inherit them"""
+    started = time.perf_counter()
+    bundle = app_module.model_manager.current()
+    db = app_module.db
+    db._get_rank_index()
+    db._get_subject_predictor()
+    version, params = app_module.forecast_store.active()
+    app_module.get_forecast_noise(version, params)
+
+    # Move everything loaded so far out of the garbage collector's reach, so
+    # collections in the workers do not write to (and copy) the shared pages
+    gc.collect()
+    gc.freeze()
+    print(f"[master] Warmed model {bundle.version} and caches in "
+          f"{(time.perf_counter() - started) * 1000:.0f} ms")
+
+
+def run_worker(app_module, fd, host, port, max_requests, access_log):
+    """Serve requests until recycled or told to stop; never returns"""
+    from werkzeug.serving import ThreadedWSGIServer, WSGIRequestHandler
+
+    stopping = []
+    signal.signal(signal.SIGTERM, lambda *_: stopping.append(True))
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    signal.signal(signal.SIGHUP, signal.SIG_IGN)
+
+    # Background threads do not survive fork, so they start here rather than
+    # in the master; only one worker at a time updates the online learner
+    app_module.start_background_tasks()
+
+    # Requests arrive on their own threads, so the count is taken under a lock
+    served = [0]
+    served_lock = threading.Lock()
+    flask_app = app_module.app
+
+    def counted_app(environ, start_response):
+        with served_lock:
+            served[0] += 1
+        return flask_app(environ, start_response)
+
+    class RequestHandler(WSGIRequestHandler):
+        def log_request(self, *args, **kwargs):
+            if access_log:
+                super().log_request(*args, **kwargs)
+
+    class WorkerServer(ThreadedWSGIServer):
+        # Keep track of request threads so server_close() waits for them
+        daemon_threads = False
+
+    server = WorkerServer(host, port, counted_app, handler=RequestHandler, fd=fd)
+    # handle_request returns after accepting one request or after this many seconds
+    server.timeout = WORKER_POLL_INTERVAL
+    while not stopping and served[0] < max_requests:
+        server.handle_request()
+
+    # Open live-update streams end at their next check; then wait for every
+    # in-flight request to finish
+    app_module.db.changes.close()
+    server.server_close()
+    os._exit(0)
+
+
+class Master:
+    def __init__(self, app_module, sock, workers, max_requests, host, port, access_log=False):
+        self.app_module = app_module
+        self.access_log = access_log
+        self.sock = sock
+        self.num_workers = workers
+        self.max_requests = max_requests
+        self.host = host
+        self.port = port
+        self.workers = {}  # pid -> generation
+        self.generation = 0
+        self.stopping = False
+        self.reload_requested = False
+
+    def spawn(self):
+        # Jitter keeps all workers from recycling at the same moment
+        limit = self.max_requests + random.randint(0, max(1, self.max_requests // 10))
+        pid = os.fork()
+        if pid == 0:
+            try:
+                run_worker(self.app_module, self.sock.fileno(), self.host, self.port, limit, self.access_log)
+            finally:
+                os._exit(1)
+        self.workers[pid] = self.generation
+        return pid
+
+    def reload(self):
+        """Start a new generation of workers and retire the old one"""
+        self.reload_requested = False
+        print("[master] Reloading...")
+        try:
+            self.app_module.model_manager.reload()
+            warm_up(self.app_module)
+        except Exception as e:
+            print(f"[master] Reload failed, keeping the current workers: {e}")
+            return
+        old = [pid for pid, generation in self.workers.items() if generation == self.generation]
+        self.generation += 1
+        for _ in range(self.num_workers):
+            self.spawn()
+        for pid in old:
+            self._signal(pid, signal.SIGTERM)
+
+    def _signal(self, pid, sig):
+        try:
+            os.kill(pid, sig)
+        except ProcessLookupError:
+            pass
+
+    def reap(self):
+        """Collect exited workers; returns how many current-generation workers exited"""
+        exited = 0
+        while True:
+            try:
+                pid, _ = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                break
+            if pid == 0:
+                break
+            if self.workers.pop(pid, None) == self.generation:
+                exited += 1
+        return exited
+
+    def run(self):
+        signal.signal(signal.SIGHUP, lambda *_: setattr(self, 'reload_requested', True))
+        signal.signal(signal.SIGTERM, lambda *_: setattr(self, 'stopping', True))
+        signal.signal(signal.SIGINT, lambda *_: setattr(self, 'stopping', True))
+
+        for _ in range(self.num_workers):
+            self.spawn()
+        print(f"[master] Serving on http://{self.host}:{self.port} with {self.num_workers} workers")
+
+        while not self.stopping:
+            if self.reload_requested:
+                self.reload()
+            # Replace recycled or crashed workers of the current generation
+            for _ in range(self.reap()):
+                self.spawn()
+            time.sleep(0.2)
+
+        print("[master] Shutting down...")
+        for pid in list(self.workers):
+            self._signal(pid, signal.SIGTERM)
+        deadline = time.monotonic() + GRACEFUL_TIMEOUT
+        while self.workers and time.monotonic() < deadline:
+            self.reap()
+            time.sleep(0.1)
+        for pid in list(self.workers):
+            self._signal(pid, signal.SIGKILL)
+        self.reap()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Pre-fork production server')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8000)
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help='worker processes')
+    parser.add_argument('--max-requests', type=int, default=1000,
+                        help='recycle a worker after this many requests')
+    parser.add_argument('--backlog', type=int, default=2048, help='listen queue size')
+    parser.add_argument('--access-log', action='store_true', help='log every request')
+    args = parser.parse_args()
+
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((args.host, args.port))
+    sock.listen(args.backlog)
+    sock.set_inheritable(True)
+
+    # The master only imports and warms up; workers start the background threads
+    os.environ['APP_DEFER_BACKGROUND_TASKS'] = '1'
+    # Rate limiter buckets are per worker; each admits its share of the limits
+    os.environ['APP_WORKERS'] = str(args.workers)
+    import app as app_module
+    warm_up(app_module)
+    Master(app_module, sock, args.workers, args.max_requests, args.host, args.port, args.access_log).run()
+
+
+if __name__ == '__main__':
+    main()
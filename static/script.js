@@ -844,8 +844,13 @@ function predictGrade() {
             return;
         }
 
+        // Average the per-subject attendance and midterm marks for the estimate
+        const attValues = Object.values(attValidation.attendance || {}).flatMap(sem => Object.values(sem));
+        const midValues = Object.values((midValidation.midterm || {}).marks || {});
+        const mean = values => values.length ? Math.round(values.reduce((a, b) => a + b, 0) / values.length * 10) / 10 : 0;
+
         // Calculate expected performance for first semester based on attendance and midterm
-        handleFirstSemesterPrediction(attValidation.attendance, midValidation.midterm);
+        handleFirstSemesterPrediction(mean(attValues), mean(midValues));
         return;
     }
 
@@ -901,6 +906,7 @@ function predictGrade() {
     const department = sessionInfo ? sessionInfo.dataset.dept || '' : '';
 
     const payload = { semesters: semesters, student_name: studentName, department: department };
+    lastSgpaHistory = semesters.map(s => s.sgpa);
     if (gradeValidation.grades) payload.subject_grades = gradeValidation.grades;
     if (attValidation.attendance) payload.attendance = attValidation.attendance;
     if (midValidation.midterm) payload.midterm = midValidation.midterm;
@@ -1057,108 +1063,33 @@ function displayResults(data) {
 // ========================================
 
 function generateSubjectPredictions(data) {
-    // Collect all subject grades from entered data
-    const subjectGrades = {};
-    const gradeValues = {
-        'A': 4.0, 'A-': 3.7, 'B+': 3.3, 'B': 3.0, 'B-': 2.7,
-        'C+': 2.3, 'C': 2.0, 'C-': 1.7, 'D+': 1.3, 'D': 1.0, 'F': 0.0
-    };
-
-    // Extract grades from all semesters
-    document.querySelectorAll('.grade-select').forEach(select => {
-        if (select.value && select.value !== '') {
-            const semester = parseInt(select.dataset.semester) || 1;
-            const subjectName = select.dataset.subject || 'Unknown Subject';
-            const grade = select.value;
-            const gradeValue = gradeValues[grade] || 0;
-
-            if (!subjectGrades[subjectName]) {
-                subjectGrades[subjectName] = {
-                    name: subjectName,
-                    grades: [],
-                    average: 0,
-                    trend: 'stable',
-                    credits: parseFloat(select.dataset.credits) || 3
-                };
-            }
-
-            subjectGrades[subjectName].grades.push({
-                semester: semester,
-                grade: grade,
-                value: gradeValue
-            });
-        }
-    });
-
-    // Calculate statistics for each subject
-    const subjectAnalysis = [];
-    for (const subjectName in subjectGrades) {
-        const subject = subjectGrades[subjectName];
-        const grades = subject.grades.sort((a, b) => a.semester - b.semester);
-        const values = grades.map(g => g.value);
-
-        // Calculate average
-        subject.average = values.reduce((a, b) => a + b, 0) / values.length;
-
-        // Determine trend
-        if (values.length > 1) {
-            const firstHalf = values.slice(0, Math.ceil(values.length / 2));
-            const secondHalf = values.slice(Math.ceil(values.length / 2));
-            const firstAvg = firstHalf.reduce((a, b) => a + b, 0) / firstHalf.length;
-            const secondAvg = secondHalf.reduce((a, b) => a + b, 0) / secondHalf.length;
-
-            if (secondAvg > firstAvg + 0.3) {
-                subject.trend = 'improving';
-            } else if (secondAvg < firstAvg - 0.3) {
-                subject.trend = 'declining';
-            } else {
-                subject.trend = 'stable';
-            }
-        }
-
-        // Predict next grade based on trend and average
-        let predictedGrade = subject.average;
-        if (subject.trend === 'improving') {
-            predictedGrade = Math.min(4.0, subject.average + 0.2);
-        } else if (subject.trend === 'declining') {
-            predictedGrade = Math.max(0, subject.average - 0.2);
-        }
-
-        // Calculate variance (consistency)
-        const variance = values.length > 1
-            ? values.reduce((sum, val) => sum + Math.pow(val - subject.average, 2), 0) / values.length
-            : 0;
-        const consistency = Math.max(0, 100 - (variance * 50));
-
-        // Risk assessment
-        let risk = 'low';
-        let riskLabel = 'Low Risk';
-        if (subject.average < 2.0) {
-            risk = 'critical';
-            riskLabel = 'Critical';
-        } else if (subject.average < 2.5) {
-            risk = 'high';
-            riskLabel = 'High Risk';
-        } else if (subject.average < 3.0) {
-            risk = 'moderate';
-            riskLabel = 'Moderate';
-        }
-
-        subjectAnalysis.push({
-            name: subjectName,
-            average: subject.average,
-            trend: subject.trend,
-            predictedGrade: predictedGrade,
-            risk: risk,
-            riskLabel: riskLabel,
-            consistency: consistency,
-            lastGrade: grades[grades.length - 1]?.grade || 'N/A',
-            gradesCount: grades.length
+    // Outlooks are computed server-side against the whole cohort's grades
+    fetch('/api/subject-predictions')
+        .then(response => response.json())
+        .then(result => {
+            const subjectAnalysis = result.success ? result.subjects.map(subject => ({
+                name: subject.name,
+                average: subject.average,
+                trend: subject.trend,
+                predictedGrade: subject.predicted_grade,
+                risk: subject.risk,
+                riskLabel: subject.risk_label,
+                consistency: subject.consistency,
+                lastGrade: subject.last_grade,
+                gradesCount: subject.grades_count,
+                cohortAverage: subject.cohort_average,
+                difficulty: subject.difficulty
+            })) : [];
+            renderSubjectPredictions(subjectAnalysis);
+        })
+        .catch(error => {
+            console.error('Error loading subject predictions:', error);
+            renderSubjectPredictions([]);
         });
-    }
+}
 
-    // Sort by average (ascending for weak subjects first)
-    subjectAnalysis.sort((a, b) => a.average - b.average);
+function renderSubjectPredictions(subjectAnalysis) {
+    // Subjects arrive sorted by average (weak subjects first)
 
     if (subjectAnalysis.length === 0) {
         // No subject data available
@@ -1216,6 +1147,10 @@ function displaySubjectOverview(subjects) {
                         <span class="subject-stat-label">Predicted Next</span>
                         <span class="subject-stat-value predicted">${subject.predictedGrade.toFixed(2)}</span>
                     </div>
+                    <div class="subject-stat">
+                        <span class="subject-stat-label">Cohort Average</span>
+                        <span class="subject-stat-value">${subject.cohortAverage !== undefined ? subject.cohortAverage.toFixed(2) : 'N/A'}</span>
+                    </div>
                     <div class="subject-stat">
                         <span class="subject-stat-label">Trend</span>
                         <span class="subject-stat-value" style="color: ${trendColor}">
@@ -1421,28 +1356,29 @@ function renderSubjectComparisonChart(subjects) {
 
 // Handle first semester prediction based on attendance and midterm
 function handleFirstSemesterPrediction(attendance, midterm) {
-    // Calculate estimated SGPA based on attendance and midterm
-    // Midterm is more heavily weighted (70%) than attendance (30%)
-    const midtermContribution = (midterm / 50) * 4.0 * 0.7; // Midterm out of 50, weighted 70%
-    const attendanceContribution = (attendance / 100) * 4.0 * 0.3; // Attendance percentage, weighted 30%
-
-    const estimatedSGPA = Math.min(4.0, Math.max(0, midtermContribution + attendanceContribution));
-
-    // Determine pass/fail probability
-    const passThreshold = 2.0;
-    let passProbability = 0;
+    // The estimate (70% midterm, 30% attendance) is computed and saved by the server
+    fetch('/api/predict/first-semester', {
+        method: 'POST',
+        headers: { 'Content-Type': 'application/json' },
+        body: JSON.stringify({ attendance: attendance, midterm: midterm })
+    })
+        .then(response => response.json())
+        .then(data => {
+            if (data.error) {
+                showError(data.error);
+            } else {
+                displayFirstSemesterResults(data, attendance, midterm);
+            }
+        })
+        .catch(error => {
+            console.error('Error:', error);
+            showError('First semester estimation failed. Please try again.');
+        });
+}
 
-    if (estimatedSGPA >= 3.5) {
-        passProbability = 95;
-    } else if (estimatedSGPA >= 3.0) {
-        passProbability = 85;
-    } else if (estimatedSGPA >= 2.5) {
-        passProbability = 70;
-    } else if (estimatedSGPA >= 2.0) {
-        passProbability = 55;
-    } else {
-        passProbability = 30;
-    }
+function displayFirstSemesterResults(data, attendance, midterm) {
+    const estimatedSGPA = Number(data.estimated_sgpa);
+    const passProbability = data.pass_probability;
 
     // Show results section
     document.getElementById('results-section').style.display = 'block';
@@ -1463,20 +1399,14 @@ function handleFirstSemesterPrediction(attendance, midterm) {
         performanceGraphContainer.style.display = 'none';
     }
 
-    // Predictions - show estimated for remaining semesters
+    // Predictions - forecast for the remaining semesters
     const predictionsGrid = document.getElementById('predictions-grid');
-    const remainingSemesters = [2, 3, 4, 5, 6, 7, 8];
-    const predictionsHTML = remainingSemesters.map(sem => {
-        // Slight variation in predictions based on current estimate
-        const variation = (Math.random() - 0.5) * 0.2;
-        const predicted = Math.min(4.0, Math.max(0, estimatedSGPA + variation));
-        return `
+    const predictionsHTML = data.predictions.map(p => `
             <div class="prediction-item">
-                <span class="prediction-label">Semester ${sem}</span>
-                <span class="prediction-value">${predicted.toFixed(2)}</span>
+                <span class="prediction-label">Semester ${p.semester}</span>
+                <span class="prediction-value">${Number(p.predicted_sgpa).toFixed(2)}</span>
             </div>
-        `;
-    }).join('');
+        `).join('');
     predictionsGrid.innerHTML = predictionsHTML;
 
     // Risk assessment
@@ -1556,7 +1486,7 @@ function handleFirstSemesterPrediction(attendance, midterm) {
     document.getElementById('whatif-midterm-value').textContent = midterm + '/50';
 
     // Store for what-if analysis
-    currentPredictionData = { currentAvg: estimatedSGPA };
+    currentPredictionData = { currentAvg: estimatedSGPA, history: [estimatedSGPA] };
 }
 
 // Generate recommendations specifically for first semester students
@@ -1960,6 +1890,8 @@ function downloadReport() {
 // ========================================
 
 let currentPredictionData = null;
+// SGPAs sent with the last prediction request (the what-if history)
+let lastSgpaHistory = null;
 
 function initializeWhatIfAnalysis() {
     const attendanceSlider = document.getElementById('whatif-attendance');
@@ -1970,12 +1902,14 @@ function initializeWhatIfAnalysis() {
     if (attendanceSlider) {
         attendanceSlider.addEventListener('input', function () {
             document.getElementById('whatif-attendance-value').textContent = this.value + '%';
+            if (whatIfSurface) displayWhatIf(whatIfSurface);
         });
     }
 
     if (midtermSlider) {
         midtermSlider.addEventListener('input', function () {
             document.getElementById('whatif-midterm-value').textContent = this.value + '/50';
+            if (whatIfSurface) displayWhatIf(whatIfSurface);
         });
     }
 
@@ -1988,6 +1922,7 @@ function initializeWhatIfAnalysis() {
                 '1.0': '+1.0 GPA'
             };
             document.getElementById('whatif-grade-value').textContent = labels[this.value];
+            if (whatIfSurface) displayWhatIf(whatIfSurface);
         });
     }
 
@@ -1996,29 +1931,71 @@ function initializeWhatIfAnalysis() {
     }
 }
 
+// Response surface from /api/what-if for the current SGPA history
+let whatIfSurface = null;
+let whatIfSurfaceKey = null;
+
+function nearestIndex(values, target) {
+    let best = 0;
+    values.forEach((v, i) => {
+        if (Math.abs(v - target) < Math.abs(values[best] - target)) best = i;
+    });
+    return best;
+}
+
+function loadWhatIfSurface(history) {
+    const key = JSON.stringify(history);
+    if (whatIfSurface && whatIfSurfaceKey === key) {
+        return Promise.resolve(whatIfSurface);
+    }
+    return fetch('/api/what-if', {
+        method: 'POST',
+        headers: { 'Content-Type': 'application/json' },
+        body: JSON.stringify({ history: history })
+    })
+        .then(response => response.json())
+        .then(data => {
+            if (data.error) throw new Error(data.error);
+            whatIfSurface = data;
+            whatIfSurfaceKey = key;
+            return data;
+        });
+}
+
 function calculateWhatIf() {
     if (!currentPredictionData) {
         showError('Please generate a prediction first before using What-If Analysis');
         return;
     }
 
+    const history = currentPredictionData.history || [currentPredictionData.currentAvg || 3.0];
+    const calculateBtn = document.getElementById('whatif-calculate');
+    if (calculateBtn) calculateBtn.disabled = true;
+
+    // The whole scenario grid comes back in one request; slider changes only re-read it
+    loadWhatIfSurface(history)
+        .then(surface => displayWhatIf(surface))
+        .catch(error => {
+            console.error('What-if error:', error);
+            showError('What-If Analysis failed. Please try again.');
+        })
+        .finally(() => {
+            if (calculateBtn) calculateBtn.disabled = false;
+        });
+}
+
+function displayWhatIf(surface) {
     const attendance = parseFloat(document.getElementById('whatif-attendance').value);
     const midterm = parseFloat(document.getElementById('whatif-midterm').value);
     const gradeImprovement = parseFloat(document.getElementById('whatif-grade').value);
 
-    // Calculate hypothetical CGPA
-    const currentCGPA = currentPredictionData.currentAvg || 3.0;
-    const attendanceImpact = (attendance - 75) / 100 * 0.5; // Max 0.5 impact
-    const midtermImpact = (midterm - 25) / 50 * 0.3; // Max 0.3 impact
-
-    const hypotheticalCGPA = Math.min(4.0, Math.max(0,
-        currentCGPA + gradeImprovement + attendanceImpact + midtermImpact
-    ));
+    const i = nearestIndex(surface.improvement, gradeImprovement);
+    const a = nearestIndex(surface.attendance, attendance);
+    const m = nearestIndex(surface.midterm, midterm);
 
-    const cgpaChange = hypotheticalCGPA - currentCGPA;
-    const passProb = Math.min(100, Math.max(0,
-        50 + (hypotheticalCGPA - 2.0) * 25 + attendance * 0.3
-    ));
+    const hypotheticalCGPA = surface.cgpa[i][a][m];
+    const passProb = surface.pass_probability[i][a][m];
+    const cgpaChange = hypotheticalCGPA - surface.baseline.cgpa;
 
     // Generate insight
     let insight = '';
@@ -2046,10 +2023,40 @@ function calculateWhatIf() {
 
     document.getElementById('whatif-insight').textContent = insight;
 
+    renderWhatIfHeatmap(surface, i, a, m);
+
     // Show results
     document.getElementById('whatif-results').style.display = 'grid';
 }
 
+// Projected CGPA over attendance (rows) x midterm (columns) for the selected improvement
+function renderWhatIfHeatmap(surface, i, selectedA, selectedM) {
+    const heatmap = document.getElementById('whatif-heatmap');
+    if (!heatmap) return;
+
+    const header = surface.midterm.map(m => `<th>${m}</th>`).join('');
+    const rows = surface.attendance.map((att, a) => {
+        const cells = surface.midterm.map((mid, m) => {
+            const cgpa = surface.cgpa[i][a][m];
+            const hue = Math.round(Math.max(0, Math.min(4, cgpa)) / 4 * 120);  // red -> green
+            const selected = a === selectedA && m === selectedM ? ' class="selected"' : '';
+            return `<td${selected} style="background: hsl(${hue}, 70%, 35%)" ` +
+                `title="Attendance ${att}%, midterm ${mid}/50: CGPA ${cgpa.toFixed(2)}, ` +
+                `pass ${surface.pass_probability[i][a][m].toFixed(0)}%">${cgpa.toFixed(1)}</td>`;
+        }).join('');
+        return `<tr><th>${att}%</th>${cells}</tr>`;
+    }).reverse().join('');
+
+    heatmap.innerHTML = `
+        <div class="whatif-heatmap-title">Projected CGPA by attendance (rows) and midterm marks (columns)</div>
+        <table class="whatif-heatmap-table">
+            <tbody>${rows}</tbody>
+            <tfoot><tr><th></th>${header}</tr></tfoot>
+        </table>
+    `;
+    heatmap.style.display = 'block';
+}
+
 // ========================================
 // AI RECOMMENDATIONS
 // ========================================
@@ -2219,7 +2226,8 @@ if (typeof originalPredictGrade === 'function') {
             const currentAvgElement = document.getElementById('current-avg');
             if (currentAvgElement && currentAvgElement.textContent !== '--') {
                 currentPredictionData = {
-                    currentAvg: parseFloat(currentAvgElement.textContent)
+                    currentAvg: parseFloat(currentAvgElement.textContent),
+                    history: lastSgpaHistory
                 };
 
                 // Show What-If and Recommendations sections
@@ -2,15 +2,19 @@
 
 let studentPerformanceChart = null;
 
-// Debugging: Log when script loads
-console.log('Teacher.js loaded successfully');
-console.log('allStudentsData available:', typeof allStudentsData !== 'undefined');
+// Student summaries loaded so far, per category. Full details (history,
+// semester grades) are only fetched when a student's modal is opened.
+const allStudentsData = { best: [], average: [], worst: [] };
+const nextCursors = { best: null, average: null, worst: null };
+const STUDENTS_PAGE_SIZE = 24;
+const STUDENT_CATEGORIES = ['best', 'average', 'worst'];
+
+let searchDebounceTimer = null;
+// Student whose details modal is open (refreshed when their data changes)
+let openStudentId = null;
 
 // Search and Filter Functionality
 document.addEventListener('DOMContentLoaded', function () {
-    console.log('DOMContentLoaded fired');
-    console.log('All students data:', allStudentsData);
-
     const searchInput = document.getElementById('student-search');
     const deptFilter = document.getElementById('filter-department');
     const semesterFilter = document.getElementById('filter-semester');
@@ -18,7 +22,10 @@ document.addEventListener('DOMContentLoaded', function () {
     const resetButton = document.getElementById('reset-filters');
 
     if (searchInput) {
-        searchInput.addEventListener('input', applyFilters);
+        searchInput.addEventListener('input', function () {
+            clearTimeout(searchDebounceTimer);
+            searchDebounceTimer = setTimeout(applyFilters, 300);
+        });
     }
     if (deptFilter) {
         deptFilter.addEventListener('change', applyFilters);
@@ -33,20 +40,21 @@ document.addEventListener('DOMContentLoaded', function () {
         resetButton.addEventListener('click', resetFilters);
     }
 
-    // Add event delegation for view details buttons
-    console.log('Setting up event delegation for view details buttons');
-    document.addEventListener('click', function (e) {
-        console.log('Document clicked, target:', e.target);
+    document.querySelectorAll('.btn-load-more').forEach(button => {
+        button.addEventListener('click', function () {
+            loadStudents(button.dataset.category, true);
+        });
+    });
 
+    // Event delegation for view details buttons
+    document.addEventListener('click', function (e) {
         // Find the button element (in case user clicked on text/emoji inside button)
         const button = e.target.closest('.btn-view-details');
 
         if (button) {
-            console.log('View Details button found!');
             e.preventDefault();
             e.stopPropagation();
             const studentId = button.getAttribute('data-student-id');
-            console.log('Button clicked! Student ID:', studentId);
             if (studentId) {
                 openStudentModal(studentId);
             } else {
@@ -55,62 +63,191 @@ document.addEventListener('DOMContentLoaded', function () {
         }
     });
 
-    // Debugging: Check if buttons exist
-    const buttons = document.querySelectorAll('.btn-view-details');
-    console.log('Found', buttons.length, 'View Details buttons');
-    buttons.forEach((btn, index) => {
-        console.log(`Button ${index}:`, btn, 'Student ID:', btn.getAttribute('data-student-id'));
-    });
+    applyFilters();
+    startLiveUpdates();
 });
 
-function applyFilters() {
-    const searchTerm = document.getElementById('student-search').value.toLowerCase();
+// Live updates: the server pushes the new summary of each student whose
+// predictions or grades changed, and the loaded lists are patched in place
+function startLiveUpdates() {
+    if (!window.EventSource) return;
+
+    const source = new EventSource('/api/teacher/stream');
+    source.addEventListener('students', function (event) {
+        JSON.parse(event.data).students.forEach(patchStudent);
+    });
+    // Changes were missed (e.g. after a long disconnect): reload the lists
+    source.addEventListener('resync', applyFilters);
+}
+
+function matchesFilters(student) {
+    const searchTerm = document.getElementById('student-search').value.trim().toLowerCase();
     const deptFilter = document.getElementById('filter-department').value;
     const semesterFilter = document.getElementById('filter-semester').value;
     const cgpaFilter = document.getElementById('filter-cgpa').value;
 
-    const allStudentCards = document.querySelectorAll('.student-card');
-    let visibleCount = 0;
-
-    allStudentCards.forEach(card => {
-        const name = card.dataset.studentName.toLowerCase();
-        const dept = card.dataset.studentDepartment;
-        const semester = card.dataset.studentSemester;
-        const cgpa = parseFloat(card.dataset.studentCgpa);
+    if (searchTerm && !String(student.name).toLowerCase().includes(searchTerm)) return false;
+    if (deptFilter && student.department !== deptFilter) return false;
+    if (semesterFilter && student.semester !== Number(semesterFilter)) return false;
+    if (cgpaFilter) {
+        const [min, max] = cgpaFilter.split('-').map(Number);
+        if (student.cgpa < min || student.cgpa > max) return false;
+    }
+    return true;
+}
 
-        let matchesSearch = name.includes(searchTerm);
-        let matchesDept = !deptFilter || dept === deptFilter;
-        let matchesSemester = !semesterFilter || semester === semesterFilter;
-        let matchesCgpa = true;
+// Same order as the server's pages: CGPA descending, then ID descending
+function ranksBefore(a, b) {
+    if (a.cgpa !== b.cgpa) return a.cgpa > b.cgpa;
+    return String(a.id) > String(b.id);
+}
 
-        if (cgpaFilter) {
-            const [min, max] = cgpaFilter.split('-').map(Number);
-            matchesCgpa = cgpa >= min && cgpa <= max;
+function patchStudent(student) {
+    // Take the student out of whichever list they were in
+    STUDENT_CATEGORIES.forEach(category => {
+        const students = allStudentsData[category];
+        const index = students.findIndex(s => s.id === student.id);
+        if (index === -1) return;
+
+        students.splice(index, 1);
+        const grid = document.getElementById(`${category}-students-grid`);
+        const card = Array.from(grid.querySelectorAll('.student-card'))
+            .find(c => c.dataset.studentId === String(student.id));
+        if (card) card.remove();
+        if (students.length === 0) {
+            grid.innerHTML = '<p class="no-results">No students match the current filters</p>';
         }
+    });
 
-        if (matchesSearch && matchesDept && matchesSemester && matchesCgpa) {
-            card.style.display = 'block';
-            visibleCount++;
-        } else {
-            card.style.display = 'none';
-        }
+    if (openStudentId === student.id) {
+        openStudentModal(student.id);
+    }
+    if (!matchesFilters(student)) return;
+
+    // Insert at their rank, unless that is on a page that has not been loaded yet
+    const category = student.category;
+    const students = allStudentsData[category];
+    let index = students.findIndex(s => ranksBefore(student, s));
+    if (index === -1) {
+        if (nextCursors[category]) return;
+        index = students.length;
+    }
+
+    const grid = document.getElementById(`${category}-students-grid`);
+    if (students.length === 0) {
+        grid.innerHTML = '';
+    }
+    students.splice(index, 0, student);
+    const cards = grid.querySelectorAll('.student-card');
+    grid.insertBefore(createStudentCard(student, category), cards[index] || null);
+}
+
+function buildStudentsQuery(category, cursor) {
+    const params = new URLSearchParams({
+        category: category,
+        limit: STUDENTS_PAGE_SIZE,
+        sort: 'cgpa',
+        order: 'desc'
     });
 
-    // Show/hide category sections if empty
-    updateCategorySections();
+    const searchTerm = document.getElementById('student-search').value.trim();
+    const deptFilter = document.getElementById('filter-department').value;
+    const semesterFilter = document.getElementById('filter-semester').value;
+    const cgpaFilter = document.getElementById('filter-cgpa').value;
+
+    if (searchTerm) params.set('search', searchTerm);
+    if (deptFilter) params.set('department', deptFilter);
+    if (semesterFilter) params.set('semester', semesterFilter);
+    if (cgpaFilter) {
+        const [min, max] = cgpaFilter.split('-');
+        params.set('min_cgpa', min);
+        params.set('max_cgpa', max);
+    }
+    if (cursor) params.set('cursor', cursor);
+
+    return `/api/teacher/students?${params.toString()}`;
 }
 
-function updateCategorySections() {
-    const sections = document.querySelectorAll('.student-category-section');
+function loadStudents(category, append = false) {
+    const grid = document.getElementById(`${category}-students-grid`);
+    const loadMoreButton = document.querySelector(`.btn-load-more[data-category="${category}"]`);
+    const cursor = append ? nextCursors[category] : null;
 
-    sections.forEach(section => {
-        const visibleCards = section.querySelectorAll('.student-card[style="display: block;"], .student-card:not([style*="display: none"])');
-        const grid = section.querySelector('.students-grid');
+    return fetch(buildStudentsQuery(category, cursor))
+        .then(response => response.json())
+        .then(data => {
+            if (!data.success) {
+                throw new Error(data.error || 'Failed to load students');
+            }
 
-        if (visibleCards.length === 0) {
-            grid.innerHTML = '<p class="no-results">No students match the current filters</p>';
-        }
-    });
+            if (!append) {
+                allStudentsData[category] = [];
+                grid.innerHTML = '';
+            }
+
+            data.students.forEach(student => {
+                allStudentsData[category].push(student);
+                grid.appendChild(createStudentCard(student, category));
+            });
+            nextCursors[category] = data.next_cursor;
+
+            if (allStudentsData[category].length === 0) {
+                grid.innerHTML = '<p class="no-results">No students match the current filters</p>';
+            }
+            if (loadMoreButton) {
+                loadMoreButton.style.display = data.next_cursor ? 'block' : 'none';
+            }
+        })
+        .catch(error => {
+            console.error(`Error loading ${category} students:`, error);
+            grid.innerHTML = '<p class="no-results">Failed to load students</p>';
+        });
+}
+
+function createStudentCard(student, category) {
+    const card = document.createElement('div');
+    card.className = `student-card ${category}`;
+    card.dataset.studentId = student.id;
+    card.dataset.studentName = student.name;
+    card.dataset.studentCgpa = student.cgpa;
+    card.dataset.studentSemester = student.semester;
+    card.dataset.studentDepartment = student.department;
+    card.dataset.studentAttendance = student.attendance;
+
+    card.innerHTML = `
+        <div class="student-header">
+            <div class="student-avatar ${category}"></div>
+            <div class="student-info">
+                <h4 class="student-name"></h4>
+                <p class="student-dept"></p>
+            </div>
+        </div>
+        <div class="student-stats">
+            <div class="stat-item">
+                <span class="stat-label">CGPA</span>
+                <span class="stat-value cgpa-${category}"></span>
+            </div>
+            <div class="stat-item">
+                <span class="stat-label">Semester</span>
+                <span class="stat-value stat-semester"></span>
+            </div>
+        </div>
+        <button class="btn-view-details">👁️ View Details</button>
+    `;
+
+    // Names and departments are user input, so set them as text
+    card.querySelector('.student-avatar').textContent = String(student.name).charAt(0);
+    card.querySelector('.student-name').textContent = student.name;
+    card.querySelector('.student-dept').textContent = student.department;
+    card.querySelector(`.cgpa-${category}`).textContent = Number(student.cgpa).toFixed(2);
+    card.querySelector('.stat-semester').textContent = student.semester;
+    card.querySelector('.btn-view-details').setAttribute('data-student-id', student.id);
+
+    return card;
+}
+
+function applyFilters() {
+    STUDENT_CATEGORIES.forEach(category => loadStudents(category));
 }
 
 function resetFilters() {
@@ -119,45 +256,30 @@ function resetFilters() {
     document.getElementById('filter-semester').value = '';
     document.getElementById('filter-cgpa').value = '';
 
-    const allStudentCards = document.querySelectorAll('.student-card');
-    allStudentCards.forEach(card => {
-        card.style.display = 'block';
-    });
-
-    // Remove any "no results" messages
-    const noResultsMessages = document.querySelectorAll('.no-results');
-    noResultsMessages.forEach(msg => msg.remove());
-}
-
-// Test function to manually open modal (can be called from console)
-function testModal(studentId) {
-    console.log('Testing modal with student ID:', studentId);
-    openStudentModal(studentId);
+    applyFilters();
 }
 
 // Student Modal Functions
 function openStudentModal(studentId) {
-    console.log('Opening modal for student:', studentId);
-    const modal = document.getElementById('student-modal');
-
-    // Find student data from all categories
-    let studentData = null;
-
-    for (const category in allStudentsData) {
-        const found = allStudentsData[category].find(s => String(s.id) === String(studentId));
-        if (found) {
-            studentData = found;
-            break;
-        }
-    }
-
-    if (!studentData) {
-        console.error('Student not found:', studentId);
-        console.log('Available students:', allStudentsData);
-        return;
-    }
+    openStudentId = studentId;
+    fetch(`/api/teacher/students/${encodeURIComponent(studentId)}`)
+        .then(response => response.json())
+        .then(data => {
+            if (!data.success) {
+                console.error('Student not found:', studentId, data.error);
+                return;
+            }
+            // Closed (or another student opened) while loading
+            if (openStudentId !== studentId) return;
+            populateStudentModal(data.student);
+        })
+        .catch(error => {
+            console.error('Error loading student details:', error);
+        });
+}
 
-    console.log('Found student data:', studentData);
+function populateStudentModal(studentData) {
+    const modal = document.getElementById('student-modal');
 
     // Populate modal with student data
     document.getElementById('modal-student-name').textContent = studentData.name;
@@ -214,20 +336,43 @@ function openStudentModal(studentId) {
         allSemestersContainer.innerHTML = '<p class="no-data">No semester data available</p>';
     }
 
+    // Per-subject outlook against the cohort baselines
+    if (studentData.subject_predictions && studentData.subject_predictions.length > 0) {
+        const outlookCard = document.createElement('div');
+        outlookCard.className = 'semester-card';
+        outlookCard.innerHTML = `
+            <div class="semester-header" onclick="toggleSemester(this)">
+                <div class="semester-title">
+                    <span class="semester-number">🎯 Subject Outlook</span>
+                    <span class="semester-sgpa">Weakest first</span>
+                </div>
+                <span class="toggle-icon">▼</span>
+            </div>
+            <div class="semester-subjects" style="display: none;">
+                ${studentData.subject_predictions.map(subject => `
+                    <div class="subject-item">
+                        <span class="subject-name">${subject.name} (cohort ${subject.cohort_average.toFixed(2)})</span>
+                        <span class="subject-grade">${subject.predicted_grade.toFixed(2)} · ${subject.risk_label}</span>
+                    </div>
+                `).join('')}
+            </div>
+        `;
+        allSemestersContainer.appendChild(outlookCard);
+    }
+
     // Render performance chart
     renderStudentPerformanceChart(studentData);
 
     // Show modal
-    console.log('Displaying modal...');
     modal.style.display = 'flex';
     document.body.style.overflow = 'hidden';
-    console.log('Modal display set to:', modal.style.display);
 }
 
 function closeStudentModal() {
     const modal = document.getElementById('student-modal');
     modal.style.display = 'none';
     document.body.style.overflow = 'auto';
+    openStudentId = null;
 
     // Destroy chart if exists
     if (studentPerformanceChart) {
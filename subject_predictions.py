@@ -0,0 +1,139 @@
+"""
+Subject Predictions
+Per-subject outlooks for every student, built from student_grades.csv.
+Subject difficulty baselines (how far the cohort's grades in a subject sit
+from each student's own average) are computed once for the whole cohort,
+together with every student's per-subject statistics, and reused until the
+grades change. A student's forecast is then a slice of those arrays plus a
+lookup into the baselines.
+"""
+
+import numpy as np
+import pandas as pd
+
+TREND_THRESHOLD = 0.3  # change between first and second half that counts as a trend
+TREND_STEP = 0.2  # grade points added or removed for an improving or declining subject
+DIFFICULTY_PRIOR = 5  # pseudo-count shrinking a rarely taken subject's difficulty towards 0
+
+# (upper bound on the subject average, risk, label); anything higher is low risk
+RISK_BANDS = [
+    (2.0, 'critical', 'Critical'),
+    (2.5, 'high', 'High Risk'),
+    (3.0, 'moderate', 'Moderate'),
+]
+
+TRENDS = ('declining', 'stable', 'improving')  # indexed by trend + 1
+
+
+class SubjectPredictor:
+    def __init__(self, grades_df, grade_points):
+        df = pd.DataFrame({
+            'username': grades_df['username'].astype(str),
+            'semester': grades_df['semester'].astype(int),
+            'subject': grades_df['subject'].astype(str),
+            'grade': grades_df['grade'].astype(str),
+        })
+        df['points'] = df['grade'].map(grade_points)
+        df = df.dropna(subset=['points'])
+        df = df.sort_values(['username', 'subject', 'semester'], kind='stable').reset_index(drop=True)
+        codes, subjects = pd.factorize(df['subject'], sort=True)
+        df['code'] = codes
+        self.subjects = np.asarray(subjects, dtype=object)
+
+        # Cohort baselines, indexed by subject code
+        df['student_mean'] = df.groupby('username')['points'].transform('mean')
+        by_subject = df.groupby('code')
+        self.subject_students = by_subject['username'].nunique().to_numpy()
+        self.cohort_average = by_subject['points'].mean().to_numpy()
+        residual_sum = (df['points'] - df['student_mean']).groupby(df['code']).sum().to_numpy()
+        self.difficulty = residual_sum / (by_subject.size().to_numpy() + DIFFICULTY_PRIOR)
+
+        # First and second half of each (student, subject) history, split like the page did
+        per_subject = df.groupby(['username', 'code'], sort=True)
+        size = per_subject['points'].transform('size')
+        first_half = per_subject.cumcount() < np.ceil(size / 2)
+        df['first_half'] = df['points'].where(first_half)
+        df['second_half'] = df['points'].where(~first_half)
+
+        stats = per_subject.agg(
+            average=('points', 'mean'),
+            count=('points', 'size'),
+            last_grade=('grade', 'last'),
+            student_mean=('student_mean', 'first'),
+            first_half=('first_half', 'mean'),
+            second_half=('second_half', 'mean'),
+        )
+        stats['variance'] = per_subject['points'].var(ddof=0)
+        stats = stats.reset_index()
+
+        change = (stats['second_half'] - stats['first_half']).fillna(0).to_numpy()
+        self._trend = np.where(change > TREND_THRESHOLD, 1, np.where(change < -TREND_THRESHOLD, -1, 0))
+        self._code = stats['code'].to_numpy()
+        self._average = stats['average'].to_numpy()
+        self._variance = stats['variance'].to_numpy()
+        self._count = stats['count'].to_numpy()
+        self._last_grade = stats['last_grade'].to_numpy()
+        self._student_mean = stats['student_mean'].to_numpy()
+
+        # username -> (start, stop) of the student's rows
+        usernames = stats['username'].to_numpy()
+        starts = np.flatnonzero(np.r_[True, usernames[1:] != usernames[:-1]]) if len(usernames) else []
+        stops = np.r_[starts[1:], len(usernames)] if len(usernames) else []
+        self._rows = {usernames[start]: (int(start), int(stop)) for start, stop in zip(starts, stops)}
+
+    def __contains__(self, username):
+        return username in self._rows
+
+    def baselines(self):
+        """Cohort average and difficulty per subject, hardest first"""
+        order = np.argsort(self.difficulty, kind='stable')
+        return [
+            {
+                'subject': self.subjects[i],
+                'students': int(self.subject_students[i]),
+                'cohort_average': round(float(self.cohort_average[i]), 2),
+                'difficulty': round(float(self.difficulty[i]), 2),
+            }
+            for i in order
+        ]
+
+    def predict(self, username):
+        """Per-subject outlook for one student, weakest subjects first"""
+        if username not in self._rows:
+            return []
+        rows = slice(*self._rows[username])
+        codes = self._code[rows]
+        average = self._average[rows]
+        count = self._count[rows]
+        trend = self._trend[rows]
+
+        # What a student at this level usually gets in the subject, blended with
+        # the student's own record in it (more weight the more often it was taken)
+        expected = np.clip(self._student_mean[rows] + self.difficulty[codes], 0.0, 4.0)
+        own_weight = count / (count + 1.0)
+        predicted = np.clip(own_weight * average + (1 - own_weight) * expected + TREND_STEP * trend, 0.0, 4.0)
+        consistency = np.maximum(0.0, 100 - self._variance[rows] * 50)
+
+        bounds = np.array([upper for upper, _, _ in RISK_BANDS])
+        band = np.searchsorted(bounds, average, side='right')
+        risks = [risk for _, risk, _ in RISK_BANDS] + ['low']
+        labels = [label for _, _, label in RISK_BANDS] + ['Low Risk']
+
+        order = np.argsort(average, kind='stable')
+        return [
+            {
+                'name': self.subjects[codes[i]],
+                'average': round(float(average[i]), 2),
+                'trend': TRENDS[int(trend[i]) + 1],
+                'predicted_grade': round(float(predicted[i]), 2),
+                'expected': round(float(expected[i]), 2),
+                'difficulty': round(float(self.difficulty[codes[i]]), 2),
+                'cohort_average': round(float(self.cohort_average[codes[i]]), 2),
+                'risk': risks[band[i]],
+                'risk_label': labels[band[i]],
+                'consistency': round(float(consistency[i]), 1),
+                'last_grade': self._last_grade[i + rows.start],
+                'grades_count': int(count[i]),
+            }
+            for i in order
+        ]
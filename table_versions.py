@@ -0,0 +1,94 @@
+"""
+Storage Version Counters
+One monotonic counter per storage table, bumped by ExcelDatabase after every
+write to that table. The counters live in a small JSON file next to the CSVs,
+so every server process sees the same versions and they survive restarts.
+Readers compare counters instead of re-reading a table: the same counter
+means the same table contents.
+
+    data/table_versions.json    {table: {"version": n, "modified": unix time}}
+"""
+
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+# Optional cross-process write lock (POSIX only)
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+
+@contextmanager
+def file_lock(lock_path):
+    """Serialise a block across every process sharing the data folder"""
+    if fcntl is None:
+        yield
+        return
+    with open(lock_path, 'a') as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+class TableVersions:
+    def __init__(self, path):
+        self.path = path
+        self.lock_path = path + '.lock'
+        self._lock = threading.Lock()
+        self._source = None  # stat of the file the cached versions were read from
+        self._versions = {}
+
+    def _stat(self):
+        # Every bump replaces the file, so a new inode means new versions even
+        # when the mtime has not ticked
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            return None
+        return stat.st_ino, stat.st_mtime_ns, stat.st_size
+
+    def _read(self):
+        try:
+            with open(self.path) as f:
+                return json.load(f)
+        except (FileNotFoundError, ValueError):
+            return {}
+
+    def snapshot(self):
+        """{table: (version, modified)} as last written by any process"""
+        source = self._stat()
+        with self._lock:
+            if source != self._source:
+                self._versions = {
+                    table: (entry['version'], entry['modified'])
+                    for table, entry in self._read().items()
+                }
+                self._source = source
+            return self._versions
+
+    def get(self, table):
+        """(version, modified) of a table; (0, 0.0) if it was never written"""
+        return self.snapshot().get(table, (0, 0.0))
+
+    def bump(self, *tables):
+        """Record a write to the given tables; returns their new versions"""
+        with self._lock, file_lock(self.lock_path):
+            store = self._read()
+            now = time.time()
+            for table in tables:
+                entry = store.setdefault(table, {'version': 0})
+                entry['version'] += 1
+                entry['modified'] = now
+
+            tmp_path = f'{self.path}.{os.getpid()}.tmp'
+            with open(tmp_path, 'w') as f:
+                json.dump(store, f)
+            os.replace(tmp_path, self.path)
+            self._source = None
+        return {table: store[table]['version'] for table in tables}
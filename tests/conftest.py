@@ -0,0 +1,85 @@
+"""Shared fixtures: the Flask app running against a throwaway data folder"""
+
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from dataset import EXPECTED_COLUMNS, EXPECTED_ROWS
+
+CATEGORIES = {
+    'school': ['GP', 'MS'], 'sex': ['F', 'M'], 'address': ['U', 'R'],
+    'famsize': ['GT3', 'LE3'], 'Pstatus': ['T', 'A'],
+    'Mjob': ['at_home', 'health', 'other', 'services', 'teacher'],
+    'Fjob': ['at_home', 'health', 'other', 'services', 'teacher'],
+    'reason': ['course', 'home', 'other', 'reputation'],
+    'guardian': ['mother', 'father', 'other'],
+}
+YES_NO = ['schoolsup', 'famsup', 'paid', 'activities', 'nursery', 'higher', 'internet', 'romantic']
+
+
+def synthetic_students(rows=EXPECTED_ROWS, seed=0):
+    """A table with the UCI student-mat columns and value ranges"""
+    rng = np.random.default_rng(seed)
+    data = {}
+    for column in EXPECTED_COLUMNS:
+        if column in CATEGORIES:
+            data[column] = rng.choice(CATEGORIES[column], rows)
+        elif column in YES_NO:
+            data[column] = rng.choice(['yes', 'no'], rows)
+        else:
+            data[column] = rng.integers(1, 5, rows)
+    data['age'] = rng.integers(15, 22, rows)
+    data['failures'] = rng.integers(0, 4, rows)
+    data['absences'] = rng.integers(0, 30, rows)
+    data['G1'] = rng.integers(3, 20, rows)
+    data['G2'] = np.clip(data['G1'] + rng.integers(-2, 3, rows), 0, 20)
+    data['G3'] = np.clip(data['G2'] + rng.integers(-2, 3, rows), 0, 20)
+    return pd.DataFrame(data)[EXPECTED_COLUMNS]
+
+
+@pytest.fixture(scope='session')
+def trained():
+    from training import train_models
+    return train_models(synthetic_students(), test_size=0.2, random_state=42)
+
+
+@pytest.fixture(scope='session')
+def app_module(tmp_path_factory, trained):
+    """app.py imported in an empty working folder with a registered model"""
+    from model_registry import ModelRegistry
+
+    workdir = tmp_path_factory.mktemp('app')
+    (workdir / 'data').mkdir()
+    previous = os.getcwd()
+    os.chdir(workdir)
+    os.environ['APP_DEFER_BACKGROUND_TASKS'] = '1'
+    try:
+        ModelRegistry().register(trained, {'regressor': 'LinearRegression'})
+        sys.modules.pop('app', None)
+        import app
+        yield app
+    finally:
+        os.environ.pop('APP_DEFER_BACKGROUND_TASKS', None)
+        os.chdir(previous)
+
+
+@pytest.fixture
+def client(app_module):
+    return app_module.app.test_client()
+
+
+def register_and_login(client, username, password='pw', department='Computer Science', semester=3):
+    client.post('/register', data={
+        'username': username, 'password': password, 'confirm_password': password,
+        'department': department, 'semester': semester,
+    })
+    client.post('/login', data={'username': username, 'password': password})
+    return client
+
+
+def login_teacher(client):
+    client.post('/login', data={'username': 'Aatka Ali', 'password': 'Aatka123', 'user_type': 'teacher'})
+    return client
@@ -0,0 +1,45 @@
+"""Recording actual outcomes (/api/update-actual-performance)"""
+
+from tests.conftest import login_teacher, register_and_login
+
+
+def save_prediction(app_module, username):
+    return app_module.db.save_prediction(username, 3, 3.1, 'B+', 0.9, raw_forecast_cgpa=3.0)
+
+
+def test_student_cannot_record_outcome_of_another_students_prediction(app_module, client, monkeypatch):
+    submitted = []
+    monkeypatch.setattr(app_module.online_learner, 'submit', lambda *args: submitted.append(args))
+    register_and_login(app_module.app.test_client(), 'outcome_owner')
+    prediction_id = save_prediction(app_module, 'outcome_owner')
+
+    register_and_login(client, 'outcome_other')
+    response = client.post('/api/update-actual-performance', json={
+        'prediction_id': prediction_id, 'actual_cgpa': 1.0, 'actual_grade': 'D'
+    })
+
+    assert response.status_code == 403
+    assert submitted == []
+    assert app_module.db.get_prediction_owner(prediction_id) == 'outcome_owner'
+
+
+def test_owner_and_teacher_can_record_outcomes(app_module, monkeypatch):
+    submitted = []
+    monkeypatch.setattr(app_module.online_learner, 'submit', lambda *args: submitted.append(args))
+    owner = register_and_login(app_module.app.test_client(), 'outcome_self')
+    first = save_prediction(app_module, 'outcome_self')
+    second = save_prediction(app_module, 'outcome_self')
+
+    response = owner.post('/api/update-actual-performance', json={
+        'prediction_id': first, 'actual_cgpa': 3.2, 'actual_grade': 'B+'
+    })
+    assert response.status_code == 200 and response.get_json()['success']
+
+    teacher = login_teacher(app_module.app.test_client())
+    response = teacher.post('/api/update-actual-performance', json={
+        'prediction_id': second, 'actual_cgpa': 3.4, 'actual_grade': 'A-'
+    })
+    assert response.status_code == 200 and response.get_json()['success']
+
+    # The learner trains on the forecast before the online correction
+    assert submitted == [('outcome_self', 3, 3.0, 3.2), ('outcome_self', 3, 3.0, 3.4)]
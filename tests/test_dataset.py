@@ -0,0 +1,60 @@
+"""Downloading the dataset when no local copy exists"""
+
+import io
+import urllib.error
+import zipfile
+
+import pytest
+
+import dataset
+from tests.conftest import synthetic_students
+
+
+def archive_bytes(data):
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, 'w') as archive:
+        archive.writestr(dataset.CSV_NAME, data.to_csv(sep=';', index=False))
+    return buffer.getvalue()
+
+
+def serve(monkeypatch, payload):
+    requested = []
+
+    def urlopen(url, timeout=None):
+        requested.append(url)
+        if isinstance(payload, Exception):
+            raise payload
+        return io.BytesIO(payload)
+
+    monkeypatch.setattr(dataset.urllib.request, 'urlopen', urlopen)
+    return requested
+
+
+def test_missing_dataset_is_fetched_verified_and_recorded(tmp_path, monkeypatch):
+    requested = serve(monkeypatch, archive_bytes(synthetic_students()))
+
+    data = dataset.load_dataset(str(tmp_path), fetch_missing=True)
+
+    assert requested == [dataset.DATASET_URL]
+    assert len(data) == dataset.EXPECTED_ROWS
+    assert (tmp_path / dataset.ARCHIVE_NAME).exists()
+    assert (tmp_path / dataset.CHECKSUM_NAME).exists()
+
+    # Later loads use the local copy
+    assert len(dataset.load_dataset(str(tmp_path), fetch_missing=True)) == dataset.EXPECTED_ROWS
+    assert len(requested) == 1
+
+
+def test_download_that_is_not_the_uci_table_is_not_saved(tmp_path, monkeypatch):
+    serve(monkeypatch, archive_bytes(synthetic_students(rows=10)))
+
+    with pytest.raises(dataset.DatasetError):
+        dataset.load_dataset(str(tmp_path), fetch_missing=True)
+    assert not (tmp_path / dataset.ARCHIVE_NAME).exists()
+
+
+def test_failed_download_is_a_dataset_error(tmp_path, monkeypatch):
+    serve(monkeypatch, urllib.error.URLError('no network'))
+
+    with pytest.raises(dataset.DatasetError, match='downloading'):
+        dataset.load_dataset(str(tmp_path), fetch_missing=True)
@@ -0,0 +1,50 @@
+"""Compiled scorer against the sklearn pipelines it replaces"""
+
+import numpy as np
+import pytest
+
+from model_manager import ModelBundle
+from tests.conftest import login_teacher
+
+TOLERANCE = 1e-9
+
+
+@pytest.fixture(scope='module')
+def bundle(trained):
+    return ModelBundle(trained)
+
+
+def test_compiled_scorer_matches_pipeline(bundle):
+    assert bundle.fast_scoring_enabled
+    X = bundle.X_test
+    records = X.to_dict('records')
+
+    g3, pass_prob = bundle.score_rows(records)
+
+    np.testing.assert_allclose(g3, bundle.model.predict(X), rtol=0, atol=TOLERANCE)
+    np.testing.assert_allclose(pass_prob, bundle.clf.predict_proba(X)[:, 1], rtol=0, atol=TOLERANCE)
+    for record, expected in zip(records[:10], bundle.model.predict(X[:10])):
+        assert bundle.g3_scorer.score(record) == pytest.approx(expected, abs=TOLERANCE)
+
+
+def test_missing_and_null_features_take_training_defaults(bundle):
+    record = bundle.X_test.iloc[0].to_dict()
+    nulled = dict(record, absences=None, Mjob=None)
+    absent = {col: value for col, value in record.items() if col not in ('absences', 'Mjob')}
+
+    g3, pass_prob = bundle.score_rows([nulled, absent])
+
+    assert np.all(np.isfinite(g3)) and np.all(np.isfinite(pass_prob))
+    assert g3[0] == pytest.approx(g3[1]) and pass_prob[0] == pytest.approx(pass_prob[1])
+
+
+def test_score_endpoint_rejects_non_finite_values(app_module, client):
+    login_teacher(client)
+
+    response = client.post('/api/score', json={'row': {'absences': None}})
+    assert response.status_code == 200
+    assert np.isfinite(response.get_json()['predictions'][0]['predicted_g3'])
+
+    response = client.post('/api/score', data='{"row": {"absences": NaN}}', content_type='application/json')
+    assert response.status_code == 400
+    assert 'finite' in response.get_json()['error']
@@ -0,0 +1,27 @@
+"""Admission control on the prediction endpoints"""
+
+from rate_limit import RateLimiter
+from tests.conftest import register_and_login
+
+
+def admitted(limiter, key, attempts):
+    return sum(limiter.acquire(key) == 0 for _ in range(attempts))
+
+
+def test_first_semester_prediction_is_rate_limited(app_module, client):
+    register_and_login(client, 'limited_student')
+    burst = app_module.RATE_LIMITERS['predict'].per_key_burst
+
+    statuses = [client.post('/api/predict/first-semester', json={}).status_code for _ in range(int(burst) + 1)]
+
+    assert 429 not in statuses[:-1]
+    assert statuses[-1] == 429
+
+
+def test_worker_processes_share_the_configured_limits():
+    single = RateLimiter(1, 8, 100, 100)
+    per_worker = RateLimiter(1, 8, 100, 100, processes=4)
+
+    assert admitted(single, 'user', 20) == 8
+    assert admitted(per_worker, 'user', 20) == 2
+    assert per_worker.stats()['processes'] == 4
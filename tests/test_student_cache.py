@@ -0,0 +1,19 @@
+"""Copies handed out from the cached teacher dashboard student list"""
+
+from database import ExcelDatabase
+
+
+def test_changes_to_returned_students_do_not_reach_the_cache(tmp_path):
+    db = ExcelDatabase(data_folder=str(tmp_path), use_snapshots=False)
+    db.register_student('cached_student', 'pw', 'Computer Science', 3)
+    db.save_prediction('cached_student', 3, 3.1, 'B+', 0.9)
+
+    first = db.get_all_students_with_predictions()[0]
+    first['latest_prediction']['grade'] = 'F'
+    first['history'].clear()
+    first['category'] = 'worst'
+
+    second = db.get_all_students_with_predictions()[0]
+    assert second['latest_prediction']['grade'] == 'B+'
+    assert len(second['history']) == 1
+    assert 'category' not in second
@@ -0,0 +1,68 @@
+"""Conditional GETs, student page cursors and delta sync"""
+
+import base64
+import json
+
+from change_feed import ChangeFeed
+from database import ExcelDatabase
+from tests.conftest import login_teacher, register_and_login
+
+
+def test_matching_etag_gets_304_until_the_data_changes(app_module, client):
+    register_and_login(client, 'etag_student')
+    first = client.get('/api/prediction-history')
+    etag = first.headers['ETag']
+    assert first.status_code == 200
+
+    cached = client.get('/api/prediction-history', headers={'If-None-Match': etag})
+    assert cached.status_code == 304
+    assert cached.data == b''
+
+    app_module.db.save_prediction('etag_student', 3, 3.1, 'B+', 0.9)
+    changed = client.get('/api/prediction-history', headers={'If-None-Match': etag})
+    assert changed.status_code == 200
+    assert changed.headers['ETag'] != etag
+    assert len(changed.get_json()['history']) == 1
+
+
+def test_invalid_cursor_is_rejected(client):
+    login_teacher(client)
+    wrong_shape = base64.urlsafe_b64encode(json.dumps({'sort': 'cgpa'}).encode()).decode()
+
+    for cursor in ('not-a-cursor', wrong_shape):
+        response = client.get('/api/teacher/students', query_string={'cursor': cursor})
+        assert response.status_code == 400
+        assert response.get_json()['success'] is False
+
+
+def test_change_feed_resets_when_events_are_no_longer_kept(tmp_path):
+    feed = ChangeFeed(str(tmp_path / 'change_log.csv'), max_events=3)
+    for username in ('a', 'b', 'c', 'd', 'e'):
+        feed.publish([username], 'prediction')
+
+    assert feed.since(0) == (None, 5)
+    assert feed.since(1) == (None, 5)
+    events, latest = feed.since(2)
+    assert [event[1] for event in events] == ['c', 'd', 'e'] and latest == 5
+    # A version from the future (e.g. a log that was reset) also needs a full reload
+    assert feed.since(9) == (None, 5)
+
+
+def test_student_changes_fall_back_to_every_student(tmp_path):
+    db = ExcelDatabase(data_folder=str(tmp_path), use_snapshots=False)
+    db.changes = ChangeFeed(db.changes.path, max_events=2)
+    for username in ('sync_a', 'sync_b', 'sync_c'):
+        db.register_student(username, 'pw', 'Computer Science', 3)
+    start = db.get_student_changes()['version']
+    db.save_prediction('sync_a', 3, 3.1, 'B+', 0.9)
+    db.save_prediction('sync_b', 3, 2.4, 'C', 0.6)
+    db.save_prediction('sync_c', 3, 3.8, 'A', 0.99)
+
+    delta = db.get_student_changes(since=start + 1)
+    assert delta['reset'] is False
+    assert sorted(s['id'] for s in delta['students']) == ['sync_b', 'sync_c']
+
+    reset = db.get_student_changes(since=start)
+    assert reset['reset'] is True
+    assert sorted(s['id'] for s in reset['students']) == ['sync_a', 'sync_b', 'sync_c']
+    assert reset['version'] == delta['version'] == start + 3
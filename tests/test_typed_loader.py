@@ -0,0 +1,45 @@
+"""Memory footprint of the typed analytics loader (ExcelDatabase.read_typed_table)"""
+
+import numpy as np
+import pandas as pd
+
+from database import ExcelDatabase, GRADE_TO_GPA
+
+ROWS = 1_000_000
+STUDENTS = 20_000
+
+
+def write_synthetic_grades(db, rows=ROWS, seed=0):
+    """A grades table with the shape of data/student_grades.csv"""
+    rng = np.random.default_rng(seed)
+    usernames = np.array([f'student_{i:05d}' for i in range(STUDENTS)])
+    subjects = np.array([s for department in db.DEPARTMENT_SUBJECTS.values() for s in department])
+    grades = np.array(list(GRADE_TO_GPA))
+    pd.DataFrame({
+        'username': usernames[rng.integers(0, len(usernames), rows)],
+        'semester': rng.integers(1, 9, rows),
+        'subject': subjects[rng.integers(0, len(subjects), rows)],
+        'grade': grades[rng.integers(0, len(grades), rows)],
+        'updated_at': '2024-05-01 10:00:00',
+    }).to_csv(db.grades_file, index=False)
+
+
+def test_typed_grades_use_much_less_memory(tmp_path):
+    db = ExcelDatabase(data_folder=str(tmp_path), use_snapshots=False)
+    write_synthetic_grades(db)
+
+    typed = db.read_typed_table('grades')
+    # What a plain read_csv gives: object (pandas 2) or string (pandas 3) columns
+    untyped = pd.read_csv(db.grades_file)
+
+    assert len(typed) == len(untyped) == ROWS
+    assert typed['username'].dtype == 'category'
+    assert typed['semester'].dtype == 'int8'
+    assert pd.api.types.is_datetime64_any_dtype(typed['updated_at'])
+
+    typed_bytes = typed.memory_usage(deep=True).sum()
+    untyped_bytes = untyped.memory_usage(deep=True).sum()
+    assert typed_bytes * 4 < untyped_bytes, (typed_bytes, untyped_bytes)
+
+    # Same values, only stored more compactly
+    assert (typed['grade'].astype(str).to_numpy() == untyped['grade'].astype(str).to_numpy()).all()